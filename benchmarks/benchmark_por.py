@@ -0,0 +1,57 @@
+"""
+Benchmark: reading POR files, where the number of rows is not known in advance.
+The columns grow while parsing, the time per row should stay constant as the
+number of rows grows.
+
+Run with: python benchmarks/benchmark_por.py --inplace [--rows 1000000,2500000,5000000,10000000] [--output_format pandas]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+
+def make_por(path, n_rows):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(n_rows, dtype=np.float64),
+        "value": rng.random(n_rows).round(4),
+        "group": rng.choice(["a", "bb", "ccc"], n_rows),
+    })
+    pyreadstat.write_por(df, path)
+
+
+def main(rows, output_format):
+    print("package location:", pyreadstat.__file__)
+    print("{0:>12} {1:>10} {2:>16}".format("rows", "seconds", "us per row"))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n_rows in rows:
+            path = os.path.join(tmpdir, "bench_{0}.por".format(n_rows))
+            make_por(path, n_rows)
+            start = time.perf_counter()
+            df, meta = pyreadstat.read_por(path, output_format=output_format)
+            elapsed = time.perf_counter() - start
+            os.remove(path)
+            print("{0:>12} {1:>10.2f} {2:>16.3f}".format(n_rows, elapsed, elapsed / n_rows * 1e6))
+
+
+if __name__ == "__main__":
+
+    if "--inplace" in sys.argv:
+
+        script_folder = os.path.split(os.path.split(os.path.realpath(__file__))[0])[0]
+        sys.path.insert(0, script_folder)
+        sys.argv.remove('--inplace')
+
+    import pyreadstat
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1000000,2500000,5000000,10000000",
+                        help="comma separated list of number of rows")
+    parser.add_argument("--output_format", default="pandas")
+    args = parser.parse_args()
+
+    main([int(x) for x in args.rows.split(",")], args.output_format)
@@ -17,10 +17,14 @@
 
 from .pyreadstat import read_sav, read_sas7bdat, read_xport, read_dta, read_por, read_sas7bcat
 from .pyreadstat import write_sav, write_dta, write_xport, write_por
-from .pyreadstat import read_file_in_chunks, read_file_multiprocessing
+from .pyreadstat import read_file_in_chunks, read_file_multiprocessing, build_index
 from .pyclasses import metadata_container
-from ._readstat_parser import ReadstatError, PyreadstatError
+from .worker import ReadExecutor
+from .remote import HttpRangeFile
+from .cache import ColumnCache
+from ._readstat_parser import ReadstatError, PyreadstatError, MetadataCache, metadata_cache
 from .pyfunctions import set_value_labels, set_catalog_to_sas
+from . import aio
 
 __version__ = "1.3.4"
 
@@ -37,9 +41,15 @@ __all__ = (
     "write_por",
     "read_file_in_chunks",
     "read_file_multiprocessing",
+    "build_index",
     "metadata_container",
+    "ReadExecutor",
+    "HttpRangeFile",
+    "ColumnCache",
     "ReadstatError",
     "PyreadstatError",
+    "MetadataCache",
+    "metadata_cache",
     "set_value_labels",
     "set_catalog_to_sas",
 )
\ No newline at end of file
@@ -15,6 +15,7 @@
 # limitations under the License.
 # #############################################################################
 
+from cpython.object cimport PyObject
 from libc.stddef cimport wchar_t
 from readstat_api cimport *
 
@@ -43,7 +44,60 @@ ctypedef enum py_variable_format:
     VAR_FORMAT_LONG
     VAR_FORMAT_FLOAT
     VAR_FORMAT_MISSING
+
+ctypedef enum py_column_storage:
+    COL_STORAGE_DOUBLE
+    COL_STORAGE_INT8
+    COL_STORAGE_INT16
+    COL_STORAGE_INT32
+    COL_STORAGE_STRING
+    COL_STORAGE_CATEGORY
+    COL_STORAGE_OBJECT
     
+# State read and written by handle_value. It is a plain C struct so that the values can be stored
+# without holding the GIL, dc points back to the data container owning it.
+ctypedef struct parse_state:
+    PyObject * dc
+    int max_n_obs
+    bint is_unkown_number_rows
+    bint usernan
+    # per column native buffers and flags, indexed by variable index after skipping
+    int n_allocated_vars
+    py_column_storage * col_storage
+    int * col_capacity
+    char ** col_buffers
+    uint8_t ** col_missing
+    int64_t ** col_str_offsets
+    int64_t * col_str_capacity
+    int64_t * col_str_rows
+    char ** col_dict_bytes
+    int64_t * col_dict_capacity
+    int32_t ** col_hash_slots
+    int64_t * col_hash_size
+    # streaming chunks of rows: rows per chunk (0 if not streaming) and first row of the current chunk
+    int stream_rows
+    int stream_start
+    # row filter: rows per block evaluated at once (0 if there is no filter), first row of the current block
+    # in the buffers and number of rows dropped so far
+    int filter_rows
+    int filter_start
+    int filter_dropped
+
+# Buffer of a FileObjectReader read by the file-like object handlers without the GIL: data and length of
+# the buffer, offset in the file of its first byte and current position
+ctypedef struct file_buffer:
+    PyObject * reader
+    char * data
+    Py_ssize_t length
+    readstat_off_t start
+    readstat_off_t pos
+
+# File mapped in memory read by the mmap io handlers: data and size of the mapping and current position
+ctypedef struct mmap_io_ctx:
+    const char * data
+    Py_ssize_t size
+    Py_ssize_t pos
+
 # Definitions of extension types
     
 cdef class data_container:
@@ -53,21 +107,20 @@ cdef class data_container:
     """
     cdef int n_obs
     cdef int n_vars
-    cdef int max_n_obs
     cdef list col_data
-    cdef list col_data_len
+    cdef list col_missing_masks
+    cdef list col_str_offsets_arrays
+    cdef list col_dict_arrays
+    cdef list col_hash_arrays
     cdef list col_names
     cdef list col_labels
     cdef list col_dtypes
-    cdef list col_numpy_dtypes
-    cdef list col_dtypes_isobject
-    cdef list col_dytpes_isfloat
     cdef list col_formats
+    cdef parse_state state
     cdef list col_formats_original
     cdef object origin
     cdef double unix_to_origin_secs
     cdef py_file_format file_format
-    cdef bint is_unkown_number_rows
     cdef str file_label
     cdef str file_encoding
     cdef bint metaonly
@@ -79,7 +132,6 @@ cdef class data_container:
     cdef str table_name
     cdef bint filter_cols
     cdef list use_cols
-    cdef bint usernan
     cdef dict missing_ranges
     cdef dict missing_user_values
     cdef dict variable_storage_width
@@ -91,49 +143,122 @@ cdef class data_container:
     cdef int mtime
     cdef dict mr_sets
     cdef str output_format
+    cdef object missing_object
+    cdef bint pandas_datetime_us
+    cdef bint nullable_integers
+    cdef bint strings_as_category
+    cdef bint apply_value_formats
+    cdef bint formats_as_category
+    cdef bint formats_as_ordered_category
+    cdef dict value_labels
+    cdef dict date_formats
+    # reading row ranges in parallel
+    cdef dict shared_columns
+    cdef object shared_lock
+    cdef int row_base
+    cdef int shared_rows
+    cdef int range_rows
+    # streaming chunks of rows, the RowChunkStream receiving them
+    cdef object stream
+    # row index of compressed sav files: checkpoints to resume from and interval to report them
+    cdef list row_checkpoints
+    cdef long checkpoint_interval
+    # zsav blocks inflated ahead by worker threads
+    cdef int num_threads
+    cdef object inflater
+    # io backend for file paths: None for system calls or 'mmap'
+    cdef str io
+    # read-ahead buffer for file-like objects, see FileObjectReader
+    cdef Py_ssize_t buffer_size
+    # value labels and notes already known, readstat does not parse them
+    cdef bint labels_known
+    # narwhals expression of the row filter and names of the columns it uses, None if not known
+    cdef object row_filter
+    cdef list row_filter_columns
     
-cdef dict readstat_to_numpy_types
 
 # definitions of functions
-cdef py_datetime_format transform_variable_format(str var_format, py_file_format file_format)
+cdef dict build_date_formats(py_file_format file_format, list extra_datetime_formats, list extra_date_formats,
+                             list extra_time_formats)
+cdef py_datetime_format transform_variable_format(str var_format, dict date_formats)
+cdef py_column_storage readstat_type_to_storage(readstat_type_t var_type) except *
 cdef object transform_datetime(py_datetime_format var_format, double tstamp, py_file_format file_format, object origin,
                                bint dates_as_pandas, str output_format, double unix_to_origin_secs)
+cdef object transform_datetime_column(py_datetime_format var_format, object tstamps, data_container dc)
 
-cdef int handle_metadata(readstat_metadata_t *metadata, void *ctx) except READSTAT_HANDLER_ABORT
+cdef int handle_metadata(readstat_metadata_t *metadata, void *ctx) except READSTAT_HANDLER_ABORT with gil
 cdef int handle_variable(int index, readstat_variable_t *variable, 
-                         char *val_labels, void *ctx) except READSTAT_HANDLER_ABORT
-cdef int handle_value(int obs_index, readstat_variable_t * variable, readstat_value_t value, void *ctx) except READSTAT_HANDLER_ABORT
-cdef int handle_value_label(char *val_labels, readstat_value_t value, char *label, void *ctx) except READSTAT_HANDLER_ABORT
-cdef int handle_note (int note_index, char *note, void *ctx) except READSTAT_HANDLER_ABORT
+                         char *val_labels, void *ctx) except READSTAT_HANDLER_ABORT with gil
+cdef int handle_value(int obs_index, readstat_variable_t * variable, readstat_value_t value, void *ctx) except READSTAT_HANDLER_ABORT nogil
+cdef int handle_value_label(char *val_labels, readstat_value_t value, char *label, void *ctx) except READSTAT_HANDLER_ABORT with gil
+cdef int handle_note (int note_index, char *note, void *ctx) except READSTAT_HANDLER_ABORT with gil
+cdef int handle_checkpoint(const readstat_row_checkpoint_t *checkpoint, void *ctx) except READSTAT_HANDLER_ABORT with gil
 
 cdef void check_exit_status(readstat_error_t retcode) except *
 
 cdef void run_readstat_parser(char * filename, data_container data, py_file_extension file_extension, long row_limit, long row_offset) except *
+cdef dict data_container_settings(data_container data)
+cdef data_container data_container_from_settings(dict settings)
+cdef object copy_metadata_value(object value)
+cdef tuple metadata_snapshot(data_container dc)
+cdef void restore_metadata(data_container dc, tuple snapshot) except *
+cdef void read_file_metadata(bytes filename_bytes, data_container data, py_file_extension file_extension) except *
+cdef void use_known_labels(data_container data, object labels_raw, object notes) except *
+cdef str column_cache_options(data_container data, py_file_extension file_extension, long row_limit, long row_offset,
+                              str row_filter)
+cdef dict export_data_container(data_container data)
+cdef void import_data_container(data_container data, dict entry) except *
+cdef dict shared_buffer_columns(object buffer, dict layout, int shared_rows)
+cdef dict export_row_range(data_container dc)
+cdef data_container import_row_range(data_container merged, dict exported, int row_base)
+cdef void import_columns(data_container dc, list columns, dict shared_columns, int row_base) except *
+cdef data_container run_row_ranges(bytes filename_bytes, data_container data, py_file_extension file_extension, list row_ranges,
+                                   object executor)
+cdef data_container run_sas7bdat_threads(bytes filename_bytes, data_container data, long row_limit, long row_offset,
+                                         int num_threads)
+cdef data_container run_row_ranges_in_processes(bytes filename_bytes, data_container data, py_file_extension file_extension,
+                                                list row_ranges, object executor)
+cdef void join_row_ranges(data_container merged, list chunks) except *
+cdef py_column_storage column_storage(data_container dc, str col_name, readstat_type_t var_type,
+                                      py_datetime_format var_format) except *
+cdef object column_value_labels(data_container dc, str col_name)
+cdef data_container detach_stream_chunk(data_container dc, int rows)
+cdef void emit_stream_chunk(data_container dc) except *
+cdef int stream_chunk_rows(data_container dc)
+cdef void read_stata_labels_first(data_container dc, bytes filename_bytes, object file_obj) except *
+cdef object row_block_frame(data_container dc, list indexes, int start, int end)
+cdef int filter_rows(data_container dc, int start, int end) except -1
+cdef void filter_row_block(data_container dc, int end) except *
+cdef void finish_row_filter(data_container dc) except *
+cdef void drop_columns(data_container dc, list names) except *
 cdef object data_container_to_dict(data_container data)
 cdef object dict_to_dataframe(object dict_data, data_container dc)
+cdef object apply_value_labels_to_frame(object data_frame, data_container dc)
 cdef object data_container_extract_metadata(data_container data)
 cdef object run_conversion(object filename_path, py_file_format file_format, py_file_extension file_extension,
                            str encoding, bint metaonly, bint dates_as_pandas, list usecols, bint usernan,
                            bint no_datetime_conversion, long row_limit, long row_offset, str output_format, list extra_datetime_formats, 
-			   list extra_date_formats, list extra_time_formats)
+			   list extra_date_formats, list extra_time_formats, str integers_with_missing,
+                           bint strings_as_category, bint apply_value_formats, bint formats_as_category,
+                           bint formats_as_ordered_category, dict value_labels, list row_ranges,
+                           object row_range_executor, object row_chunk_stream, list row_checkpoints,
+                           int num_threads, str io, Py_ssize_t buffer_size, object parsed_metadata,
+                           object cache_dir, object row_filter)
 
 # definitions for stuff about dates
 cdef list sas_date_formats 
 cdef list sas_datetime_formats 
 cdef list sas_time_formats 
-cdef list sas_all_formats 
 cdef object sas_origin
 
 cdef list spss_datetime_formats 
 cdef list spss_date_formats 
 cdef list spss_time_formats 
-cdef list spss_all_formats 
 cdef object spss_origin
 
 cdef list stata_datetime_formats
 cdef list stata_date_formats
 cdef list stata_time_formats 
-cdef list stata_all_formats 
 cdef object stata_origin
 
 # Stuff for opening files on windows in order to handle international characters
@@ -18,17 +18,33 @@
 
 ## if want to profile: # cython: profile=True
 
-from cpython.datetime cimport import_datetime, timedelta_new, datetime_new, total_seconds
+from cpython.buffer cimport PyObject_GetBuffer, PyBuffer_Release, PyBUF_SIMPLE, PyBUF_WRITE
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from cpython.datetime cimport import_datetime, timedelta_new, datetime_new, time_new, total_seconds
 from cpython.exc cimport PyErr_Occurred
+from cpython.memoryview cimport PyMemoryView_FromMemory
 from cpython.object cimport PyObject
-from libc.math cimport floor
-from libc.string cimport memcpy
+from cpython.unicode cimport PyUnicode_DecodeUTF8
+from libc.math cimport floor, NAN
+from libc.stdlib cimport calloc, free
+from libc.stdint cimport uint64_t
+from libc.string cimport memcmp, memcpy, memmove, strlen
+from libc.limits cimport INT_MAX
 
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+import contextlib
+import contextvars
 import datetime
+import mmap
 import os
+import queue
+import tempfile
+import threading
+import uuid
 import warnings
 import sys
+import zlib
 
 import narwhals.stable.v2 as nw
 import numpy as np
@@ -36,6 +52,10 @@ import numpy as np
 from readstat_api cimport *
 
 from pyclasses import metadata_container
+from remote import HttpRangeFile, is_url
+from cache import ColumnCache
+from filters import compile_row_filter, evaluation_format, row_filter_mask
+from pyfunctions import set_value_labels
 
 # necessary to work with the datetime C API
 import_datetime()
@@ -56,7 +76,6 @@ cdef list sas_datetime_formats = ["DATETIME", "DATETIME18", "DATETIME19",  "DATE
 cdef list sas_time_formats = ["TIME", "HHMM", "TIME20.3", "TIME20", "TIME5", "TOD", "TIMEAMPM", "IS8601TM", "E8601TM", "B8601TM", ]
 # "HOUR" # these do not print as full time formats in sas 
 #cdef list sas_all_formats = sas_date_formats + sas_datetime_formats + sas_time_formats
-cdef list sas_all_formats
 cdef object sas_origin = datetime_new(1960, 1, 1, 0, 0, 0, 0, None)
 cdef object sas_secs_from_unix = total_seconds(unix_origin - sas_origin)
 
@@ -64,7 +83,6 @@ cdef list spss_datetime_formats = ["DATETIME", "DATETIME8", 'DATETIME17', 'DATET
 cdef list spss_date_formats = ["DATE",'DATE8','DATE11', 'DATE12', "ADATE","ADATE8", "ADATE10", "EDATE", 'EDATE8','EDATE10', "JDATE", "JDATE5", "JDATE7", "SDATE", "SDATE8", "SDATE10",]
 cdef list spss_time_formats = ["TIME", "DTIME", 'TIME8', 'TIME5', 'TIME11.2']
 #cdef list spss_all_formats = spss_date_formats + spss_datetime_formats + spss_time_formats
-cdef list spss_all_formats
 cdef object spss_origin = datetime_new(1582, 10, 14, 0, 0, 0, 0, None)
 cdef object spss_secs_from_unix = total_seconds(unix_origin - spss_origin)
 
@@ -72,13 +90,17 @@ cdef list stata_datetime_formats = ["%tC", "%tc"]
 cdef list stata_date_formats = ["%td", "%d", "%tdD_m_Y", "%tdCCYY-NN-DD"]
 cdef list stata_time_formats = ["%tcHH:MM:SS", "%tcHH:MM"]
 #cdef list stata_all_formats = stata_datetime_formats + stata_date_formats + stata_time_formats
-cdef list stata_all_formats
 cdef object stata_origin = datetime_new(1960, 1, 1, 0, 0, 0, 0, None)
 cdef object stata_secs_from_unix = total_seconds(unix_origin - stata_origin)
 
-cdef dict readstat_to_numpy_types = {READSTAT_TYPE_STRING: object, READSTAT_TYPE_STRING_REF: object,
-                                     READSTAT_TYPE_INT8: np.int64, READSTAT_TYPE_INT16: np.int64, READSTAT_TYPE_INT32:np.int64,
-                                     READSTAT_TYPE_FLOAT: np.float64, READSTAT_TYPE_DOUBLE: np.float64}
+# rows added to every column each time a file with an unknown number of rows runs out of room
+cdef int UNKNOWN_ROWS_CHUNK = 100000
+# rows evaluated at once by the row filter while parsing
+cdef int ROW_FILTER_BLOCK = 100000
+# bytes read at once from file-like objects by default, see FileObjectReader
+cdef Py_ssize_t FILE_BUFFER_SIZE = 4 * 1024 * 1024
+# initial number of distinct values in columns with strings as categories
+cdef int CATEGORY_INITIAL_SIZE = 64
 
 cdef class data_container:
     """
@@ -89,20 +111,33 @@ cdef class data_container:
     def __cinit__(self):
         self.n_obs = 0
         self.n_vars = 0
-        self.max_n_obs = 0
+        self.state.max_n_obs = 0
         self.col_data = list()
-        self.col_data_len = list()
+        self.col_missing_masks = list()
+        self.col_str_offsets_arrays = list()
+        self.col_dict_arrays = list()
+        self.col_hash_arrays = list()
         self.col_names = list()
         self.col_labels = list()
         self.col_dtypes = list()
-        self.col_numpy_dtypes = list()
-        self.col_dtypes_isobject = list()
-        self.col_dytpes_isfloat = list()
         self.col_formats = list()
+        self.state.dc = <PyObject *> self
+        self.state.n_allocated_vars = 0
+        self.state.col_storage = NULL
+        self.state.col_capacity = NULL
+        self.state.col_buffers = NULL
+        self.state.col_missing = NULL
+        self.state.col_str_offsets = NULL
+        self.state.col_str_capacity = NULL
+        self.state.col_str_rows = NULL
+        self.state.col_dict_bytes = NULL
+        self.state.col_dict_capacity = NULL
+        self.state.col_hash_slots = NULL
+        self.state.col_hash_size = NULL
         self.col_formats_original = list()
         self.origin = None
         self.unix_to_origin_secs = 0
-        self.is_unkown_number_rows = 0
+        self.state.is_unkown_number_rows = 0
         self.file_encoding = None
         self.file_label = None
         self.metaonly = 0
@@ -114,7 +149,7 @@ cdef class data_container:
         self.table_name = None
         self.filter_cols = 0
         self.use_cols = list()
-        self.usernan = 0
+        self.state.usernan = 0
         self.missing_ranges = dict()
         self.missing_user_values = dict()
         self.variable_storage_width = dict()
@@ -126,6 +161,50 @@ cdef class data_container:
         self.mtime = 0
         self.mr_sets = dict()
         self.output_format = ""
+        self.missing_object = np.nan
+        self.pandas_datetime_us = 1
+        self.nullable_integers = 0
+        self.strings_as_category = 0
+        self.apply_value_formats = 0
+        self.formats_as_category = 1
+        self.formats_as_ordered_category = 0
+        self.value_labels = None
+        self.date_formats = dict()
+        self.shared_columns = None
+        self.shared_lock = None
+        self.row_base = 0
+        self.shared_rows = 0
+        self.range_rows = 0
+        self.state.stream_rows = 0
+        self.state.stream_start = 0
+        self.stream = None
+        self.row_checkpoints = None
+        self.checkpoint_interval = 0
+        self.num_threads = 1
+        self.inflater = None
+        self.io = None
+        self.buffer_size = FILE_BUFFER_SIZE
+        self.labels_known = 0
+        self.row_filter = None
+        self.row_filter_columns = None
+        self.state.filter_rows = 0
+        self.state.filter_start = 0
+        self.state.filter_dropped = 0
+
+    def __dealloc__(self):
+        # the buffers themselves are owned by the numpy arrays in col_data, here we only
+        # release the arrays of pointers and flags
+        free(self.state.col_storage)
+        free(self.state.col_capacity)
+        free(self.state.col_buffers)
+        free(self.state.col_missing)
+        free(self.state.col_str_offsets)
+        free(self.state.col_str_capacity)
+        free(self.state.col_str_rows)
+        free(self.state.col_dict_bytes)
+        free(self.state.col_dict_capacity)
+        free(self.state.col_hash_slots)
+        free(self.state.col_hash_size)
 
 
 class ReadstatError(Exception):
@@ -143,42 +222,40 @@ class PyreadstatError(Exception):
 
 
 
-cdef py_datetime_format transform_variable_format(str var_format, py_file_format file_format):
+cdef dict build_date_formats(py_file_format file_format, list extra_datetime_formats, list extra_date_formats,
+                             list extra_time_formats):
     """
-    Transforms a readstat var_format to a date, datetime or time format label
+    Builds the mapping from a readstat var_format to a date, datetime or time format label for one parse,
+    adding the user extra formats to the default ones of the file format.
     """
+    cdef list date_formats, datetime_formats, time_formats
+    cdef dict formats = dict()
+    cdef str var_format
+
     if file_format == FILE_FORMAT_SAS:
-        if var_format in sas_all_formats:
-            if var_format in sas_date_formats:
-                return DATE_FORMAT_DATE
-            elif var_format in sas_datetime_formats:
-                return DATE_FORMAT_DATETIME
-            elif var_format in sas_time_formats:
-                return DATE_FORMAT_TIME
-        else:
-            return DATE_FORMAT_NOTADATE
-        
+        date_formats, datetime_formats, time_formats = sas_date_formats, sas_datetime_formats, sas_time_formats
     elif file_format == FILE_FORMAT_SPSS:
-        if var_format in spss_all_formats:
-            if var_format in spss_date_formats:
-                return DATE_FORMAT_DATE
-            elif var_format in spss_datetime_formats:
-                return DATE_FORMAT_DATETIME
-            elif var_format in spss_time_formats:
-                return DATE_FORMAT_TIME
-        else:
-            return DATE_FORMAT_NOTADATE
-        
+        date_formats, datetime_formats, time_formats = spss_date_formats, spss_datetime_formats, spss_time_formats
     elif file_format == FILE_FORMAT_STATA:
-        if var_format in stata_all_formats:
-            if var_format in stata_date_formats:
-                return DATE_FORMAT_DATE
-            elif var_format in stata_datetime_formats:
-                return DATE_FORMAT_DATETIME
-            elif var_format in stata_time_formats:
-                return DATE_FORMAT_TIME
-        else:
-            return DATE_FORMAT_NOTADATE
+        date_formats, datetime_formats, time_formats = stata_date_formats, stata_datetime_formats, stata_time_formats
+    else:
+        raise PyreadstatError("Unknown file format")
+
+    # if a format is in several lists, date wins over datetime and datetime over time
+    for var_format in time_formats + (extra_time_formats or []):
+        formats[var_format] = DATE_FORMAT_TIME
+    for var_format in datetime_formats + (extra_datetime_formats or []):
+        formats[var_format] = DATE_FORMAT_DATETIME
+    for var_format in date_formats + (extra_date_formats or []):
+        formats[var_format] = DATE_FORMAT_DATE
+    return formats
+
+
+cdef py_datetime_format transform_variable_format(str var_format, dict date_formats):
+    """
+    Transforms a readstat var_format to a date, datetime or time format label
+    """
+    return date_formats.get(var_format, DATE_FORMAT_NOTADATE)
 
 cdef object transform_datetime(py_datetime_format var_format, double tstamp, py_file_format file_format, object origin,
                                bint dates_as_pandas, str output_format, double unix_to_origin_secs):
@@ -269,6 +346,104 @@ cdef object transform_datetime(py_datetime_format var_format, double tstamp, py_
         return mydat.time()
 
 
+cdef object transform_datetime_column(py_datetime_format var_format, object tstamps, data_container dc):
+    """
+    Vectorized version of transform_datetime: transforms a numpy array of tstamps (number of days, seconds 
+    or milliseconds from the origin of the file format) to numpy datetime64 or arrays of date or time python
+    objects. For polars epochs from the unix origin are returned for dates and datetimes, which are later
+    transformed with polars from_epoch. For arrow numpy datetime64 is returned for dates and datetimes and
+    microseconds since midnight for times.
+    Missing values (nan) have to be set by the caller.
+    """
+
+    cdef py_file_format file_format = dc.file_format
+    cdef double unix_to_origin_secs = dc.unix_to_origin_secs
+    cdef object days, secs, usecs, msecs, tod
+    cdef object result
+    cdef object[::1] view
+    cdef int64_t[::1] tod_view
+    cdef int64_t cur_tod
+    cdef Py_ssize_t i
+
+    if var_format == DATE_FORMAT_DATE or var_format == DATE_FORMAT_DATETIME:
+        if dc.output_format == "polars":
+            if var_format == DATE_FORMAT_DATE:
+                # we want to return days from unix
+                if file_format == FILE_FORMAT_SPSS:
+                    # tstamp is in seconds
+                    return (tstamps - unix_to_origin_secs)/86400
+                # tstamp is in days
+                return tstamps - (unix_to_origin_secs/86400)
+            # we want to return seconds from unix
+            if file_format == FILE_FORMAT_STATA:
+                # tstamp is in millisecons
+                return (tstamps/1000) - unix_to_origin_secs
+            # tstamp in seconds
+            return tstamps - unix_to_origin_secs
+
+    # the arithmetic cannot deal with nans, those are set by the caller
+    tstamps = np.nan_to_num(tstamps, nan=0.0)
+
+    if var_format == DATE_FORMAT_DATE:
+        if file_format == FILE_FORMAT_SPSS:
+            # tstamp is in seconds
+            days = np.floor(tstamps / 86400).astype(np.int64)
+            secs = np.trunc(tstamps % 86400).astype(np.int64)
+        else:
+            # tstamp is in days
+            days = np.trunc(tstamps).astype(np.int64)
+            secs = np.zeros_like(days)
+        if dc.output_format == "arrow":
+            return np.datetime64(dc.origin.date(), "D") + days.view("m8[D]")
+        if dc.dates_as_pandas:
+            result = np.datetime64(dc.origin, "us") + ((days * 86400 + secs) * 1000000).view("m8[us]")
+            check_datetime_range(result, "us")
+            return result
+        result = np.datetime64(dc.origin.date(), "D") + days.view("m8[D]")
+        check_datetime_range(result, "D")
+        return result.astype(object)
+
+    if file_format == FILE_FORMAT_STATA:
+        # tstamp is in millisecons
+        days = np.floor(tstamps / 86400000).astype(np.int64)
+        msecs = tstamps % 86400000
+        secs = np.trunc(msecs / 1000).astype(np.int64)
+        usecs = np.trunc((msecs % 1000) * 1000).astype(np.int64)
+    else:
+        # tstamp in seconds
+        days = np.floor(tstamps / 86400).astype(np.int64)
+        secs = np.trunc(tstamps % 86400).astype(np.int64)
+        usecs = np.zeros_like(days)
+
+    if var_format == DATE_FORMAT_DATETIME:
+        result = np.datetime64(dc.origin, "us") + ((days * 86400 + secs) * 1000000 + usecs).view("m8[us]")
+        if dc.output_format != "arrow":
+            check_datetime_range(result, "us")
+        return result
+
+    # time: the origin is always at midnight so only the seconds and microseconds matter
+    tod = (secs * 1000000 + usecs) % 86400000000
+    if dc.output_format == "arrow":
+        return tod
+    tod_view = tod
+    result = np.empty(len(tod), dtype=object)
+    view = result
+    for i in range(len(tod)):
+        cur_tod = tod_view[i]
+        view[i] = time_new(cur_tod // 3600000000, (cur_tod // 60000000) % 60, (cur_tod // 1000000) % 60,
+                           cur_tod % 1000000, None)
+    return result
+
+
+cdef void check_datetime_range(object values, str unit) except *:
+    """
+    python dates and datetimes are limited to the years 1 to 9999, values outside of that range
+    raise the same error as building them one by one would do.
+    """
+    if len(values) and (values.min() < np.datetime64("0001-01-01", unit) or values.max() > np.datetime64("9999-12-31T23:59:59.999999", unit)):
+        raise OverflowError("date value out of range")
+
+
 cdef object convert_readstat_to_python_value(readstat_value_t value, int index, data_container dc):
     """
     Converts a readstat value to a python value. 
@@ -365,7 +540,823 @@ cdef object convert_readstat_to_python_value(readstat_value_t value, int index,
     return result
 
 
-cdef int handle_metadata(readstat_metadata_t *metadata, void *ctx) except READSTAT_HANDLER_ABORT:
+cdef py_column_storage readstat_type_to_storage(readstat_type_t var_type) except *:
+    """
+    Maps a readstat type to the native buffer used to store the values of a column
+    """
+    if var_type == READSTAT_TYPE_STRING or var_type == READSTAT_TYPE_STRING_REF:
+        return COL_STORAGE_STRING
+    elif var_type == READSTAT_TYPE_INT8:
+        return COL_STORAGE_INT8
+    elif var_type == READSTAT_TYPE_INT16:
+        return COL_STORAGE_INT16
+    elif var_type == READSTAT_TYPE_INT32:
+        return COL_STORAGE_INT32
+    elif var_type == READSTAT_TYPE_FLOAT or var_type == READSTAT_TYPE_DOUBLE:
+        return COL_STORAGE_DOUBLE
+    else:
+        raise PyreadstatError("Unkown data type")
+
+
+cdef py_column_storage column_storage(data_container dc, str col_name, readstat_type_t var_type,
+                                      py_datetime_format var_format) except *:
+    """
+    Decides how the values of a column are stored while parsing
+    """
+    cdef py_column_storage storage
+    cdef str label_name
+
+    # if it's a date we keep the number and transform it at the end
+    if var_format != DATE_FORMAT_NOTADATE and dc.no_datetime_conversion == 0: 
+        if var_type == READSTAT_TYPE_STRING or var_type == READSTAT_TYPE_STRING_REF:
+            # this raises an error on the first value
+            return COL_STORAGE_OBJECT
+        return COL_STORAGE_DOUBLE
+    # columns getting value labels store the code of every value and their distinct values, the labels are
+    # looked up once per distinct value when the column is built. The value labels of stata files come after
+    # the data, so only the name of the label set is checked here, except for the formats of sas files, which
+    # are only labels if they are in the catalog.
+    label_name = dc.label_to_var_name.get(col_name) if dc.apply_value_formats else None
+    if label_name is not None and (dc.value_labels is None or dc.value_labels.get(label_name)):
+        return COL_STORAGE_CATEGORY
+    storage = readstat_type_to_storage(var_type)
+    if storage == COL_STORAGE_STRING and dc.strings_as_category:
+        storage = COL_STORAGE_CATEGORY
+    return storage
+
+
+cdef char * array_pointer(object arr) except? NULL:
+    """
+    Returns the address of the data of a numpy array
+    """
+    return <char *> <size_t> arr.__array_interface__["data"][0]
+
+
+cdef void allocate_column_flags(data_container dc, int var_count) except *:
+    """
+    Allocates the C arrays holding the per column buffers and flags
+    """
+    cdef size_t n = var_count if var_count > 0 else 1
+
+    dc.state.col_storage = <py_column_storage *> calloc(n, sizeof(py_column_storage))
+    dc.state.col_capacity = <int *> calloc(n, sizeof(int))
+    dc.state.col_buffers = <char **> calloc(n, sizeof(char *))
+    dc.state.col_missing = <uint8_t **> calloc(n, sizeof(uint8_t *))
+    dc.state.col_str_offsets = <int64_t **> calloc(n, sizeof(int64_t *))
+    dc.state.col_str_capacity = <int64_t *> calloc(n, sizeof(int64_t))
+    dc.state.col_str_rows = <int64_t *> calloc(n, sizeof(int64_t))
+    dc.state.col_dict_bytes = <char **> calloc(n, sizeof(char *))
+    dc.state.col_dict_capacity = <int64_t *> calloc(n, sizeof(int64_t))
+    dc.state.col_hash_slots = <int32_t **> calloc(n, sizeof(int32_t *))
+    dc.state.col_hash_size = <int64_t *> calloc(n, sizeof(int64_t))
+    if (dc.state.col_storage == NULL or dc.state.col_capacity == NULL or dc.state.col_buffers == NULL or dc.state.col_missing == NULL or
+            dc.state.col_str_offsets == NULL or dc.state.col_str_capacity == NULL or dc.state.col_str_rows == NULL or
+            dc.state.col_dict_bytes == NULL or dc.state.col_dict_capacity == NULL or dc.state.col_hash_slots == NULL or
+            dc.state.col_hash_size == NULL):
+        raise MemoryError("Could not allocate column buffers")
+    dc.state.n_allocated_vars = var_count
+    dc.col_data = [None] * var_count
+    dc.col_missing_masks = [None] * var_count
+    dc.col_str_offsets_arrays = [None] * var_count
+    dc.col_dict_arrays = [None] * var_count
+    dc.col_hash_arrays = [None] * var_count
+
+
+cdef object new_column_array(data_container dc, py_column_storage storage, int capacity):
+    """
+    Returns a new array for a column of numbers or python objects with room for capacity rows
+    """
+    cdef object arr
+
+    if storage == COL_STORAGE_DOUBLE:
+        arr = np.empty(capacity, dtype=np.float64)
+        arr.fill(np.nan)
+    elif storage == COL_STORAGE_INT8:
+        arr = np.empty(capacity, dtype=np.int8)
+    elif storage == COL_STORAGE_INT16:
+        arr = np.empty(capacity, dtype=np.int16)
+    elif storage == COL_STORAGE_INT32:
+        arr = np.empty(capacity, dtype=np.int32)
+    else:
+        arr = np.empty(capacity, dtype=object)
+        arr.fill(dc.missing_object)
+    return arr
+
+
+cdef object shared_column(data_container dc, int index, py_column_storage storage):
+    """
+    Returns the array holding a column for all the row ranges read in parallel, it is allocated by
+    the first range getting there. Ranges read in other processes have no lock, there the arrays are
+    allocated in advance and None is returned for the columns not shared.
+    """
+    cdef object arr
+
+    if dc.shared_lock is None:
+        return dc.shared_columns.get(index)
+    with dc.shared_lock:
+        arr = dc.shared_columns.get(index)
+        if arr is None:
+            arr = new_column_array(dc, storage, dc.shared_rows)
+            dc.shared_columns[index] = arr
+    return arr
+
+
+cdef void allocate_column(data_container dc, int index, int capacity) except *:
+    """
+    Allocates the native buffer of a column with room for capacity rows. Strings are stored
+    as utf-8 bytes one after the other plus the offsets where each row starts. Categories store
+    a code per row and the distinct strings in the same way as string columns.
+    """
+    cdef py_column_storage storage = dc.state.col_storage[index]
+    cdef object arr
+    cdef object offsets
+    cdef object dict_bytes
+    cdef object hash_slots
+    cdef int64_t str_capacity
+
+    if storage == COL_STORAGE_STRING:
+        offsets = np.zeros(capacity + 1, dtype=np.int64)
+        dc.col_str_offsets_arrays[index] = offsets
+        dc.state.col_str_offsets[index] = <int64_t *> array_pointer(offsets)
+        str_capacity = max(<int64_t> capacity * 8, 64)
+        arr = np.empty(str_capacity, dtype=np.uint8)
+        dc.state.col_str_capacity[index] = str_capacity
+        dc.state.col_str_rows[index] = 0
+    elif storage == COL_STORAGE_CATEGORY:
+        arr = np.full(capacity, -1, dtype=np.int32)
+        offsets = np.zeros(CATEGORY_INITIAL_SIZE + 1, dtype=np.int64)
+        dc.col_str_offsets_arrays[index] = offsets
+        dc.state.col_str_offsets[index] = <int64_t *> array_pointer(offsets)
+        dc.state.col_dict_capacity[index] = CATEGORY_INITIAL_SIZE
+        dc.state.col_str_rows[index] = 0
+        dict_bytes = np.empty(CATEGORY_INITIAL_SIZE * 8, dtype=np.uint8)
+        dc.col_dict_arrays[index] = dict_bytes
+        dc.state.col_dict_bytes[index] = array_pointer(dict_bytes)
+        dc.state.col_str_capacity[index] = CATEGORY_INITIAL_SIZE * 8
+        hash_slots = np.full(CATEGORY_INITIAL_SIZE * 2, -1, dtype=np.int32)
+        dc.col_hash_arrays[index] = hash_slots
+        dc.state.col_hash_slots[index] = <int32_t *> array_pointer(hash_slots)
+        dc.state.col_hash_size[index] = CATEGORY_INITIAL_SIZE * 2
+    elif dc.shared_columns is not None and shared_column(dc, index, storage) is not None:
+        # row ranges read in parallel write to their slice of an array shared by all of them
+        arr = shared_column(dc, index, storage)[dc.row_base:dc.row_base + capacity]
+    else:
+        arr = new_column_array(dc, storage, capacity)
+
+    dc.col_data[index] = arr
+    dc.state.col_buffers[index] = array_pointer(arr)
+    dc.state.col_capacity[index] = capacity
+
+
+cdef void resize_column(data_container dc, int index, int new_capacity) except *:
+    """
+    Changes the room for rows in a column, keeping the values already stored. The numpy
+    buffers are reallocated in place, so that no copy is needed if the memory allocator can extend
+    or shrink the block. The buffers must not be referenced anywhere else.
+    """
+    cdef py_column_storage storage = dc.state.col_storage[index]
+    cdef int old_capacity = dc.state.col_capacity[index]
+    cdef object arr
+    cdef object offsets
+    cdef object mask
+
+    if storage == COL_STORAGE_STRING:
+        offsets = dc.col_str_offsets_arrays[index]
+        offsets.resize(new_capacity + 1, refcheck=False)
+        dc.state.col_str_offsets[index] = <int64_t *> array_pointer(offsets)
+    elif storage == COL_STORAGE_OBJECT:
+        # resizing in place is not safe for python objects
+        arr = np.empty(new_capacity, dtype=object)
+        arr[:min(old_capacity, new_capacity)] = dc.col_data[index][:new_capacity]
+        arr[old_capacity:] = dc.missing_object
+        dc.col_data[index] = arr
+        dc.state.col_buffers[index] = array_pointer(arr)
+    else:
+        arr = dc.col_data[index]
+        arr.resize(new_capacity, refcheck=False)
+        if storage == COL_STORAGE_DOUBLE:
+            arr[old_capacity:] = np.nan
+        elif storage == COL_STORAGE_CATEGORY:
+            arr[old_capacity:] = -1
+        dc.state.col_buffers[index] = array_pointer(arr)
+
+    mask = dc.col_missing_masks[index]
+    if mask is not None:
+        # new elements are set to zero
+        mask.resize(new_capacity, refcheck=False)
+        dc.state.col_missing[index] = <uint8_t *> array_pointer(mask)
+
+    dc.state.col_capacity[index] = new_capacity
+
+
+cdef void grow_column(data_container dc, int index, int min_capacity) except *:
+    """
+    Adds room to a column when the number of rows in the file is not known in advance.
+    The capacity is doubled each time so that the total work is linear in the number of rows.
+    """
+    cdef int new_capacity = dc.state.col_capacity[index]
+    if new_capacity < UNKNOWN_ROWS_CHUNK:
+        new_capacity = UNKNOWN_ROWS_CHUNK
+    while new_capacity < min_capacity:
+        if new_capacity > INT_MAX // 2:
+            new_capacity = INT_MAX
+            break
+        new_capacity *= 2
+    resize_column(dc, index, new_capacity)
+
+
+cdef void trim_column(data_container dc, int index, int n_rows) except *:
+    """
+    Gives back the room not used at the end of a column when the number of rows was not known in advance
+    """
+    if dc.state.col_capacity[index] > n_rows:
+        resize_column(dc, index, n_rows)
+    if dc.state.col_storage[index] == COL_STORAGE_STRING:
+        if dc.state.col_str_capacity[index] > dc.state.col_str_offsets[index][dc.state.col_str_rows[index]]:
+            dc.col_data[index].resize(max(dc.state.col_str_offsets[index][dc.state.col_str_rows[index]], 1), refcheck=False)
+            dc.state.col_buffers[index] = array_pointer(dc.col_data[index])
+            dc.state.col_str_capacity[index] = len(dc.col_data[index])
+
+
+cdef void grow_string_buffer(data_container dc, int index, int64_t min_capacity) except *:
+    """
+    Makes room in the bytes buffer of a string column, the capacity is at least doubled
+    each time so that appending is amortized linear.
+    """
+    cdef object arr = dc.col_data[index]
+    cdef int64_t new_capacity = dc.state.col_str_capacity[index] * 2
+    if new_capacity < min_capacity:
+        new_capacity = min_capacity
+    arr.resize(new_capacity, refcheck=False)
+    dc.state.col_buffers[index] = array_pointer(arr)
+    dc.state.col_str_capacity[index] = new_capacity
+
+
+cdef int store_string(parse_state *state, int index, int obs_index, const char *c_str) except -1 nogil:
+    """
+    Appends the bytes of a string value to the buffer of a string column. A NULL c_str stores
+    an empty string. The GIL is only taken if the buffer has to grow.
+    """
+    cdef int64_t *offsets = state.col_str_offsets[index]
+    cdef int64_t row = state.col_str_rows[index]
+    cdef int64_t start
+    cdef size_t length = 0
+
+    if obs_index < row:
+        with gil:
+            raise PyreadstatError("Values for column '%s' arrived out of order" % (<data_container> state.dc).col_names[index])
+    start = offsets[row]
+    # rows that were never visited are stored as empty strings
+    while row < obs_index:
+        row += 1
+        offsets[row] = start
+    if c_str != NULL:
+        length = strlen(c_str)
+    if start + <int64_t> length > state.col_str_capacity[index]:
+        with gil:
+            grow_string_buffer(<data_container> state.dc, index, start + length)
+    if length:
+        memcpy(state.col_buffers[index] + start, c_str, length)
+    offsets[obs_index + 1] = start + length
+    state.col_str_rows[index] = obs_index + 1
+    return 0
+
+
+cdef inline uint64_t hash_bytes(const char *c_str, size_t length) noexcept nogil:
+    """
+    FNV-1a hash of a string
+    """
+    cdef uint64_t h = 14695981039346656037ULL
+    cdef size_t i
+    for i in range(length):
+        h = (h ^ <unsigned char> c_str[i]) * 1099511628211ULL
+    return h
+
+
+cdef void rehash_category(data_container dc, int index) except *:
+    """
+    Doubles the size of the hash table of a category column and inserts again the distinct values
+    """
+    cdef int64_t new_size = dc.state.col_hash_size[index] * 2
+    cdef object hash_slots = np.full(new_size, -1, dtype=np.int32)
+    cdef int32_t *slots = <int32_t *> array_pointer(hash_slots)
+    cdef int64_t *offsets = dc.state.col_str_offsets[index]
+    cdef char *dict_bytes = dc.state.col_dict_bytes[index]
+    cdef int64_t code, slot
+
+    for code in range(dc.state.col_str_rows[index]):
+        slot = hash_bytes(dict_bytes + offsets[code], offsets[code + 1] - offsets[code]) & (new_size - 1)
+        while slots[slot] != -1:
+            slot = (slot + 1) & (new_size - 1)
+        slots[slot] = code
+    dc.col_hash_arrays[index] = hash_slots
+    dc.state.col_hash_slots[index] = slots
+    dc.state.col_hash_size[index] = new_size
+
+
+cdef void grow_category_values(data_container dc, int index, int64_t min_bytes) except *:
+    """
+    Makes room for one more distinct value of a category column holding min_bytes bytes in total
+    """
+    cdef object arr
+    if dc.state.col_str_rows[index] + 1 > dc.state.col_dict_capacity[index]:
+        arr = dc.col_str_offsets_arrays[index]
+        arr.resize(dc.state.col_dict_capacity[index] * 2 + 1, refcheck=False)
+        dc.state.col_str_offsets[index] = <int64_t *> array_pointer(arr)
+        dc.state.col_dict_capacity[index] *= 2
+    if min_bytes > dc.state.col_str_capacity[index]:
+        arr = dc.col_dict_arrays[index]
+        arr.resize(max(dc.state.col_str_capacity[index] * 2, min_bytes), refcheck=False)
+        dc.state.col_dict_bytes[index] = array_pointer(arr)
+        dc.state.col_str_capacity[index] = len(arr)
+
+
+cdef int32_t category_code(parse_state *state, int index, const char *c_str, size_t length) except -1 nogil:
+    """
+    Returns the code of a string in a category column, adding it to the distinct values if it is new.
+    Distinct values are found with an open addressing hash table holding the codes. The GIL is only
+    taken when a new value does not fit in the buffers.
+    """
+    cdef int64_t size = state.col_hash_size[index]
+    cdef int32_t *slots = state.col_hash_slots[index]
+    cdef int64_t *offsets = state.col_str_offsets[index]
+    cdef int64_t slot = hash_bytes(c_str, length) & (size - 1)
+    cdef int64_t n_values = state.col_str_rows[index]
+    cdef int32_t code
+    cdef int64_t start
+
+    while slots[slot] != -1:
+        code = slots[slot]
+        if offsets[code + 1] - offsets[code] == <int64_t> length and memcmp(state.col_dict_bytes[index] + offsets[code], c_str, length) == 0:
+            return code
+        slot = (slot + 1) & (size - 1)
+
+    # a new value
+    if n_values >= INT_MAX:
+        with gil:
+            raise PyreadstatError("Too many distinct values in column '%s' to store it as category" % (<data_container> state.dc).col_names[index])
+    start = offsets[n_values]
+    if n_values + 1 > state.col_dict_capacity[index] or start + <int64_t> length > state.col_str_capacity[index]:
+        with gil:
+            grow_category_values(<data_container> state.dc, index, start + length)
+        offsets = state.col_str_offsets[index]
+    if length:
+        memcpy(state.col_dict_bytes[index] + start, c_str, length)
+    offsets[n_values + 1] = start + length
+    slots[slot] = <int32_t> n_values
+    state.col_str_rows[index] = n_values + 1
+    # keep the table at most half full
+    if (n_values + 1) * 2 > size:
+        with gil:
+            rehash_category(<data_container> state.dc, index)
+    return <int32_t> n_values
+
+
+cdef int store_category(parse_state *state, int index, int obs_index, const char *c_str) except -1 nogil:
+    """
+    Stores the code of a string value in a category column. A NULL c_str stores an empty string.
+    """
+    cdef size_t length = 0
+    if c_str != NULL:
+        length = strlen(c_str)
+    else:
+        c_str = ""
+    (<int32_t *> state.col_buffers[index])[obs_index] = category_code(state, index, c_str, length)
+    return 0
+
+
+cdef int store_number_category(parse_state *state, int index, int obs_index, double value) except -1 nogil:
+    """
+    Stores the code of a number in a category column, the distinct values are kept as the 8 bytes of a double
+    """
+    if value == 0:
+        # -0.0 is the same value as 0.0
+        value = 0.0
+    (<int32_t *> state.col_buffers[index])[obs_index] = category_code(state, index, <const char *> &value, sizeof(double))
+    return 0
+
+
+cdef bint category_of_numbers(data_container dc, int index):
+    """
+    Tells if a category column holds numbers, as numeric columns with value labels do, instead of strings
+    """
+    cdef readstat_type_t var_type = <readstat_type_t> dc.col_dtypes[index]
+    return var_type != READSTAT_TYPE_STRING and var_type != READSTAT_TYPE_STRING_REF
+
+
+cdef bytes category_key(data_container dc, int index, object value):
+    """
+    Returns the bytes under which a distinct value of a category column is stored
+    """
+    if category_of_numbers(dc, index):
+        return np.float64(value).tobytes()
+    return value.encode("utf-8")
+
+
+cdef void fill_unset_codes(data_container dc, int index, int start, int end) except *:
+    """
+    Gives the code of the empty string to the rows from start to end of a category column that were never visited,
+    in a category column of numbers they are missing
+    """
+    cdef object codes = dc.col_data[index][start:end]
+    cdef object mask = dc.col_missing_masks[index]
+    cdef object unset
+
+    unset = codes == -1
+    if mask is not None:
+        unset &= ~mask[start:end].view(np.bool_)
+    if not unset.any():
+        return
+    if category_of_numbers(dc, index):
+        if mask is None:
+            allocate_missing_mask(dc, index)
+        dc.col_missing_masks[index][start:end][unset] = 1
+    else:
+        codes[unset] = category_code(&dc.state, index, "", 0)
+
+
+cdef tuple category_values(data_container dc, int index, int n_rows):
+    """
+    Returns the codes of the first n_rows values of a category column, the boolean mask of missing values
+    (None if there are no missing values) and a numpy array with the distinct values: python strings, or
+    numbers with the type the column would have without categories. Missing values have code -1.
+    """
+    cdef object codes = dc.col_data[index][:n_rows]
+    cdef object mask
+    cdef int64_t *offsets
+    cdef char *dict_bytes
+    cdef int64_t i
+    cdef int64_t n_values = dc.state.col_str_rows[index]
+    cdef object categories
+    cdef object[::1] view
+
+    # rows that were never visited are empty strings or missing
+    fill_unset_codes(dc, index, 0, n_rows)
+    mask = dc.col_missing_masks[index]
+    if mask is not None:
+        mask = mask[:n_rows].view(np.bool_)
+
+    if category_of_numbers(dc, index):
+        categories = dc.col_dict_arrays[index][:n_values * sizeof(double)].view(np.float64).copy()
+        if readstat_type_to_storage(<readstat_type_t> dc.col_dtypes[index]) != COL_STORAGE_DOUBLE:
+            categories = categories.astype(np.int64)
+        return codes, mask, categories
+
+    offsets = dc.state.col_str_offsets[index]
+    dict_bytes = dc.state.col_dict_bytes[index]
+    categories = np.empty(n_values, dtype=object)
+    view = categories
+    for i in range(n_values):
+        view[i] = PyUnicode_DecodeUTF8(dict_bytes + offsets[i], offsets[i + 1] - offsets[i], NULL)
+    return codes, mask, categories
+
+
+cdef void allocate_missing_mask(data_container dc, int index) except *:
+    """
+    Allocates the mask of missing values of a column, it is done the first time a column gets a missing value
+    """
+    cdef object mask = np.zeros(dc.state.col_capacity[index], dtype=np.uint8)
+    dc.col_missing_masks[index] = mask
+    dc.state.col_missing[index] = <uint8_t *> array_pointer(mask)
+
+
+cdef int mark_missing(parse_state *state, int index, int obs_index) except -1 nogil:
+    """
+    Flags a cell as missing. The GIL is only taken to allocate the mask.
+    """
+    cdef py_column_storage storage = state.col_storage[index]
+
+    if storage == COL_STORAGE_OBJECT:
+        # already pre-filled with the missing object
+        return 0
+    if state.col_missing[index] == NULL:
+        with gil:
+            allocate_missing_mask(<data_container> state.dc, index)
+    state.col_missing[index][obs_index] = 1
+    if storage == COL_STORAGE_DOUBLE:
+        (<double *> state.col_buffers[index])[obs_index] = NAN
+    elif storage == COL_STORAGE_STRING:
+        store_string(state, index, obs_index, NULL)
+    elif storage == COL_STORAGE_CATEGORY:
+        (<int32_t *> state.col_buffers[index])[obs_index] = -1
+    return 0
+
+
+cdef void complete_string_offsets(data_container dc, int index, int n_rows):
+    """
+    Sets the offsets of the rows at the end of a string column that were never visited, those are empty strings
+    """
+    cdef int64_t *offsets = dc.state.col_str_offsets[index]
+    cdef int64_t row = dc.state.col_str_rows[index]
+
+    while row < n_rows:
+        row += 1
+        offsets[row] = offsets[row - 1]
+
+
+cdef object decode_string_column(data_container dc, int index, int n_rows):
+    """
+    Transforms the bytes buffer of a string column into a numpy object array of python strings
+    """
+    cdef int64_t *offsets = dc.state.col_str_offsets[index]
+    cdef char *data = dc.state.col_buffers[index]
+    cdef int i
+    cdef object result = np.empty(n_rows, dtype=object)
+    cdef object[::1] view = result
+
+    complete_string_offsets(dc, index, n_rows)
+    for i in range(n_rows):
+        view[i] = PyUnicode_DecodeUTF8(data + offsets[i], offsets[i + 1] - offsets[i], NULL)
+    return result
+
+
+cdef tuple column_values(data_container dc, int index, int n_rows):
+    """
+    Returns the first n_rows values of a column as a numpy array together with a boolean mask of the
+    missing values (None if there are no missing values). Integers are returned as int64 and strings
+    as python strings.
+    """
+    cdef py_column_storage storage = dc.state.col_storage[index]
+    cdef py_datetime_format var_format
+    cdef object values
+    cdef object mask
+    cdef object codes
+    cdef object categories
+
+    if storage == COL_STORAGE_CATEGORY:
+        codes, mask, categories = category_values(dc, index, n_rows)
+        if not len(categories):
+            # all the values are missing
+            values = np.zeros(n_rows, dtype=categories.dtype)
+        else:
+            # missing values take the last distinct value, they are in the mask
+            values = categories.take(codes)
+        if mask is not None and values.dtype.kind == "f":
+            # as in the buffers of numbers
+            values[mask] = np.nan
+        return values, mask
+
+    mask = dc.col_missing_masks[index]
+    if mask is not None:
+        mask = mask[:n_rows].view(np.bool_)
+    if storage == COL_STORAGE_STRING:
+        values = decode_string_column(dc, index, n_rows)
+    elif storage == COL_STORAGE_INT8 or storage == COL_STORAGE_INT16 or storage == COL_STORAGE_INT32:
+        values = dc.col_data[index][:n_rows].astype(np.int64)
+    else:
+        values = dc.col_data[index][:n_rows]
+        var_format = dc.col_formats[index]
+        if storage == COL_STORAGE_DOUBLE and var_format != DATE_FORMAT_NOTADATE and not dc.no_datetime_conversion:
+            values = transform_datetime_column(var_format, values, dc)
+    return values, mask
+
+
+cdef bint check_datetime_in_ns_range(object values):
+    """
+    Checks if a datetime64 array can be represented in nanoseconds
+    """
+    cdef object valid = values[~np.isnat(values)]
+    if not len(valid):
+        return 1
+    return valid.min() >= np.datetime64("1677-09-22", "us") and valid.max() <= np.datetime64("2262-04-10", "us")
+
+
+cdef void promote_column_to_object(data_container dc, int index, int obs_index) except *:
+    """
+    Transforms a column with a native buffer to a column of python objects. This is needed when
+    a column gets values of a different type, as the tags of SAS and Stata missing values.
+    """
+    cdef object values
+    cdef object mask
+
+    values, mask = column_values(dc, index, dc.state.col_capacity[index])
+    values = values.astype(object)
+    if mask is not None:
+        values[mask] = dc.missing_object
+    values[obs_index:] = dc.missing_object
+    dc.state.col_storage[index] = COL_STORAGE_OBJECT
+    dc.col_data[index] = values
+    dc.state.col_buffers[index] = NULL
+    dc.col_missing_masks[index] = None
+    dc.state.col_missing[index] = NULL
+    dc.col_str_offsets_arrays[index] = None
+    dc.state.col_str_offsets[index] = NULL
+
+
+cdef object column_to_arrow(data_container dc, int index, int n_rows):
+    """
+    Wraps the buffers of a column into a pyarrow array without copying them: the missing mask becomes
+    the validity bitmap, numbers keep their native width and strings keep their offsets and bytes buffers.
+    """
+    import pyarrow as pa
+
+    cdef py_column_storage storage = dc.state.col_storage[index]
+    cdef py_datetime_format var_format = dc.col_formats[index]
+    cdef object values
+    cdef object mask
+    cdef object categories
+    cdef object validity = None
+    cdef int null_count = 0
+
+    mask = dc.col_missing_masks[index]
+    if mask is not None:
+        mask = mask[:n_rows].view(np.bool_)
+        null_count = np.count_nonzero(mask)
+        validity = pa.py_buffer(np.packbits(~mask, bitorder="little"))
+
+    if storage == COL_STORAGE_OBJECT:
+        values = dc.col_data[index][:n_rows].tolist()
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # values of mixed types, as tagged missing values in numeric columns
+            return pa.array([str(x) if x is not None else None for x in values], type=pa.large_string())
+    if storage == COL_STORAGE_CATEGORY:
+        values, mask, categories = category_values(dc, index, n_rows)
+        return pa.DictionaryArray.from_arrays(
+            pa.Array.from_buffers(pa.int32(), n_rows, [validity, pa.py_buffer(values)], null_count),
+            pa.Array.from_buffers(pa.large_string(), dc.state.col_str_rows[index],
+                                  [None, pa.py_buffer(dc.col_str_offsets_arrays[index][:dc.state.col_str_rows[index] + 1]),
+                                   pa.py_buffer(dc.col_dict_arrays[index])]))
+    if storage == COL_STORAGE_STRING:
+        complete_string_offsets(dc, index, n_rows)
+        return pa.Array.from_buffers(pa.large_string(), n_rows,
+                                     [validity, pa.py_buffer(dc.col_str_offsets_arrays[index][:n_rows + 1]),
+                                      pa.py_buffer(dc.col_data[index])], null_count)
+
+    values = dc.col_data[index][:n_rows]
+    if storage == COL_STORAGE_DOUBLE and var_format != DATE_FORMAT_NOTADATE and not dc.no_datetime_conversion:
+        values = transform_datetime_column(var_format, values, dc)
+        if var_format == DATE_FORMAT_TIME:
+            return pa.Array.from_buffers(pa.time64("us"), n_rows, [validity, pa.py_buffer(values)], null_count)
+        if var_format == DATE_FORMAT_DATE:
+            # arrow dates are 32 bits days since the unix epoch
+            values = values.view(np.int64).astype(np.int32)
+            return pa.Array.from_buffers(pa.date32(), n_rows, [validity, pa.py_buffer(values)], null_count)
+    elif mask is not None and values.dtype.kind == "i" and not dc.nullable_integers:
+        values = values.astype(np.float64)
+    return pa.Array.from_buffers(pa.from_numpy_dtype(values.dtype), n_rows, [validity, pa.py_buffer(values)], null_count)
+
+
+cdef object category_to_output(data_container dc, int index, int n_rows):
+    """
+    Builds a categorical column from the codes and distinct values of a category column: a pandas
+    Categorical, a polars Categorical series or a list of strings for dict.
+    """
+    cdef str output_format = dc.output_format
+    cdef object codes
+    cdef object mask
+    cdef object categories
+    cdef object series
+    cdef object values
+
+    codes, mask, categories = category_values(dc, index, n_rows)
+    if output_format == "pandas":
+        import pandas as pd
+        return pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=object), validate=False)
+    elif output_format == "polars":
+        import polars as pl
+        series = pl.Series(dc.col_names[index], codes, dtype=pl.Int32)
+        if mask is not None:
+            series = series.scatter(np.flatnonzero(mask), None)
+        return pl.Series(dc.col_names[index], categories, dtype=pl.Categorical).gather(series)
+    values = categories[codes]
+    if mask is not None:
+        values[mask] = None
+    return values.tolist()
+
+
+cdef object column_value_labels(data_container dc, str col_name):
+    """
+    Returns the value labels to apply to a column, None if they are not applied or the column has none
+    """
+    cdef str label_name = dc.label_to_var_name.get(col_name)
+    cdef object value_labels
+
+    if not dc.apply_value_formats or label_name is None:
+        return None
+    value_labels = dc.value_labels if dc.value_labels is not None else dc.labels_raw
+    if not value_labels or not value_labels.get(label_name):
+        return None
+    return value_labels[label_name]
+
+
+cdef object labelled_category_to_output(data_container dc, int index, int n_rows, object labels):
+    """
+    Builds a column with value labels from the codes and distinct values of its category column: the labels
+    are applied with set_value_labels to the distinct values only and the result is expanded with the codes,
+    a categorical for example is built directly from the codes.
+    """
+    cdef str var_name = dc.col_names[index]
+    cdef str label_name = dc.label_to_var_name[var_name]
+    cdef object codes
+    cdef object mask
+    cdef object categories
+    cdef object uniques_mask = None
+    cdef object small_frame
+    cdef object metadata
+
+    codes, mask, categories = category_values(dc, index, n_rows)
+    if mask is not None and mask.any():
+        # missing values are one more distinct value, the last one, taken by their code -1
+        categories = np.concatenate((categories, np.full(1, np.nan if categories.dtype.kind == "f" else 0,
+                                                         dtype=categories.dtype)))
+        uniques_mask = np.zeros(len(categories), dtype=np.bool_)
+        uniques_mask[-1] = 1
+
+    metadata = metadata_container()
+    metadata.value_labels = {label_name: labels}
+    metadata.variable_to_label = {var_name: label_name}
+    small_frame = nw.from_dict({var_name: values_to_output(dc, index, categories, uniques_mask)},
+                               backend=dc.output_format).to_native()
+    small_frame = set_value_labels(small_frame, metadata, dc.formats_as_category, dc.formats_as_ordered_category)
+    if dc.output_format == "pandas":
+        return small_frame[var_name].array.take(codes)
+    return small_frame[var_name].gather(codes)
+
+
+cdef object column_to_output(data_container dc, int index, int n_rows):
+    """
+    Transforms the buffer of a column to the container expected for the output format:
+    numpy arrays for pandas, polars series for polars and lists for dict.
+    """
+    cdef py_column_storage storage = dc.state.col_storage[index]
+    cdef str output_format = dc.output_format
+    cdef object values
+    cdef object mask
+    cdef object labels
+
+    if output_format == "arrow":
+        return column_to_arrow(dc, index, n_rows)
+    if storage == COL_STORAGE_CATEGORY:
+        labels = column_value_labels(dc, dc.col_names[index])
+        if labels is not None:
+            return labelled_category_to_output(dc, index, n_rows, labels)
+        if dc.strings_as_category and not category_of_numbers(dc, index):
+            return category_to_output(dc, index, n_rows)
+        # stored as category for value labels that the file does not have, the column gets its values
+
+    values, mask = column_values(dc, index, n_rows)
+    if storage == COL_STORAGE_OBJECT:
+        if output_format == "pandas":
+            return values
+        return values.tolist()
+    return values_to_output(dc, index, values, mask)
+
+
+cdef object values_to_output(data_container dc, int index, object values, object mask):
+    """
+    Transforms the values of a column returned by column_values to the container expected for the output
+    format, see column_to_output
+    """
+    cdef str output_format = dc.output_format
+    cdef int n_rows = len(values)
+    cdef object series
+
+    if output_format == "pandas":
+        if values.dtype.kind == "M":
+            if mask is not None:
+                values[mask] = np.datetime64("NaT")
+            # pandas before version 3 works with nanoseconds
+            if not dc.pandas_datetime_us and check_datetime_in_ns_range(values):
+                values = values.astype("M8[ns]")
+        elif mask is not None and values.dtype.kind == "i":
+            # integers keep the missing values in a mask or become float, never python objects
+            if dc.nullable_integers:
+                import pandas as pd
+                return pd.arrays.IntegerArray(values, mask.copy())
+            values = values.astype(np.float64)
+            values[mask] = np.nan
+        # strings and other python objects get nan as missing
+        elif mask is not None and values.dtype.kind != "f":
+            values = values.astype(object, copy=False)
+            values[mask] = np.nan
+        return values
+    elif output_format == "polars" and values.dtype.kind in ("f", "i"):
+        # columns with no values are left for polars to decide the type
+        if n_rows == 0 or (mask is not None and mask.all()):
+            return [None] * n_rows
+        import polars as pl
+        if mask is not None and values.dtype.kind == "i" and not dc.nullable_integers:
+            values = values.astype(np.float64)
+        series = pl.Series(dc.col_names[index], values)
+        if mask is not None:
+            series.scatter(np.flatnonzero(mask), None)
+        return series
+    else:
+        if values.dtype.kind in ("O", "M"):
+            values = values.astype(object)
+            if mask is not None:
+                values[mask] = None
+            return values.tolist()
+        values = values.tolist()
+        if mask is not None:
+            for missing_index in np.flatnonzero(mask).tolist():
+                values[missing_index] = None
+        return values
+
+
+cdef int handle_metadata(readstat_metadata_t *metadata, void *ctx) except READSTAT_HANDLER_ABORT with gil:
     """
     This function sets the number of observations(rows), number of variables
     (columns) in data container and initializes the col_data which will store
@@ -374,7 +1365,7 @@ cdef int handle_metadata(readstat_metadata_t *metadata, void *ctx) except READST
     """
         
     cdef int var_count, obs_count, mr_len
-    cdef  data_container dc = <data_container> ctx
+    cdef  data_container dc = <data_container> (<parse_state *> ctx).dc
     #cdef object row
     cdef char * flabel_orig
     cdef char * fencoding_orig
@@ -396,9 +1387,17 @@ cdef int handle_metadata(readstat_metadata_t *metadata, void *ctx) except READST
         raise PyreadstatError("Failed to read number of variables")
     obs_count = readstat_get_row_count(metadata)
     if obs_count <0:
-        # if <0 it means the number of rows is not known, allocate 100 000
-        obs_count = 100000
-        dc.is_unkown_number_rows = 1
+        # if <0 it means the number of rows is not known, allocate 100 000 or
+        # the size of the range when reading row ranges in parallel
+        if dc.shared_columns is not None:
+            obs_count = dc.range_rows
+        else:
+            obs_count = UNKNOWN_ROWS_CHUNK
+        dc.state.is_unkown_number_rows = 1
+    elif dc.state.filter_rows and not metaonly:
+        # only the rows passing the row filter are kept, the buffers grow with them
+        obs_count = min(obs_count, dc.state.filter_rows)
+        dc.state.is_unkown_number_rows = 1
     
     dc.n_obs = obs_count
     dc.n_vars = var_count
@@ -422,10 +1421,7 @@ cdef int handle_metadata(readstat_metadata_t *metadata, void *ctx) except READST
             i += 1
         dc.mr_sets = mr_sets
     
-    dc.col_data_len = [obs_count] * var_count
-    dc.col_numpy_dtypes = [None] * var_count
-    dc.col_dytpes_isfloat = [0] * var_count
-    dc.col_dtypes_isobject = [0] * var_count
+    allocate_column_flags(dc, var_count)
     
     # read other metadata
     flabel_orig = readstat_get_file_label(metadata);
@@ -452,7 +1448,7 @@ cdef int handle_metadata(readstat_metadata_t *metadata, void *ctx) except READST
     return READSTAT_HANDLER_OK
 
 cdef int handle_variable(int index, readstat_variable_t *variable, 
-                         char *val_labels, void *ctx) except READSTAT_HANDLER_ABORT:
+                         char *val_labels, void *ctx) except READSTAT_HANDLER_ABORT with gil:
     """
     This function extracts the name, label, type and format from a variable
     and stores it in data container for a later access. It also extracts the label set to which the variable is associated,
@@ -462,7 +1458,7 @@ cdef int handle_variable(int index, readstat_variable_t *variable,
     cdef char * var_name, 
     cdef char * var_label
     cdef char * var_format
-    cdef str col_name, col_label, label_name, col_format_original, output_format
+    cdef str col_name, col_label, label_name, col_format_original
     cdef py_datetime_format col_format_final
     cdef readstat_type_t var_type
     cdef py_file_format file_format
@@ -471,17 +1467,10 @@ cdef int handle_variable(int index, readstat_variable_t *variable,
     cdef readstat_value_t loval, hival
     cdef object pyloval, pyhival
     cdef list missing_ranges
-    cdef object curnptype
-    cdef object row
-    cdef bint metaonly
-    cdef int obs_count
-    cdef bint iscurnptypefloat
-    cdef bint iscurnptypeobject
     cdef str newcolname
     cdef int dupcolcnt
 
-    cdef  data_container dc = <data_container> ctx
-    output_format = dc.output_format
+    cdef  data_container dc = <data_container> (<parse_state *> ctx).dc
     
     # get variable name, label, format and type and put into our data container
     var_name = readstat_variable_get_name(variable)
@@ -534,46 +1523,22 @@ cdef int handle_variable(int index, readstat_variable_t *variable,
         col_format_original = <str>var_format
     file_format = dc.file_format
     dc.col_formats_original.append(col_format_original)
-    col_format_final = transform_variable_format(col_format_original, file_format)
+    col_format_final = transform_variable_format(col_format_original, dc.date_formats)
     dc.col_formats.append(col_format_final)
     # readstat type
     var_type = readstat_variable_get_type(variable)
     dc.col_dtypes.append(var_type)
-    # equivalent numpy type
-    # if it's a date then we need object
-    if col_format_final != DATE_FORMAT_NOTADATE and dc.no_datetime_conversion == 0: 
-        curnptype = object
-    else:
-        curnptype = readstat_to_numpy_types[var_type]
-    iscurnptypefloat = 0
-    iscurnptypeobject = 0
-    # book keeping numpy types
-    dc.col_numpy_dtypes[index] = curnptype
-    if curnptype == object:
-        iscurnptypeobject = 1
-    if curnptype == np.float64:
-        iscurnptypefloat = 1
-    dc.col_dtypes_isobject[index] = iscurnptypeobject
-    dc.col_dytpes_isfloat[index] = iscurnptypefloat
-    metaonly = dc.metaonly
-    # pre-allocate data
-    if metaonly:
-        if output_format == "pandas":
-            row = np.empty(1, dtype=curnptype)
-        else:
-            row = list()
-    else:
-        obs_count = dc.n_obs
-        if output_format == "pandas":
-            row = np.empty(obs_count, dtype=curnptype)
-            if iscurnptypeobject or iscurnptypefloat:
-                row.fill(np.nan)
+    # native buffer for the column
+    dc.state.col_storage[index] = column_storage(dc, col_name, var_type, col_format_final)
+    # pre-allocate data, when streaming only for the rows of one chunk
+    if not dc.metaonly:
+        if dc.state.stream_rows and dc.state.stream_rows < dc.n_obs:
+            allocate_column(dc, index, dc.state.stream_rows)
         else:
-            row = [None] * obs_count
-    dc.col_data.append(row)
+            allocate_column(dc, index, dc.n_obs)
     
     # missing values
-    if dc.usernan:
+    if dc.state.usernan:
         n_ranges = readstat_variable_get_missing_ranges_count(variable)
         if n_ranges>0:
             missing_ranges = list()
@@ -626,112 +1591,113 @@ cdef int handle_variable(int index, readstat_variable_t *variable,
     return READSTAT_HANDLER_OK
 
 
-cdef int handle_value(int obs_index, readstat_variable_t * variable, readstat_value_t value, void *ctx) except READSTAT_HANDLER_ABORT:
+cdef void store_missing_tag(data_container dc, int index, int obs_index, int missing_tag) except *:
+    """
+    Stores the tag of a SAS or Stata missing value, the column becomes a column of python objects
+    """
+    cdef set curset
+
+    # In SAS missing values are A to Z or _ in stata a to z
+    # if (missing_tag >=65 and missing_tag <= 90) or missing_tag == 95 or (missing_tag >=61 and missing_tag <= 122):
+    if dc.state.col_storage[index] != COL_STORAGE_OBJECT:
+        promote_column_to_object(dc, index, obs_index)
+    dc.col_data[index][obs_index] =  chr(missing_tag)
+    curset = dc.missing_user_values.get(index)
+    if curset is None:
+        curset = set()
+    curset.add(chr(missing_tag))
+    dc.missing_user_values[index] = curset
+
+
+cdef void store_python_value(data_container dc, int index, int obs_index, readstat_value_t value) except *:
+    """
+    Stores a value in a column of python objects
+    """
+    dc.col_data[index][obs_index] = convert_readstat_to_python_value(value, index, dc)
+
+
+cdef int handle_value(int obs_index, readstat_variable_t * variable, readstat_value_t value, void *ctx) except READSTAT_HANDLER_ABORT nogil:
     """
-    This function transforms every value to python types, and to datetime if 
-    necessary and stores it into the arrays in data container col_data
+    This function stores every value in the native buffer of its column in data container.
+    It runs without the GIL, which is taken only to make room in the buffers and for columns
+    holding python objects (dates or columns with tagged missing values).
     """
 
-    cdef data_container dc
+    cdef parse_state *state = <parse_state *> ctx
     cdef int index
-    cdef int max_n_obs
-    cdef bint is_unkown_number_rows
-    cdef int var_max_rows
-    cdef object buf_list
-    cdef bint iscurnptypeobject
-    cdef bint iscurnptypefloat
-    cdef int missing_tag
-    cdef object pyvalue
-    cdef set curset
-    cdef object curnptype
-    cdef str output_format
+    cdef py_column_storage storage
     
-    # extract variables we need from data container
-    dc = <data_container> ctx
-    output_format = dc.output_format
     index = readstat_variable_get_index_after_skipping(variable)
-    max_n_obs = dc.max_n_obs
-    is_unkown_number_rows = dc.is_unkown_number_rows
+
+    # when streaming chunks of rows, the buffers hold only the rows of the current chunk
+    if state.stream_rows:
+        if obs_index >= state.stream_start + state.stream_rows:
+            with gil:
+                emit_stream_chunk(<data_container> state.dc)
+        obs_index -= state.stream_start
+
+    # the rows failing the row filter are dropped from the buffers every block of rows
+    if state.filter_rows:
+        if obs_index - state.filter_dropped >= state.filter_start + state.filter_rows:
+            with gil:
+                filter_row_block(<data_container> state.dc, obs_index - state.filter_dropped)
+        obs_index -= state.filter_dropped
     
-    # check that we still have enough room in our pre-allocated lists
+    # check that we still have enough room in our pre-allocated buffers
     # if not, add more room
-    iscurnptypeobject = dc.col_dtypes_isobject[index]
-    iscurnptypefloat = dc.col_dytpes_isfloat[index]
-    if is_unkown_number_rows:
-        if max_n_obs <= obs_index:
-            dc.max_n_obs = obs_index + 1
-        var_max_rows = dc.col_data_len[index]
-        if var_max_rows <= obs_index:
-            if output_format == "pandas":
-                curnptype = dc.col_numpy_dtypes[index]
-                buf_list = np.empty(100000, dtype=curnptype)
-                if iscurnptypeobject or iscurnptypefloat:
-                    buf_list.fill(np.nan)
-                dc.col_data[index] = np.append(dc.col_data[index], buf_list)
-            else:
-                buf_list = [None] * 100000
-                dc.col_data[index].extend(buf_list) 
-            var_max_rows += 100000
-            dc.col_data_len[index] = var_max_rows
+    if state.is_unkown_number_rows:
+        if state.max_n_obs <= obs_index:
+            state.max_n_obs = obs_index + 1
+        if state.col_capacity[index] <= obs_index:
+            with gil:
+                grow_column(<data_container> state.dc, index, obs_index + 1)
 
-    # transform to python value types
     if readstat_value_is_missing(value, variable):
         # The user does not want to retrieve missing values
-        if not dc.usernan or readstat_value_is_system_missing(value):
-            if output_format == "pandas":
-                if iscurnptypefloat == 1 or iscurnptypeobject == 1: 
-                    # already allocated
-                    pass
-                    #dc.col_data[index][obs_index] = np.nan
-                # for any type except float, the numpy type will be object as now we have nans
-                else:
-                    dc.col_numpy_dtypes[index] = object
-                    dc.col_dtypes_isobject[index] = 1
-                    iscurnptypeobject = 1
-                    dc.col_data[index] = dc.col_data[index].astype(object, copy=False)
-                    dc.col_data[index][obs_index:] = np.nan
-                    #dc.col_data[index][obs_index] = NAN
+        if not state.usernan or readstat_value_is_system_missing(value):
+            mark_missing(state, index, obs_index)
+            return READSTAT_HANDLER_OK
         elif readstat_value_is_defined_missing(value, variable):
-            # SPSS missing values
-            pyvalue = convert_readstat_to_python_value(value, index, dc)
-            dc.col_data[index][obs_index] = pyvalue
+            # SPSS missing values are stored as any other value
+            pass
         elif readstat_value_is_tagged_missing(value):
-            iscurnptypeobject = dc.col_dtypes_isobject[index]
             # SAS and Stata missing values
-            missing_tag = <int> readstat_value_tag(value)
-            # In SAS missing values are A to Z or _ in stata a to z
-            # if (missing_tag >=65 and missing_tag <= 90) or missing_tag == 95 or (missing_tag >=61 and missing_tag <= 122):
-            if output_format == "pandas":
-                if iscurnptypeobject == 1:
-                    dc.col_data[index][obs_index] =  chr(missing_tag) 
-                else:
-                    dc.col_numpy_dtypes[index] = object
-                    dc.col_dtypes_isobject[index] = 1
-                    dc.col_dytpes_isfloat[index] = 0
-                    iscurnptypeobject = 1
-                    dc.col_data[index] = dc.col_data[index].astype(object, copy=False)
-                    dc.col_data[index][obs_index] =  chr(missing_tag)
-            else:
-                dc.col_data[index][obs_index] =  chr(missing_tag)
-            curset = dc.missing_user_values.get(index)
-            if curset is None:
-                curset = set()
-            curset.add(chr(missing_tag))
-            dc.missing_user_values[index] = curset
+            with gil:
+                store_missing_tag(<data_container> state.dc, index, obs_index, <int> readstat_value_tag(value))
+            return READSTAT_HANDLER_OK
+        else:
+            return READSTAT_HANDLER_OK
+
+    storage = state.col_storage[index]
+    if storage == COL_STORAGE_DOUBLE:
+        (<double *> state.col_buffers[index])[obs_index] = readstat_double_value(value)
+    elif storage == COL_STORAGE_INT32:
+        (<int32_t *> state.col_buffers[index])[obs_index] = readstat_int32_value(value)
+    elif storage == COL_STORAGE_INT16:
+        (<int16_t *> state.col_buffers[index])[obs_index] = readstat_int16_value(value)
+    elif storage == COL_STORAGE_INT8:
+        (<int8_t *> state.col_buffers[index])[obs_index] = <int8_t> readstat_int8_value(value)
+    elif storage == COL_STORAGE_STRING:
+        store_string(state, index, obs_index, readstat_string_value(value))
+    elif storage == COL_STORAGE_CATEGORY:
+        if readstat_value_type(value) == READSTAT_TYPE_STRING:
+            store_category(state, index, obs_index, readstat_string_value(value))
+        else:
+            store_number_category(state, index, obs_index, readstat_double_value(value))
     else:
-        pyvalue = convert_readstat_to_python_value(value, index, dc)
-        dc.col_data[index][obs_index] = pyvalue
+        with gil:
+            store_python_value(<data_container> state.dc, index, obs_index, value)
         
     return READSTAT_HANDLER_OK
 
 
-cdef int handle_value_label(char *val_labels, readstat_value_t value, char *label, void *ctx) except READSTAT_HANDLER_ABORT:
+cdef int handle_value_label(char *val_labels, readstat_value_t value, char *label, void *ctx) except READSTAT_HANDLER_ABORT with gil:
     """
     Reads the label for the value that belongs to the label set val_labels. In Handle variable we need to do a map
     from variable name to val_label so that later we can match both things.    
     """
 
-    cdef  data_container dc = <data_container> ctx
+    cdef  data_container dc = <data_container> (<parse_state *> ctx).dc
 
     cdef char * c_str_value
     cdef str py_str_value
@@ -810,20 +1776,102 @@ cdef int handle_value_label(char *val_labels, readstat_value_t value, char *labe
 
     return READSTAT_HANDLER_OK
 
-cdef int handle_note (int note_index, char *note, void *ctx) except READSTAT_HANDLER_ABORT:
+cdef int handle_note (int note_index, char *note, void *ctx) except READSTAT_HANDLER_ABORT with gil:
     """
     Collects notes (text annotations) attached to the documents. It happens for spss and stata
     """
 
     cdef str pynote
-    cdef  data_container dc = <data_container> ctx
+    cdef  data_container dc = <data_container> (<parse_state *> ctx).dc
 
     pynote = <str> note
     dc.notes.append(pynote)
 
     return READSTAT_HANDLER_OK
 
-cdef int handle_open(const char *u8_path, void *io_ctx) except READSTAT_HANDLER_ABORT:
+cdef int handle_checkpoint(const readstat_row_checkpoint_t *checkpoint, void *ctx) except READSTAT_HANDLER_ABORT with gil:
+    """
+    Stores a position where the parsing of a row compressed sav or a sas7bdat file can be resumed,
+    it is called every checkpoint_interval rows when building a row index
+    """
+    cdef data_container dc = <data_container> (<parse_state *> ctx).dc
+    dc.row_checkpoints.append((checkpoint.row, checkpoint.offset,
+                               PyBytes_FromStringAndSize(<const char *> checkpoint.commands, 8),
+                               checkpoint.commands_left))
+    return READSTAT_HANDLER_OK
+
+
+class BlockInflater:
+    """
+    Inflates the zlib blocks of a zsav file in worker threads. zlib and the file reads release
+    the GIL, so the blocks following the one the parser is decoding are inflated in parallel while
+    the parser fills the columns. At most depth blocks are kept ahead of the parser. The file is
+    opened once and the workers read from it with os.pread, or one at a time where os.pread is missing
+    (windows).
+    """
+
+    def __init__(self, bytes filename_bytes, int num_threads):
+        self.fh = open(filename_bytes, "rb", buffering=0)
+        self.lock = threading.Lock()
+        self.depth = 2 * num_threads
+        self.executor = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="pyreadstat-inflate")
+        self.blocks = None
+        self.pending = dict()
+
+    def _read(self, long offset, size_t size):
+        if hasattr(os, "pread"):
+            return os.pread(self.fh.fileno(), size, offset)
+        with self.lock:
+            self.fh.seek(offset)
+            return self.fh.read(size)
+
+    def _inflate(self, long compressed_offset, size_t compressed_size, size_t uncompressed_size):
+        compressed = self._read(compressed_offset, compressed_size)
+        try:
+            uncompressed = zlib.decompress(compressed, bufsize=uncompressed_size)
+        except zlib.error as err:
+            raise PyreadstatError("Invalid zlib block in zsav file: {0}".format(err))
+        if len(uncompressed) != uncompressed_size:
+            raise PyreadstatError("Invalid zlib block in zsav file: wrong uncompressed size")
+        return uncompressed
+
+    def block(self, int block_index):
+        """
+        Returns the uncompressed data of a block, submitting the next ones to the workers
+        """
+        cdef int next_index
+        for next_index in range(block_index, min(block_index + self.depth, len(self.blocks))):
+            if next_index not in self.pending:
+                self.pending[next_index] = self.executor.submit(self._inflate, *self.blocks[next_index])
+        return self.pending.pop(block_index).result()
+
+    def close(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=True)
+        self.fh.close()
+
+
+cdef int handle_inflate(int block_index, const readstat_block_t *blocks, int n_blocks,
+                        unsigned char *output, size_t output_len, void *ctx) except READSTAT_HANDLER_ABORT with gil:
+    """
+    Copies the uncompressed data of a zsav block, inflated by the BlockInflater of the data container
+    """
+    cdef data_container dc = <data_container> (<parse_state *> ctx).dc
+    cdef bytes uncompressed
+    cdef int i
+    if dc.inflater.blocks is None:
+        dc.inflater.blocks = [(blocks[i].compressed_offset, blocks[i].compressed_size, blocks[i].uncompressed_size)
+                              for i in range(n_blocks)]
+    uncompressed = dc.inflater.block(block_index)
+    if <size_t> len(uncompressed) != output_len:
+        raise PyreadstatError("Invalid zlib block in zsav file: wrong uncompressed size")
+    memcpy(output, <const char *> uncompressed, output_len)
+    return READSTAT_HANDLER_OK
+
+
+cdef int handle_open(const char *u8_path, void *io_ctx) except READSTAT_HANDLER_ABORT with gil:
     """
     Special open handler for windows in order to be able to handle paths with international characters
     Courtesy of Jonathon Love.
@@ -843,74 +1891,234 @@ cdef int handle_open(const char *u8_path, void *io_ctx) except READSTAT_HANDLER_
         return -1
 
 
-cdef object _file_object_ctx = None
-
-cdef int pyobject_open_handler(const char *path, void *io_ctx) noexcept:
+cdef int pyobject_open_handler(const char *path, void *io_ctx) noexcept nogil:
     """File is already open - this is a no-op"""
     return 0
 
-cdef int pyobject_close_handler(void *io_ctx) noexcept:
+cdef int pyobject_close_handler(void *io_ctx) noexcept nogil:
     """User manages file lifetime - this is a no-op"""
     return 0
 
-cdef ssize_t pyobject_read_handler(void *buf, size_t nbyte, void *io_ctx) noexcept:
-    """Bridge Python file.read() to C read operation"""
-    global _file_object_ctx
-    cdef bytes data
-    cdef ssize_t bytes_read
-    cdef char *data_ptr
-    
-    try:
-        file_obj = _file_object_ctx
-        data = file_obj.read(nbyte)
-        bytes_read = len(data)
-        if bytes_read > 0:
-            data_ptr = <char*>data
-            memcpy(buf, data_ptr, bytes_read)
+cdef class FileObjectReader:
+    """
+    Reads a python file-like object for the readstat handlers. readstat does many small reads, specially
+    while parsing the headers, so the object is read in blocks of buffer_size bytes kept in a buffer,
+    the handlers serve the reads from the buffer without the GIL and seeks are only done in the object when
+    data outside the buffer is needed. Reads of buffer_size bytes or more go directly to the destination.
+    If the object has readinto the data is read into the buffers directly without creating bytes objects.
+    The file starts at the position of the object when the reader is created, so that files embedded in a
+    larger stream can be read, and the object is put back there at the end of the parse.
+    """
+    cdef file_buffer state
+    cdef object file_obj
+    cdef object readinto
+    cdef bytearray buffer
+    cdef Py_ssize_t buffer_size
+    # position of the file object, relative to base
+    cdef readstat_off_t raw_pos
+    # position of the object where the file starts
+    cdef readstat_off_t base
+
+    def __cinit__(self, object file_obj, Py_ssize_t buffer_size):
+        self.file_obj = file_obj
+        self.readinto = getattr(file_obj, "readinto", None)
+        self.buffer_size = buffer_size
+        self.buffer = bytearray(buffer_size)
+        self.state.reader = <PyObject *> self
+        self.state.data = <char *> self.buffer
+        self.state.length = 0
+        self.state.start = 0
+        # readstat reads from the beginning of the file, as when it opens a path
+        self.base = file_obj.tell()
+        self.state.pos = 0
+        self.raw_pos = 0
+
+    cdef Py_ssize_t raw_read(self, char *dest, Py_ssize_t size) except -1:
+        """
+        Reads up to size bytes from the object at the current position into dest
+        """
+        cdef object data
+        cdef Py_ssize_t bytes_read
+        if self.raw_pos != self.state.pos:
+            self.file_obj.seek(self.base + self.state.pos)
+            self.raw_pos = self.state.pos
+        if self.readinto is not None:
+            bytes_read = self.readinto(PyMemoryView_FromMemory(dest, size, PyBUF_WRITE)) or 0
+        else:
+            data = self.file_obj.read(size)
+            bytes_read = len(data)
+            if bytes_read > size:
+                raise PyreadstatError("file-like object returned more bytes than requested")
+            memcpy(dest, <const char *> data, bytes_read)
+        self.raw_pos += bytes_read
         return bytes_read
+
+    cdef Py_ssize_t read(self, char *dest, Py_ssize_t size) except -1:
+        cdef file_buffer *fb = &self.state
+        cdef Py_ssize_t done = 0
+        cdef Py_ssize_t chunk
+        while done < size:
+            if fb.start <= fb.pos < fb.start + fb.length:
+                chunk = min(<Py_ssize_t> (fb.start + fb.length - fb.pos), size - done)
+                memcpy(dest + done, fb.data + (fb.pos - fb.start), chunk)
+            elif size - done >= self.buffer_size:
+                chunk = self.raw_read(dest + done, size - done)
+                if chunk == 0:
+                    break
+            else:
+                fb.start = fb.pos
+                fb.length = 0
+                fb.length = self.raw_read(fb.data, self.buffer_size)
+                if fb.length == 0:
+                    break
+                continue
+            done += chunk
+            fb.pos += chunk
+        return done
+
+    cdef readstat_off_t seek_end(self, readstat_off_t offset) except -1:
+        self.raw_pos = self.file_obj.seek(offset, 2) - self.base
+        if self.raw_pos < 0:
+            raise PyreadstatError("seek before the start of the file in the file-like object")
+        self.state.pos = self.raw_pos
+        return self.state.pos
+
+    def rewind(self):
+        """
+        Puts the file object back at the position where the file starts, so that it can be read again
+        """
+        if self.raw_pos != 0:
+            self.file_obj.seek(self.base)
+            self.raw_pos = 0
+
+
+cdef ssize_t pyobject_read_file(void *buf, size_t nbyte, file_buffer *fb) noexcept with gil:
+    """Reads from the file object when the buffer does not hold the data"""
+    try:
+        return (<FileObjectReader> fb.reader).read(<char *> buf, nbyte)
     except:
         return -1
 
-cdef readstat_off_t pyobject_seek_handler(readstat_off_t offset, readstat_io_flags_t whence, void *io_ctx) noexcept:
-    """Bridge Python file.seek() to C seek operation"""
-    global _file_object_ctx
-    cdef int py_whence
-    
+cdef ssize_t pyobject_read_handler(void *buf, size_t nbyte, void *io_ctx) noexcept nogil:
+    """Bridge Python file reads to C read operation, io_ctx is the file_buffer of a FileObjectReader"""
+    cdef file_buffer *fb = <file_buffer *> io_ctx
+    if fb.start <= fb.pos and fb.pos + <readstat_off_t> nbyte <= fb.start + fb.length:
+        memcpy(buf, fb.data + (fb.pos - fb.start), nbyte)
+        fb.pos += nbyte
+        return nbyte
+    return pyobject_read_file(buf, nbyte, fb)
+
+cdef readstat_off_t pyobject_seek_end(readstat_off_t offset, file_buffer *fb) noexcept with gil:
+    """Seeks from the end of the file object, its size is not known otherwise"""
     try:
-        file_obj = _file_object_ctx
-        if whence == READSTAT_SEEK_SET:
-            py_whence = 0
-        elif whence == READSTAT_SEEK_CUR:
-            py_whence = 1
-        else:  # READSTAT_SEEK_END
-            py_whence = 2
-        
-        file_obj.seek(offset, py_whence)
-        return file_obj.tell()
+        return (<FileObjectReader> fb.reader).seek_end(offset)
     except:
         return -1
 
+cdef readstat_off_t pyobject_seek_handler(readstat_off_t offset, readstat_io_flags_t whence, void *io_ctx) noexcept nogil:
+    """Bridge Python file seeks to C seek operation, io_ctx is the file_buffer of a FileObjectReader"""
+    cdef file_buffer *fb = <file_buffer *> io_ctx
+    cdef readstat_off_t pos
+    if whence == READSTAT_SEEK_END:
+        return pyobject_seek_end(offset, fb)
+    pos = offset if whence == READSTAT_SEEK_SET else fb.pos + offset
+    if pos < 0:
+        return -1
+    fb.pos = pos
+    return pos
 
-cdef void check_exit_status(readstat_error_t retcode) except *:
-    """
-    transforms a readstat exit status to a python error if status is not READSTAT OK
-    """
 
-    cdef char * err_readstat
-    cdef str err_message
-    if retcode != READSTAT_OK:
-        err_readstat = readstat_error_message(retcode)
-        err_message = <str> err_readstat
+cdef int mmap_open_handler(const char *path, void *io_ctx) noexcept nogil:
+    """The file is mapped before parsing - this is a no-op"""
+    return 0
+
+cdef int mmap_close_handler(void *io_ctx) noexcept nogil:
+    """The mapping is closed after parsing - this is a no-op"""
+    return 0
+
+cdef ssize_t mmap_read_handler(void *buf, size_t nbyte, void *io_ctx) noexcept nogil:
+    """Copies from the mapped file, io_ctx is a mmap_io_ctx"""
+    cdef mmap_io_ctx *mctx = <mmap_io_ctx *> io_ctx
+    cdef Py_ssize_t bytes_read = mctx.size - mctx.pos
+    if <size_t> bytes_read > nbyte:
+        bytes_read = nbyte
+    memcpy(buf, mctx.data + mctx.pos, bytes_read)
+    mctx.pos += bytes_read
+    return bytes_read
+
+cdef readstat_off_t mmap_seek_handler(readstat_off_t offset, readstat_io_flags_t whence, void *io_ctx) noexcept nogil:
+    """Moves the position in the mapped file, io_ctx is a mmap_io_ctx"""
+    cdef mmap_io_ctx *mctx = <mmap_io_ctx *> io_ctx
+    cdef readstat_off_t pos
+    if whence == READSTAT_SEEK_SET:
+        pos = offset
+    elif whence == READSTAT_SEEK_CUR:
+        pos = mctx.pos + offset
+    else:  # READSTAT_SEEK_END
+        pos = mctx.size + offset
+    if pos < 0 or pos > mctx.size:
+        return -1
+    mctx.pos = pos
+    return pos
+
+
+cdef object map_file(char *filename, bint metaonly):
+    """
+    Maps a file in memory read only for the mmap io handlers. The pages are shared with the page cache,
+    so that several processes reading the same file do not copy it. Returns None for empty files,
+    which cannot be mapped.
+    """
+    cdef object mapped
+    with open(PyBytes_FromStringAndSize(filename, strlen(filename)), "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return None
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    # the data is read from the beginning to the end, let the kernel read ahead
+    if not metaonly and hasattr(mapped, "madvise"):
+        for advice in ("MADV_SEQUENTIAL", "MADV_WILLNEED"):
+            if hasattr(mmap, advice):
+                mapped.madvise(getattr(mmap, advice))
+    return mapped
+
+
+cdef void check_exit_status(readstat_error_t retcode) except *:
+    """
+    transforms a readstat exit status to a python error if status is not READSTAT OK
+    """
+
+    cdef char * err_readstat
+    cdef str err_message
+    if retcode != READSTAT_OK:
+        err_readstat = readstat_error_message(retcode)
+        err_message = <str> err_readstat
         raise ReadstatError(err_message)
 
 
+cdef readstat_error_t parse_file(readstat_parser_t *parser, char *filename, void *ctx, py_file_extension file_extension) noexcept nogil:
+    """
+    Calls the readstat parse function for the file extension
+    """
+    if file_extension == FILE_EXT_SAV:
+        return readstat_parse_sav(parser, filename, ctx)
+    elif file_extension == FILE_EXT_SAS7BDAT:
+        return readstat_parse_sas7bdat(parser, filename, ctx)
+    elif file_extension == FILE_EXT_DTA:
+        return readstat_parse_dta(parser, filename, ctx)
+    elif file_extension == FILE_EXT_XPORT:
+        return readstat_parse_xport(parser, filename, ctx)
+    elif file_extension == FILE_EXT_POR:
+        return readstat_parse_por(parser, filename, ctx)
+    elif file_extension == FILE_EXT_SAS7BCAT:
+        return readstat_parse_sas7bcat(parser, filename, ctx)
+    return READSTAT_ERROR_PARSE
+
+
 cdef void run_readstat_parser(char * filename, data_container data, py_file_extension file_extension, long row_limit, long row_offset, object file_obj=None) except *:
     """
     Runs the parsing of the file by readstat library.
     
     If file_obj is provided, it will be used instead of filename for I/O operations.
     """
-    global _file_object_ctx
     
     cdef readstat_parser_t *parser
     cdef readstat_error_t error
@@ -923,6 +2131,14 @@ cdef void run_readstat_parser(char * filename, data_container data, py_file_exte
     cdef readstat_close_handler close_handler
     cdef readstat_read_handler read_handler
     cdef readstat_seek_handler seek_handler
+    cdef readstat_checkpoint_handler checkpoint_handler
+    cdef readstat_inflate_handler inflate_handler
+    cdef readstat_row_checkpoint_t row_checkpoint
+    cdef tuple checkpoint
+    cdef object mapped = None
+    cdef Py_buffer mapped_view
+    cdef FileObjectReader reader = None
+    cdef mmap_io_ctx mapped_ctx
 
     cdef void *ctx
     cdef str err_message
@@ -932,7 +2148,7 @@ cdef void run_readstat_parser(char * filename, data_container data, py_file_exte
     cdef bytes encoding_byte
 
     metaonly = data.metaonly
-    ctx = <void *>data
+    ctx = <void *> &data.state
     
     #readstat_error_t error = READSTAT_OK;
     parser = readstat_parser_init()
@@ -945,12 +2161,13 @@ cdef void run_readstat_parser(char * filename, data_container data, py_file_exte
     
     check_exit_status(readstat_set_metadata_handler(parser, metadata_handler))
     check_exit_status(readstat_set_variable_handler(parser, variable_handler))
-    check_exit_status(readstat_set_value_label_handler(parser, value_label_handler))
-    check_exit_status(readstat_set_note_handler(parser, note_handler))
+    # without handlers readstat skips the value labels and notes, they are already in data
+    if not data.labels_known:
+        check_exit_status(readstat_set_value_label_handler(parser, value_label_handler))
+        check_exit_status(readstat_set_note_handler(parser, note_handler))
 
     # Set up custom I/O handlers for file objects
     if file_obj is not None:
-        _file_object_ctx = file_obj
         open_handler = <readstat_open_handler> pyobject_open_handler
         close_handler = <readstat_close_handler> pyobject_close_handler
         read_handler = <readstat_read_handler> pyobject_read_handler
@@ -959,7 +2176,17 @@ cdef void run_readstat_parser(char * filename, data_container data, py_file_exte
         readstat_set_close_handler(parser, close_handler)
         readstat_set_read_handler(parser, read_handler)
         readstat_set_seek_handler(parser, seek_handler)
-    elif os.name == "nt":
+        # the reader of the file object is passed to the handlers as io_ctx, it lives until the end of the parse
+        reader = FileObjectReader(file_obj, data.buffer_size)
+        readstat_set_io_ctx(parser, <void *> &reader.state)
+    elif data.io == "mmap":
+        mapped = map_file(filename, metaonly)
+    if mapped is not None:
+        readstat_set_open_handler(parser, <readstat_open_handler> mmap_open_handler)
+        readstat_set_close_handler(parser, <readstat_close_handler> mmap_close_handler)
+        readstat_set_read_handler(parser, <readstat_read_handler> mmap_read_handler)
+        readstat_set_seek_handler(parser, <readstat_seek_handler> mmap_seek_handler)
+    elif file_obj is None and os.name == "nt":
         # on windows we need a custom open handler in order to deal with internation characters in the path.
         open_handler = <readstat_open_handler> handle_open
         readstat_set_open_handler(parser, open_handler)
@@ -977,20 +2204,51 @@ cdef void run_readstat_parser(char * filename, data_container data, py_file_exte
     
     if row_offset:
         check_exit_status(readstat_set_row_offset(parser, row_offset))
-
-    # parse!
-    if file_extension == FILE_EXT_SAV:
-        error = readstat_parse_sav(parser, filename, ctx);
-    elif file_extension == FILE_EXT_SAS7BDAT:
-        error = readstat_parse_sas7bdat(parser, filename, ctx);
-    elif file_extension == FILE_EXT_DTA:
-        error = readstat_parse_dta(parser, filename, ctx);
-    elif file_extension == FILE_EXT_XPORT:
-        error = readstat_parse_xport(parser, filename, ctx);
-    elif file_extension == FILE_EXT_POR:
-        error = readstat_parse_por(parser, filename, ctx);
-    elif file_extension == FILE_EXT_SAS7BCAT:
-        error = readstat_parse_sas7bcat(parser, filename, ctx);
+        # resume from the last checkpoint of the row index before the offset instead of decompressing all rows before it
+        if data.row_checkpoints:
+            checkpoint = None
+            for candidate in data.row_checkpoints:
+                if candidate[0] > row_offset:
+                    break
+                checkpoint = candidate
+            if checkpoint is not None:
+                row_checkpoint.row = checkpoint[0]
+                row_checkpoint.offset = checkpoint[1]
+                memcpy(row_checkpoint.commands, <const char *> checkpoint[2], 8)
+                row_checkpoint.commands_left = checkpoint[3]
+                check_exit_status(readstat_set_row_checkpoint(parser, &row_checkpoint))
+
+    if data.checkpoint_interval:
+        checkpoint_handler = <readstat_checkpoint_handler> handle_checkpoint
+        check_exit_status(readstat_set_checkpoint_handler(parser, checkpoint_handler, data.checkpoint_interval))
+
+    # zsav blocks are inflated ahead in worker threads, the inflater needs the path to read them
+    if data.num_threads > 1 and file_extension == FILE_EXT_SAV and file_obj is None and not metaonly:
+        data.inflater = BlockInflater(PyBytes_FromStringAndSize(filename, strlen(filename)), data.num_threads)
+        inflate_handler = <readstat_inflate_handler> handle_inflate
+        check_exit_status(readstat_set_inflate_handler(parser, inflate_handler))
+
+    # the mapping can only be closed once the view on it is released, see the finally clause
+    if mapped is not None:
+        PyObject_GetBuffer(mapped, &mapped_view, PyBUF_SIMPLE)
+        mapped_ctx.data = <const char *> mapped_view.buf
+        mapped_ctx.size = mapped_view.len
+        mapped_ctx.pos = 0
+        readstat_set_io_ctx(parser, <void *> &mapped_ctx)
+
+    # parse! The GIL is released, the handlers take it back when they need it
+    try:
+        with nogil:
+            error = parse_file(parser, filename, ctx, file_extension)
+    finally:
+        if data.inflater is not None:
+            data.inflater.close()
+            data.inflater = None
+        if mapped is not None:
+            PyBuffer_Release(&mapped_view)
+            mapped.close()
+        if reader is not None:
+            reader.rewind()
     #error = parse_func(parser, filename, ctx);
     readstat_parser_free(parser)
     # check if a python error ocurred, if yes, it will be printed by the interpreter, 
@@ -1000,34 +2258,1190 @@ cdef void run_readstat_parser(char * filename, data_container data, py_file_exte
         check_exit_status(error)
         
 
+cdef dict data_container_settings(data_container data):
+    """
+    Returns the reading options of a data container as a dictionary, it can be sent to other processes
+    """
+    return {
+        "file_format": data.file_format,
+        "metaonly": data.metaonly,
+        "dates_as_pandas": data.dates_as_pandas,
+        "output_format": data.output_format,
+        "nullable_integers": data.nullable_integers,
+        "strings_as_category": data.strings_as_category,
+        "apply_value_formats": data.apply_value_formats,
+        "formats_as_category": data.formats_as_category,
+        "formats_as_ordered_category": data.formats_as_ordered_category,
+        "value_labels": data.value_labels,
+        "date_formats": data.date_formats,
+        "missing_object": data.missing_object,
+        "pandas_datetime_us": data.pandas_datetime_us,
+        "user_encoding": data.user_encoding,
+        "origin": data.origin,
+        "unix_to_origin_secs": data.unix_to_origin_secs,
+        "filter_cols": data.filter_cols,
+        "use_cols": data.use_cols,
+        "usernan": data.state.usernan,
+        "no_datetime_conversion": data.no_datetime_conversion,
+        "row_checkpoints": data.row_checkpoints,
+        "num_threads": data.num_threads,
+        "io": data.io,
+        "buffer_size": data.buffer_size,
+    }
+
+
+cdef data_container data_container_from_settings(dict settings):
+    """
+    Returns a new data container with the reading options returned by data_container_settings
+    """
+    cdef data_container new_data = data_container()
+
+    new_data.file_format = settings["file_format"]
+    new_data.metaonly = settings["metaonly"]
+    new_data.dates_as_pandas = settings["dates_as_pandas"]
+    new_data.output_format = settings["output_format"]
+    new_data.nullable_integers = settings["nullable_integers"]
+    new_data.strings_as_category = settings["strings_as_category"]
+    new_data.apply_value_formats = settings["apply_value_formats"]
+    new_data.formats_as_category = settings["formats_as_category"]
+    new_data.formats_as_ordered_category = settings["formats_as_ordered_category"]
+    new_data.value_labels = settings["value_labels"]
+    new_data.date_formats = settings["date_formats"]
+    new_data.missing_object = settings["missing_object"]
+    new_data.pandas_datetime_us = settings["pandas_datetime_us"]
+    new_data.user_encoding = settings["user_encoding"]
+    new_data.origin = settings["origin"]
+    new_data.unix_to_origin_secs = settings["unix_to_origin_secs"]
+    new_data.filter_cols = settings["filter_cols"]
+    new_data.use_cols = settings["use_cols"]
+    new_data.state.usernan = settings["usernan"]
+    new_data.no_datetime_conversion = settings["no_datetime_conversion"]
+    new_data.row_checkpoints = settings["row_checkpoints"]
+    new_data.num_threads = settings["num_threads"]
+    new_data.io = settings["io"]
+    new_data.buffer_size = settings["buffer_size"]
+    return new_data
+
+
+cdef object copy_metadata_value(object value):
+    """
+    Copies the lists and dicts of a metadata member and the lists and dicts they contain, so that the
+    copies kept in the metadata cache are not changed by the users of the metadata
+    """
+    if isinstance(value, dict):
+        return {key: item.copy() if isinstance(item, (dict, list)) else item for key, item in value.items()}
+    if isinstance(value, list):
+        return [item.copy() if isinstance(item, (dict, list)) else item for item in value]
+    return value
+
+
+cdef tuple metadata_snapshot(data_container dc):
+    """
+    Returns the members of a data container filled by a parse of the metadata, see restore_metadata
+    """
+    return tuple(copy_metadata_value(value) for value in (
+        dc.n_obs, dc.n_vars, dc.state.is_unkown_number_rows, dc.col_names, dc.col_labels, dc.col_dtypes,
+        dc.col_formats, dc.col_formats_original, dc.file_label, dc.file_encoding, dc.label_to_var_name,
+        dc.labels_raw, dc.notes, dc.table_name, dc.missing_ranges, dc.variable_storage_width,
+        dc.variable_display_width, dc.variable_alignment, dc.variable_measure, dc.ctime, dc.mtime, dc.mr_sets))
+
+
+cdef void restore_metadata(data_container dc, tuple snapshot) except *:
+    """
+    Puts the metadata returned by metadata_snapshot in a data container as if its metadata had been parsed
+    """
+    cdef int index
+
+    (dc.n_obs, dc.n_vars, dc.state.is_unkown_number_rows, dc.col_names, dc.col_labels, dc.col_dtypes,
+     dc.col_formats, dc.col_formats_original, dc.file_label, dc.file_encoding, dc.label_to_var_name,
+     dc.labels_raw, dc.notes, dc.table_name, dc.missing_ranges, dc.variable_storage_width,
+     dc.variable_display_width, dc.variable_alignment, dc.variable_measure, dc.ctime, dc.mtime,
+     dc.mr_sets) = [copy_metadata_value(value) for value in snapshot]
+    allocate_column_flags(dc, len(dc.col_names))
+    for index in range(len(dc.col_names)):
+        dc.state.col_storage[index] = column_storage(dc, dc.col_names[index], dc.col_dtypes[index], dc.col_formats[index])
+
+
+# reading options not changing the metadata of a file
+_metadata_cache_ignored_settings = frozenset(("metaonly", "value_labels", "row_checkpoints", "num_threads", "io",
+                                              "buffer_size"))
+
+
+class MetadataCache:
+    """
+    Keeps the metadata of the last files parsed, so that reading the metadata of a file again, as
+    read_file_in_chunks, read_file_multiprocessing and their workers do, does not parse it again. Files are
+    identified by their path, device, inode, size and modification time, so that a file changed on disk is
+    parsed again, and the metadata is kept for every set of reading options. The least recently used
+    files are dropped when there are more than maxsize. Only files read from a path are cached.
+
+    pyreadstat.metadata_cache is the cache used by all the read functions, set its maxsize to change the
+    number of files kept, 0 disables it.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """
+        Drops the metadata of all files
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _key(self, bytes filename_bytes, int file_extension, dict settings):
+        stat = os.stat(filename_bytes)
+        options = repr(sorted((name, value) for name, value in settings.items()
+                              if name not in _metadata_cache_ignored_settings))
+        return (os.path.abspath(filename_bytes), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns,
+                file_extension, options)
+
+    def _get(self, key):
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return snapshot
+
+    def _put(self, key, snapshot):
+        with self._lock:
+            self._entries[key] = snapshot
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(self.maxsize, 0):
+                self._entries.popitem(last=False)
+
+
+metadata_cache = MetadataCache()
+
+
+cdef void read_file_metadata(bytes filename_bytes, data_container data, py_file_extension file_extension) except *:
+    """
+    Parses only the metadata of a file into data, taking it from the metadata cache if the file was
+    parsed before with the same options
+    """
+    cdef bint metaonly = data.metaonly
+    cdef object key = None
+    cdef tuple snapshot
+
+    data.metaonly = 1
+    try:
+        if metadata_cache.maxsize > 0:
+            key = metadata_cache._key(filename_bytes, <int> file_extension, data_container_settings(data))
+            snapshot = metadata_cache._get(key)
+            if snapshot is not None:
+                restore_metadata(data, snapshot)
+                return
+        run_readstat_parser(<char *> filename_bytes, data, file_extension, 0, 0)
+        if key is not None:
+            metadata_cache._put(key, metadata_snapshot(data))
+    finally:
+        data.metaonly = metaonly
+
+
+cdef void use_known_labels(data_container data, object labels_raw, object notes) except *:
+    """
+    Gives data the value labels and notes of a file parsed before, readstat skips them when the file is parsed
+    """
+    data.labels_raw = labels_raw
+    data.notes = notes
+    data.labels_known = 1
+
+
+# reading options not changing the columns parsed from a file
+_column_cache_ignored_settings = frozenset(("metaonly", "row_checkpoints", "num_threads", "io", "buffer_size"))
+
+
+cdef str column_cache_options(data_container data, py_file_extension file_extension, long row_limit, long row_offset,
+                              str row_filter):
+    """
+    Returns the reading options identifying an entry of a ColumnCache together with the file
+    """
+    return repr((<int> file_extension, row_limit, row_offset, row_filter,
+                 sorted((name, value) for name, value in data_container_settings(data).items()
+                        if name not in _column_cache_ignored_settings)))
+
+
+cdef dict export_data_container(data_container data):
+    """
+    Returns the metadata and the columns of a parsed data container to be stored in a ColumnCache
+    """
+    return {"metadata": metadata_snapshot(data), "rows": export_row_range(data)}
+
+
+cdef void import_data_container(data_container data, dict entry) except *:
+    """
+    Puts in data the metadata and columns of an entry of a ColumnCache as if the file had been parsed
+    """
+    cdef dict rows = entry["rows"]
+
+    restore_metadata(data, entry["metadata"])
+    data.n_obs = rows["n_obs"]
+    data.state.max_n_obs = rows["max_n_obs"]
+    data.state.is_unkown_number_rows = rows["is_unkown_number_rows"]
+    data.missing_user_values = rows["missing_user_values"]
+    import_columns(data, rows["columns"], None, 0)
+
+
+def _parse_row_range(data_container data, bytes filename_bytes, int file_extension, long row_limit, long row_offset):
+    """
+    Parses one range of rows of a file, it runs in a worker thread
+    """
+    run_readstat_parser(<char *> filename_bytes, data, <py_file_extension> file_extension, row_limit, row_offset)
+
+
+def _shared_buffer_folders():
+    """
+    Folders where the files backing shared buffers are created, memory backed first
+    """
+    folders = [folder for folder in ("/dev/shm", tempfile.gettempdir()) if os.path.isdir(folder)]
+    return folders
+
+
+def _create_shared_buffer(Py_ssize_t size):
+    """
+    Creates a block of memory of size bytes that other processes can attach to with _attach_shared_buffer.
+    Returns its name and a mmap of it. On windows it is a named mapping that lives as long as somebody
+    has it open, elsewhere it is a file under /dev/shm (or the temporary folder if /dev/shm has no room
+    for it) that has to be removed with _release_shared_buffer once the other processes attached to it.
+    """
+    cdef str name = "pyreadstat-{0}".format(uuid.uuid4().hex)
+    cdef list folders
+    cdef str path
+
+    if os.name == "nt":
+        return name, mmap.mmap(-1, size, tagname=name)
+    folders = _shared_buffer_folders()
+    for folder in folders:
+        path = os.path.join(folder, name)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            # reserving the space makes a full /dev/shm fail here instead of crashing when the pages are written
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, size)
+            else:
+                os.ftruncate(fd, size)
+            return path, mmap.mmap(fd, size)
+        except OSError:
+            os.unlink(path)
+            if folder == folders[-1]:
+                raise
+        finally:
+            os.close(fd)
+
+
+def _attach_shared_buffer(str name, Py_ssize_t size):
+    """
+    Returns a mmap of a block of memory created by _create_shared_buffer
+    """
+    if os.name == "nt":
+        return mmap.mmap(-1, size, tagname=name)
+    fd = os.open(name, os.O_RDWR)
+    try:
+        return mmap.mmap(fd, size)
+    finally:
+        os.close(fd)
+
+
+def _release_shared_buffer(str name):
+    """
+    Removes the name of a block of memory created by _create_shared_buffer, the memory is given back
+    when the last mmap of it is closed
+    """
+    if os.name != "nt":
+        try:
+            os.unlink(name)
+        except FileNotFoundError:
+            pass
+
+
+cdef dict shared_buffer_columns(object buffer, dict layout, int shared_rows):
+    """
+    Returns numpy arrays over the columns laid out in a shared buffer, layout has the column index as key and
+    a tuple with the dtype and the byte offset as value
+    """
+    cdef dict columns = dict()
+    for index, (dtype, offset) in layout.items():
+        columns[index] = np.frombuffer(buffer, dtype=dtype, count=shared_rows, offset=offset)
+    return columns
+
+
+cdef dict export_row_range(data_container dc):
+    """
+    Returns the columns of a row range read in a worker process so that they can be sent to the parent
+    process. Columns written to the shared buffer are not included.
+    """
+    cdef int rows
+    cdef int index
+    cdef py_column_storage storage
+    cdef object values, mask, offsets, dict_bytes, shared
+    cdef int64_t str_rows
+    cdef list columns = list()
+
+    if dc.state.is_unkown_number_rows:
+        rows = dc.state.max_n_obs
+    else:
+        rows = dc.n_obs
+    for index in range(len(dc.col_names)):
+        storage = dc.state.col_storage[index]
+        values = dc.col_data[index]
+        mask = dc.col_missing_masks[index]
+        if mask is not None:
+            mask = mask[:rows]
+        offsets = None
+        dict_bytes = None
+        str_rows = 0
+        shared = dc.shared_columns.get(index) if dc.shared_columns is not None else None
+        if storage == COL_STORAGE_STRING:
+            complete_string_offsets(dc, index, rows)
+            str_rows = rows
+            offsets = dc.col_str_offsets_arrays[index][:str_rows + 1]
+            values = values[:offsets[str_rows]]
+        elif storage == COL_STORAGE_CATEGORY:
+            # this gives a code to the rows never visited
+            values = category_values(dc, index, rows)[0]
+            str_rows = dc.state.col_str_rows[index]
+            offsets = dc.col_str_offsets_arrays[index][:str_rows + 1]
+            dict_bytes = dc.col_dict_arrays[index][:offsets[str_rows]]
+        elif shared is not None and values.base is shared:
+            values = None
+        else:
+            values = values[:rows]
+        columns.append((storage, values, mask, offsets, dict_bytes, str_rows))
+
+    return {"n_obs": dc.n_obs, "max_n_obs": dc.state.max_n_obs, "is_unkown_number_rows": dc.state.is_unkown_number_rows,
+            "missing_user_values": dc.missing_user_values, "columns": columns}
+
+
+cdef data_container import_row_range(data_container merged, dict exported, int row_base):
+    """
+    Builds a data container from a row range exported by a worker process, the columns written to the
+    shared buffer are the slice of the range in the arrays in merged.shared_columns
+    """
+    cdef data_container chunk = data_container_from_settings(data_container_settings(merged))
+    cdef int index
+    cdef int rows
+    cdef object values, mask, offsets, dict_bytes
+
+    chunk.col_names = merged.col_names
+    chunk.col_dtypes = merged.col_dtypes
+    chunk.col_formats = merged.col_formats
+    chunk.n_obs = exported["n_obs"]
+    chunk.state.max_n_obs = exported["max_n_obs"]
+    chunk.state.is_unkown_number_rows = exported["is_unkown_number_rows"]
+    chunk.missing_user_values = exported["missing_user_values"]
+    allocate_column_flags(chunk, len(exported["columns"]))
+    import_columns(chunk, exported["columns"], merged.shared_columns, row_base)
+    return chunk
+
+
+cdef void import_columns(data_container dc, list columns, dict shared_columns, int row_base) except *:
+    """
+    Puts in dc the columns returned by export_row_range, the ones written to a shared buffer are taken
+    from shared_columns at row_base
+    """
+    cdef int index
+    cdef int rows = dc.state.max_n_obs if dc.state.is_unkown_number_rows else dc.n_obs
+    cdef object values, mask, offsets, dict_bytes
+
+    for index, (storage, values, mask, offsets, dict_bytes, str_rows) in enumerate(columns):
+        dc.state.col_storage[index] = <py_column_storage> storage
+        if values is None:
+            values = shared_columns[index][row_base:row_base + rows]
+        dc.col_data[index] = values
+        dc.state.col_buffers[index] = array_pointer(values)
+        dc.state.col_capacity[index] = rows
+        if mask is not None:
+            dc.col_missing_masks[index] = mask
+            dc.state.col_missing[index] = <uint8_t *> array_pointer(mask)
+        if offsets is not None:
+            dc.col_str_offsets_arrays[index] = offsets
+            dc.state.col_str_offsets[index] = <int64_t *> array_pointer(offsets)
+            dc.state.col_str_rows[index] = str_rows
+            if storage == COL_STORAGE_STRING:
+                dc.state.col_str_capacity[index] = len(values)
+        if dict_bytes is not None:
+            dc.col_dict_arrays[index] = dict_bytes
+            dc.state.col_dict_bytes[index] = array_pointer(dict_bytes)
+            dc.state.col_dict_capacity[index] = len(dict_bytes)
+
+
+def _parse_row_range_in_process(dict settings, object labels_raw, object notes, bytes filename_bytes, int file_extension,
+                                long row_offset, long row_limit, int row_base, int shared_rows, str shared_name,
+                                Py_ssize_t shared_size, dict shared_layout):
+    """
+    Parses one range of rows of a file in a worker process. Numeric columns are written to their slice
+    of the buffer shared with the parent process, the rest is returned by export_row_range. The value labels
+    and notes come from the metadata read by the parent process and are not parsed again.
+    """
+    cdef data_container data = data_container_from_settings(settings)
+    cdef dict shared_columns = dict()
+
+    use_known_labels(data, labels_raw, notes)
+
+    if shared_name is not None:
+        shared_columns = shared_buffer_columns(_attach_shared_buffer(shared_name, shared_size), shared_layout,
+                                               shared_rows)
+    for values in shared_columns.values():
+        if values.dtype == np.float64:
+            values[row_base:row_base + row_limit] = np.nan
+    data.shared_columns = shared_columns
+    data.shared_rows = shared_rows
+    data.row_base = row_base
+    data.range_rows = row_limit
+    run_readstat_parser(<char *> filename_bytes, data, <py_file_extension> file_extension, row_limit, row_offset)
+    return export_row_range(data)
+
+
+cdef data_container run_row_ranges(bytes filename_bytes, data_container data, py_file_extension file_extension, list row_ranges,
+                                   object executor):
+    """
+    Parses ranges of rows of a file in parallel, row_ranges is a list of (row_offset, row_limit) of
+    consecutive ranges. Each range gets its own parser and data container, numbers and python objects
+    are written directly to the slice of the range in arrays shared by all of them, string and category
+    columns are joined at the end. Returns a data container with all the rows.
+
+    executor is a concurrent.futures executor. If it is a ProcessPoolExecutor see run_row_ranges_in_processes,
+    otherwise the ranges are parsed in its threads, or in new threads if it is None.
+    """
+    cdef list chunks = list()
+    cdef data_container chunk
+    cdef data_container meta
+    cdef int row_base = 0
+    cdef int shared_rows = 0
+    cdef dict shared_columns = dict()
+    cdef object shared_lock = threading.Lock()
+    cdef long row_offset, row_limit
+    cdef list futures
+
+    if isinstance(executor, ProcessPoolExecutor):
+        return run_row_ranges_in_processes(filename_bytes, data, file_extension, row_ranges, executor)
+
+    # the value labels and notes are parsed once, usually they are already in the metadata cache
+    meta = data_container_from_settings(data_container_settings(data))
+    read_file_metadata(filename_bytes, meta, file_extension)
+    for row_offset, row_limit in row_ranges:
+        shared_rows += row_limit
+    for row_offset, row_limit in row_ranges:
+        chunk = data_container_from_settings(data_container_settings(data))
+        use_known_labels(chunk, meta.labels_raw, meta.notes)
+        chunk.shared_columns = shared_columns
+        chunk.shared_lock = shared_lock
+        chunk.shared_rows = shared_rows
+        chunk.row_base = row_base
+        chunk.range_rows = row_limit
+        chunks.append(chunk)
+        row_base += row_limit
+
+    with contextlib.ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=len(chunks)))
+        futures = [executor.submit(_parse_row_range, chunk, filename_bytes, <int> file_extension, row_limit, row_offset)
+                   for chunk, (row_offset, row_limit) in zip(chunks, row_ranges)]
+        try:
+            for future in futures:
+                future.result()
+        finally:
+            # the ranges write to the shared arrays until they are done
+            wait(futures)
+
+    join_row_ranges(chunks[0], chunks)
+    return chunks[0]
+
+
+cdef data_container run_sas7bdat_threads(bytes filename_bytes, data_container data, long row_limit, long row_offset,
+                                         int num_threads):
+    """
+    Reads a sas7bdat file splitting its rows in num_threads ranges parsed in parallel threads. Every thread
+    skips the pages before its range without decompressing them, so that the decompression of the pages,
+    which is what takes most of the time for compressed files, is shared between the threads.
+    """
+    cdef data_container meta = data_container_from_settings(data_container_settings(data))
+    cdef long n_rows
+    cdef list row_ranges = list()
+    cdef long range_offset = row_offset
+    cdef int index
+    cdef long size
+
+    read_file_metadata(filename_bytes, meta, FILE_EXT_SAS7BDAT)
+    n_rows = max(meta.n_obs - row_offset, 0)
+    if row_limit:
+        n_rows = min(n_rows, row_limit)
+    for index in range(num_threads):
+        size = n_rows // num_threads + (1 if index < n_rows % num_threads else 0)
+        if size > 0:
+            row_ranges.append((range_offset, size))
+            range_offset += size
+    if len(row_ranges) < 2:
+        run_readstat_parser(<char *> filename_bytes, data, FILE_EXT_SAS7BDAT, row_limit, row_offset)
+        return data
+    return run_row_ranges(filename_bytes, data, FILE_EXT_SAS7BDAT, row_ranges, None)
+
+
+cdef data_container run_row_ranges_in_processes(bytes filename_bytes, data_container data, py_file_extension file_extension,
+                                                list row_ranges, object executor):
+    """
+    Parses ranges of rows of a file in the processes of executor, a concurrent.futures.ProcessPoolExecutor.
+    The metadata is read first in this process to know how every column is stored, then a buffer shared
+    with the worker processes is allocated for the numeric columns of all the rows, so that the workers write
+    there directly and the final arrays are views on it. Only strings, categories and python objects
+    are sent back from the workers through pickle.
+    """
+    cdef dict settings
+    cdef dict layout = dict()
+    cdef Py_ssize_t shared_size = 0
+    cdef int shared_rows = 0
+    cdef int row_base = 0
+    cdef int index
+    cdef py_column_storage storage
+    cdef object dtype
+    cdef str shared_name = None
+    cdef object shared_buffer
+    cdef list futures = list()
+    cdef list chunks = list()
+    cdef long row_offset, row_limit
+
+    # metadata only read to learn the storage of every column, the workers get its value labels and notes
+    read_file_metadata(filename_bytes, data, file_extension)
+    settings = data_container_settings(data)
+
+    for row_offset, row_limit in row_ranges:
+        shared_rows += row_limit
+    for index in range(len(data.col_names)):
+        storage = data.state.col_storage[index]
+        if storage == COL_STORAGE_DOUBLE:
+            dtype = np.dtype(np.float64)
+        elif storage == COL_STORAGE_INT8:
+            dtype = np.dtype(np.int8)
+        elif storage == COL_STORAGE_INT16:
+            dtype = np.dtype(np.int16)
+        elif storage == COL_STORAGE_INT32:
+            dtype = np.dtype(np.int32)
+        else:
+            continue
+        layout[index] = (dtype.str, shared_size)
+        # every column starts at a 64 bytes boundary
+        shared_size += (<Py_ssize_t> shared_rows * dtype.itemsize + 63) // 64 * 64
+
+    data.shared_columns = dict()
+    if shared_size:
+        shared_name, shared_buffer = _create_shared_buffer(shared_size)
+        data.shared_columns = shared_buffer_columns(shared_buffer, layout, shared_rows)
+    try:
+        for row_offset, row_limit in row_ranges:
+            futures.append(executor.submit(_parse_row_range_in_process, settings, data.labels_raw, data.notes,
+                                           filename_bytes, <int> file_extension, row_offset, row_limit, row_base,
+                                           shared_rows, shared_name, shared_size, layout))
+            row_base += row_limit
+        row_base = 0
+        for future, (row_offset, row_limit) in zip(futures, row_ranges):
+            chunks.append(import_row_range(data, future.result(), row_base))
+            row_base += row_limit
+    finally:
+        # the workers must be done with the buffer before its name is removed
+        wait(futures)
+        if shared_name is not None:
+            _release_shared_buffer(shared_name)
+
+    join_row_ranges(data, chunks)
+    return data
+
+
+cdef tuple join_string_ranges(list chunks, list n_rows, int index, int total_rows):
+    """
+    Joins the bytes and offsets of a string column read in several row ranges
+    """
+    cdef data_container chunk
+    cdef object offsets = np.zeros(total_rows + 1, dtype=np.int64)
+    cdef list parts = list()
+    cdef int64_t start = 0
+    cdef int row_base = 0
+    cdef int rows
+    cdef object chunk_offsets
+
+    for chunk, rows in zip(chunks, n_rows):
+        complete_string_offsets(chunk, index, rows)
+        chunk_offsets = chunk.col_str_offsets_arrays[index][:rows + 1]
+        offsets[row_base + 1:row_base + rows + 1] = chunk_offsets[1:] + start
+        parts.append(chunk.col_data[index][:chunk_offsets[rows]])
+        start += chunk_offsets[rows]
+        row_base += rows
+    parts.append(np.zeros(1, dtype=np.uint8))
+    return offsets, np.concatenate(parts)
+
+
+cdef void join_category_ranges(data_container merged, list chunks, list n_rows, int index, int total_rows) except *:
+    """
+    Joins a category column read in several row ranges into merged: the distinct values of all the ranges
+    are put together and the codes of every range are translated to the new ones.
+    """
+    cdef data_container chunk
+    cdef list ranges = list()
+    cdef dict new_codes = dict()
+    cdef int row_base = 0
+    cdef int rows
+    cdef object codes, mask, categories, mapping, value_bytes, all_codes
+    cdef object value
+
+    for chunk, rows in zip(chunks, n_rows):
+        codes, mask, categories = category_values(chunk, index, rows)
+        for value in categories:
+            if value not in new_codes:
+                new_codes[value] = len(new_codes)
+        ranges.append((codes, categories))
+
+    allocate_column(merged, index, total_rows)
+    for value in new_codes:
+        value_bytes = category_key(merged, index, value)
+        category_code(&merged.state, index, value_bytes, len(value_bytes))
+    all_codes = merged.col_data[index]
+    for (codes, categories), rows in zip(ranges, n_rows):
+        mapping = np.array([new_codes[value] for value in categories] + [-1], dtype=np.int32)
+        # code -1 (missing) takes the last element of mapping
+        all_codes[row_base:row_base + rows] = mapping[codes]
+        row_base += rows
+
+
+cdef void join_row_ranges(data_container merged, list chunks) except *:
+    """
+    Puts together in merged the columns of several row ranges read in parallel, merged has the metadata
+    of the file and can be one of the chunks
+    """
+    cdef data_container chunk
+    cdef list n_rows = list()
+    cdef int total_rows = 0
+    cdef int row_base
+    cdef int rows
+    cdef int index
+    cdef py_column_storage storage
+    cdef bint same_storage
+    cdef bint in_shared
+    cdef object shared, values, mask, chunk_values, chunk_mask, offsets
+    cdef list parts
+
+    for chunk in chunks:
+        if chunk.state.is_unkown_number_rows:
+            rows = chunk.state.max_n_obs
+        else:
+            rows = chunk.n_obs
+        n_rows.append(rows)
+        total_rows += rows
+
+    for index in range(len(merged.col_names)):
+        storage = merged.state.col_storage[index]
+        shared = merged.shared_columns.get(index)
+        same_storage = 1
+        in_shared = shared is not None
+        mask = None
+        row_base = 0
+        for chunk, rows in zip(chunks, n_rows):
+            if chunk.state.col_storage[index] != storage:
+                same_storage = 0
+            # columns promoted to python objects are not in the shared array anymore
+            if chunk.col_data[index].base is not shared:
+                in_shared = 0
+            chunk_mask = chunk.col_missing_masks[index]
+            if chunk_mask is not None:
+                if mask is None:
+                    mask = np.zeros(total_rows, dtype=np.uint8)
+                mask[row_base:row_base + rows] = chunk_mask[:rows]
+            row_base += rows
+
+        if same_storage and storage == COL_STORAGE_STRING:
+            offsets, values = join_string_ranges(chunks, n_rows, index, total_rows)
+            merged.col_str_offsets_arrays[index] = offsets
+            merged.state.col_str_offsets[index] = <int64_t *> array_pointer(offsets)
+            merged.state.col_str_capacity[index] = len(values)
+            merged.state.col_str_rows[index] = total_rows
+        elif same_storage and storage == COL_STORAGE_CATEGORY:
+            join_category_ranges(merged, chunks, n_rows, index, total_rows)
+            values = merged.col_data[index]
+        elif in_shared:
+            values = shared[:total_rows]
+        else:
+            # some ranges got tagged missing values and have now python objects
+            parts = list()
+            for chunk, rows in zip(chunks, n_rows):
+                chunk_values, chunk_mask = column_values(chunk, index, rows)
+                chunk_values = chunk_values.astype(object)
+                if chunk_mask is not None:
+                    chunk_values[chunk_mask] = merged.missing_object
+                parts.append(chunk_values)
+            values = np.concatenate(parts) if parts else np.empty(0, dtype=object)
+            merged.state.col_storage[index] = COL_STORAGE_OBJECT
+            # missing values are already in the objects
+            mask = None
+
+        merged.col_data[index] = values
+        merged.state.col_buffers[index] = array_pointer(values)
+        merged.state.col_capacity[index] = total_rows
+        merged.col_missing_masks[index] = mask
+        merged.state.col_missing[index] = <uint8_t *> array_pointer(mask) if mask is not None else NULL
+
+    for chunk in chunks:
+        if chunk is merged:
+            continue
+        for index, missing_tags in chunk.missing_user_values.items():
+            merged.missing_user_values.setdefault(index, set()).update(missing_tags)
+
+    merged.n_obs = total_rows
+    merged.state.max_n_obs = total_rows
+    merged.state.is_unkown_number_rows = 0
+    merged.shared_columns = None
+
+
+cdef data_container detach_stream_chunk(data_container dc, int rows):
+    """
+    Moves the buffers of the rows parsed so far to a new data container with the metadata of dc. The
+    buffers of dc have to be allocated again before more rows are parsed.
+    """
+    cdef data_container chunk = data_container_from_settings(data_container_settings(dc))
+    cdef int index
+
+    chunk.n_obs = rows
+    chunk.state.max_n_obs = rows
+    chunk.n_vars = dc.n_vars
+    chunk.col_names = dc.col_names
+    chunk.col_labels = dc.col_labels
+    chunk.col_dtypes = dc.col_dtypes
+    chunk.col_formats = dc.col_formats
+    chunk.col_formats_original = dc.col_formats_original
+    chunk.file_label = dc.file_label
+    chunk.file_encoding = dc.file_encoding
+    chunk.label_to_var_name = dc.label_to_var_name
+    chunk.labels_raw = dc.labels_raw
+    chunk.notes = dc.notes
+    chunk.table_name = dc.table_name
+    chunk.missing_ranges = dc.missing_ranges
+    chunk.variable_storage_width = dc.variable_storage_width
+    chunk.variable_display_width = dc.variable_display_width
+    chunk.variable_alignment = dc.variable_alignment
+    chunk.variable_measure = dc.variable_measure
+    chunk.ctime = dc.ctime
+    chunk.mtime = dc.mtime
+    chunk.mr_sets = dc.mr_sets
+    # the tags of missing values found in the chunk
+    chunk.missing_user_values = dc.missing_user_values
+    dc.missing_user_values = dict()
+
+    allocate_column_flags(chunk, dc.state.n_allocated_vars)
+    for index in range(len(dc.col_names)):
+        chunk.state.col_storage[index] = dc.state.col_storage[index]
+        chunk.col_data[index] = dc.col_data[index]
+        chunk.state.col_buffers[index] = dc.state.col_buffers[index]
+        chunk.state.col_capacity[index] = dc.state.col_capacity[index]
+        chunk.col_missing_masks[index] = dc.col_missing_masks[index]
+        chunk.state.col_missing[index] = dc.state.col_missing[index]
+        chunk.col_str_offsets_arrays[index] = dc.col_str_offsets_arrays[index]
+        chunk.state.col_str_offsets[index] = dc.state.col_str_offsets[index]
+        chunk.state.col_str_capacity[index] = dc.state.col_str_capacity[index]
+        chunk.state.col_str_rows[index] = dc.state.col_str_rows[index]
+        chunk.col_dict_arrays[index] = dc.col_dict_arrays[index]
+        chunk.state.col_dict_bytes[index] = dc.state.col_dict_bytes[index]
+        chunk.state.col_dict_capacity[index] = dc.state.col_dict_capacity[index]
+        chunk.col_hash_arrays[index] = dc.col_hash_arrays[index]
+        chunk.state.col_hash_slots[index] = dc.state.col_hash_slots[index]
+        chunk.state.col_hash_size[index] = dc.state.col_hash_size[index]
+        dc.col_missing_masks[index] = None
+        dc.state.col_missing[index] = NULL
+    return chunk
+
+
+cdef int stream_chunk_rows(data_container dc):
+    """
+    Returns the number of rows of the chunk being parsed
+    """
+    if dc.state.is_unkown_number_rows:
+        return dc.state.max_n_obs
+    return max(min(dc.n_obs - dc.state.stream_start, dc.state.stream_rows), 0)
+
+
+cdef void emit_stream_chunk(data_container dc) except *:
+    """
+    Called when the first value of a row after the current chunk arrives: hands the chunk over to the
+    RowChunkStream and gets new buffers for the next one. Raises an error to stop the parser if the stream
+    was closed.
+    """
+    cdef data_container chunk = detach_stream_chunk(dc, dc.state.stream_rows)
+    cdef int capacity
+    cdef int index
+
+    dc.state.stream_start += dc.state.stream_rows
+    dc.state.max_n_obs = 0
+    if dc.state.is_unkown_number_rows:
+        capacity = dc.state.stream_rows
+    else:
+        capacity = stream_chunk_rows(dc)
+    for index in range(len(dc.col_names)):
+        # columns promoted to python objects in the previous chunk start again with their own type
+        dc.state.col_storage[index] = column_storage(dc, dc.col_names[index], dc.col_dtypes[index], dc.col_formats[index])
+        allocate_column(dc, index, capacity)
+    if not dc.stream._put(("chunk", chunk)):
+        raise PyreadstatError("The stream of chunks was closed")
+
+
+cdef void read_stata_labels_first(data_container dc, bytes filename_bytes, object file_obj) except *:
+    """
+    Reads the value labels and notes of a stata file, which are at its end, to give them to dc before its rows are parsed
+    """
+    cdef data_container labels = data_container_from_settings(data_container_settings(dc))
+
+    if file_obj is None:
+        read_file_metadata(filename_bytes, labels, FILE_EXT_DTA)
+    else:
+        labels.metaonly = 1
+        run_readstat_parser(<char *> filename_bytes, labels, FILE_EXT_DTA, 0, 0, file_obj)
+    use_known_labels(dc, labels.labels_raw, labels.notes)
+
+
+def _stream_file_rows(stream, data_container dc, bytes filename_bytes, object file_obj, int file_extension, long row_offset):
+    """
+    Parses a file from row_offset to the end in a thread of its own, handing the chunks of rows over to stream
+    """
+    try:
+        if file_extension == FILE_EXT_DTA:
+            # value labels are at the end of stata files, they are read first so that every chunk gets them
+            read_stata_labels_first(dc, filename_bytes, file_obj)
+        run_readstat_parser(<char *> filename_bytes, dc, <py_file_extension> file_extension, 0, row_offset, file_obj)
+        if stream_chunk_rows(dc):
+            if not stream._put(("chunk", detach_stream_chunk(dc, stream_chunk_rows(dc)))):
+                return
+        stream._put(("end", detach_stream_chunk(dc, 0)))
+    except BaseException as err:
+        stream._put(("error", err))
+
+
+class RowChunkStream:
+    """
+    Keeps the parser of a file open between the reads of consecutive chunks of rows of the same file,
+    so that each chunk continues where the previous one stopped instead of skipping again all the rows
+    before row_offset, which readstat does row by row for most formats. The file is parsed once in a
+    thread of its own, one chunk ahead of the reads. Reads done inside active() with a row_limit use it:
+    if row_offset is where the previous chunk ended and the file and options are the same the next chunk
+    is taken, otherwise the parser starts again at row_offset. Used by read_file_in_chunks.
+    """
+
+    def __init__(self):
+        # rows of the last chunk read, before the row filter if any
+        self.rows_read = None
+        self._key = None
+        self._next_offset = 0
+        self._chunksize = 0
+        self._queue = None
+        self._stop = None
+        self._thread = None
+
+    @contextlib.contextmanager
+    def active(self):
+        """
+        Makes the reads inside it use this stream
+        """
+        token = _row_chunk_stream.set(self)
+        try:
+            yield self
+        finally:
+            _row_chunk_stream.reset(token)
+
+    def close(self):
+        """
+        Stops the parser
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        self._thread = None
+        self._key = None
+
+    def _put(self, item):
+        """
+        Hands an item over to the reads, waits until there is room for it. Returns False if the stream was closed.
+        """
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read_chunk(self, data_container data, bytes filename_bytes, object file_obj, int file_extension, long row_limit,
+                    long row_offset):
+        """
+        Returns a data container with the row_limit rows starting at row_offset and the metadata of the file
+        """
+        cdef data_container dc
+        cdef dict settings = data_container_settings(data)
+        cdef object key = (filename_bytes if file_obj is None else id(file_obj), file_extension, settings)
+
+        if self._thread is None or self._key != key or self._next_offset != row_offset or self._chunksize != row_limit:
+            self.close()
+            dc = data_container_from_settings(settings)
+            dc.state.stream_rows = row_limit
+            dc.stream = self
+            self._key = key
+            self._next_offset = row_offset
+            self._chunksize = row_limit
+            self._queue = queue.Queue(maxsize=1)
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=_stream_file_rows, name="pyreadstat-stream", daemon=True,
+                                            args=(self, dc, filename_bytes, file_obj, file_extension, row_offset))
+            self._thread.start()
+
+        kind, item = self._queue.get()
+        if kind == "error":
+            self.close()
+            raise item
+        if kind == "end":
+            self.close()
+        else:
+            self._next_offset += row_limit
+        dc = item
+        self.rows_read = dc.n_obs
+        return item
+
+
+cdef object row_block_frame(data_container dc, list indexes, int start, int end):
+    """
+    Returns a data frame with the rows from start to end of the columns at indexes, built as the data frame
+    returned at the end so that the row filter sees the same values. The buffers are not copied. For the dict
+    output format the data frame is the one of evaluation_format.
+    """
+    cdef data_container block = data_container_from_settings(data_container_settings(dc))
+    cdef list columns = list()
+    cdef int new_index
+    cdef int index
+    cdef py_column_storage storage
+    cdef object values, mask, offsets, dict_bytes
+    cdef int64_t str_rows
+
+    if block.output_format == "dict":
+        block.output_format = evaluation_format()
+    block.n_obs = end - start
+    block.n_vars = len(indexes)
+    block.col_names = [dc.col_names[index] for index in indexes]
+    block.col_dtypes = [dc.col_dtypes[index] for index in indexes]
+    block.col_formats = [dc.col_formats[index] for index in indexes]
+    block.label_to_var_name = dc.label_to_var_name
+    block.labels_raw = dc.labels_raw
+    block.missing_user_values = {new_index: dc.missing_user_values[index] for new_index, index in enumerate(indexes)
+                                 if index in dc.missing_user_values}
+    for index in indexes:
+        storage = dc.state.col_storage[index]
+        values = dc.col_data[index]
+        mask = dc.col_missing_masks[index]
+        if mask is not None:
+            mask = mask[start:end]
+        offsets = None
+        dict_bytes = None
+        str_rows = 0
+        if storage == COL_STORAGE_STRING:
+            # the offsets of the rows point into the whole bytes buffer
+            str_rows = end - start
+            offsets = dc.col_str_offsets_arrays[index][start:end + 1]
+        elif storage == COL_STORAGE_CATEGORY:
+            values = values[start:end]
+            str_rows = dc.state.col_str_rows[index]
+            offsets = dc.col_str_offsets_arrays[index][:str_rows + 1]
+            dict_bytes = dc.col_dict_arrays[index]
+        else:
+            values = values[start:end]
+        columns.append((storage, values, mask, offsets, dict_bytes, str_rows))
+    allocate_column_flags(block, len(indexes))
+    import_columns(block, columns, None, 0)
+    return dict_to_dataframe(data_container_to_dict(block), block)
+
+
+cdef int filter_rows(data_container dc, int start, int end) except -1:
+    """
+    Evaluates the row filter on the rows from start to end and moves the rows passing it, in the same order,
+    to the beginning of the range. The rows after them are left as if they had never been visited. Returns
+    the number of rows kept.
+    """
+    cdef list indexes
+    cdef str name
+    cdef object keep
+    cdef object rows
+    cdef object values
+    cdef object mask
+    cdef const uint8_t[::1] keep_view
+    cdef int kept
+    cdef int index
+    cdef int i
+    cdef int row
+    cdef py_column_storage storage
+    cdef int64_t *offsets
+    cdef char *buffer
+    cdef int64_t position
+    cdef int64_t length
+
+    if end <= start:
+        return 0
+    if dc.row_filter_columns is None:
+        indexes = list(range(len(dc.col_names)))
+    else:
+        indexes = list()
+        for name in dc.row_filter_columns:
+            if name not in dc.col_names:
+                raise PyreadstatError("row_filter uses the column '{0}' which is not in the file".format(name))
+            indexes.append(dc.col_names.index(name))
+    for index in range(len(dc.col_names)):
+        if dc.state.col_storage[index] == COL_STORAGE_STRING:
+            complete_string_offsets(dc, index, end)
+        elif dc.state.col_storage[index] == COL_STORAGE_CATEGORY and index in indexes:
+            fill_unset_codes(dc, index, start, end)
+
+    try:
+        keep = row_filter_mask(row_block_frame(dc, indexes, start, end), dc.row_filter)
+    except ValueError as err:
+        raise PyreadstatError(str(err))
+    rows = np.flatnonzero(keep) + start
+    kept = len(rows)
+    if kept == end - start:
+        return kept
+
+    keep_view = keep.view(np.uint8)
+    for index in range(len(dc.col_names)):
+        storage = dc.state.col_storage[index]
+        mask = dc.col_missing_masks[index]
+        if mask is not None:
+            mask[start:start + kept] = mask[rows]
+            mask[start + kept:end] = 0
+        if storage == COL_STORAGE_STRING:
+            # the bytes of the rows kept are moved back over the ones of the rows dropped
+            offsets = dc.state.col_str_offsets[index]
+            buffer = dc.state.col_buffers[index]
+            position = offsets[start]
+            row = start
+            for i in range(end - start):
+                if keep_view[i]:
+                    length = offsets[start + i + 1] - offsets[start + i]
+                    memmove(buffer + position, buffer + offsets[start + i], length)
+                    position += length
+                    row += 1
+                    offsets[row] = position
+            dc.state.col_str_rows[index] = start + kept
+        else:
+            values = dc.col_data[index]
+            values[start:start + kept] = values[rows]
+            if storage == COL_STORAGE_DOUBLE:
+                values[start + kept:end] = np.nan
+            elif storage == COL_STORAGE_CATEGORY:
+                values[start + kept:end] = -1
+            elif storage == COL_STORAGE_OBJECT:
+                values[start + kept:end] = dc.missing_object
+    return kept
+
+
+cdef void filter_row_block(data_container dc, int end) except *:
+    """
+    Called while parsing when the first value of a row after the current block of rows arrives: drops the rows
+    of the block failing the row filter, the next block starts after the rows kept
+    """
+    cdef int kept = filter_rows(dc, dc.state.filter_start, end)
+
+    dc.state.filter_dropped += end - dc.state.filter_start - kept
+    dc.state.filter_start += kept
+    dc.state.max_n_obs = dc.state.filter_start
+
+
+cdef void finish_row_filter(data_container dc) except *:
+    """
+    Applies the row filter to the rows not evaluated yet: the last block when filtering while parsing, otherwise
+    all the rows, for the row ranges read in parallel and the chunks of rows streamed
+    """
+    cdef int rows
+
+    if dc.state.filter_rows:
+        filter_row_block(dc, dc.state.max_n_obs)
+        dc.state.filter_rows = 0
+        return
+    rows = dc.state.max_n_obs if dc.state.is_unkown_number_rows else dc.n_obs
+    rows = filter_rows(dc, 0, rows)
+    dc.n_obs = rows
+    dc.state.max_n_obs = rows
+
+
+cdef void drop_columns(data_container dc, list names) except *:
+    """
+    Removes columns from a parsed data container, used for the columns read only to evaluate the row filter
+    """
+    cdef dict missing_user_values = dict()
+    cdef list keep
+    cdef int new_index
+    cdef int index
+
+    keep = [index for index, name in enumerate(dc.col_names) if name not in names]
+    for new_index, index in enumerate(keep):
+        dc.state.col_storage[new_index] = dc.state.col_storage[index]
+        dc.state.col_capacity[new_index] = dc.state.col_capacity[index]
+        dc.state.col_buffers[new_index] = dc.state.col_buffers[index]
+        dc.state.col_missing[new_index] = dc.state.col_missing[index]
+        dc.state.col_str_offsets[new_index] = dc.state.col_str_offsets[index]
+        dc.state.col_str_capacity[new_index] = dc.state.col_str_capacity[index]
+        dc.state.col_str_rows[new_index] = dc.state.col_str_rows[index]
+        dc.state.col_dict_bytes[new_index] = dc.state.col_dict_bytes[index]
+        dc.state.col_dict_capacity[new_index] = dc.state.col_dict_capacity[index]
+        dc.state.col_hash_slots[new_index] = dc.state.col_hash_slots[index]
+        dc.state.col_hash_size[new_index] = dc.state.col_hash_size[index]
+        if index in dc.missing_user_values:
+            missing_user_values[new_index] = dc.missing_user_values[index]
+    dc.col_data = [dc.col_data[index] for index in keep]
+    dc.col_missing_masks = [dc.col_missing_masks[index] for index in keep]
+    dc.col_str_offsets_arrays = [dc.col_str_offsets_arrays[index] for index in keep]
+    dc.col_dict_arrays = [dc.col_dict_arrays[index] for index in keep]
+    dc.col_hash_arrays = [dc.col_hash_arrays[index] for index in keep]
+    dc.col_names = [dc.col_names[index] for index in keep]
+    dc.col_labels = [dc.col_labels[index] for index in keep]
+    dc.col_dtypes = [dc.col_dtypes[index] for index in keep]
+    dc.col_formats = [dc.col_formats[index] for index in keep]
+    dc.col_formats_original = [dc.col_formats_original[index] for index in keep]
+    dc.missing_user_values = missing_user_values
+    dc.n_vars = len(keep)
+    dc.label_to_var_name = {name: label for name, label in dc.label_to_var_name.items() if name not in names}
+    dc.missing_ranges = {name: value for name, value in dc.missing_ranges.items() if name not in names}
+    dc.variable_storage_width = {name: value for name, value in dc.variable_storage_width.items() if name not in names}
+    dc.variable_display_width = {name: value for name, value in dc.variable_display_width.items() if name not in names}
+    dc.variable_alignment = {name: value for name, value in dc.variable_alignment.items() if name not in names}
+    dc.variable_measure = {name: value for name, value in dc.variable_measure.items() if name not in names}
+
+
 cdef object data_container_to_dict(data_container data):
     """
-    Transforms a data container object to a pandas data frame
+    Transforms a data container object to a dictionary of columns
     """
     
     cdef object final_container
-    cdef list col_data
     cdef list col_names
     cdef str cur_name_str
     cdef int fc_cnt
-    cdef bint is_unkown_number_rows
-    cdef int max_n_obs
+    cdef int n_rows
     cdef bint metaonly
 
     final_container = OrderedDict()
-    col_data = data.col_data
     col_names = data.col_names
-    is_unkown_number_rows = data.is_unkown_number_rows
-    max_n_obs = data.max_n_obs
     metaonly = data.metaonly
+    if data.state.is_unkown_number_rows:
+        n_rows = data.state.max_n_obs
+    else:
+        n_rows = data.n_obs
     
     for fc_cnt in range(0, len(col_names)):
         cur_name_str = col_names[fc_cnt]
-        cur_data = col_data[fc_cnt]
-        if is_unkown_number_rows and not metaonly:
-            cur_data = cur_data[0:max_n_obs]
         if not metaonly:
-            final_container[cur_name_str] = cur_data
+            if data.state.is_unkown_number_rows:
+                trim_column(data, fc_cnt, n_rows)
+            final_container[cur_name_str] = column_to_output(data, fc_cnt, n_rows)
         else:
             final_container[cur_name_str] = list() 
 
@@ -1048,6 +3462,11 @@ cdef object dict_to_dataframe(object dict_data, data_container dc):
     dates_as_pandas = dc.dates_as_pandas
     output_format = dc.output_format
 
+    if output_format == "arrow":
+        # the columns are already arrow arrays
+        import pyarrow as pa
+        return pa.table(dict_data)
+
     if dict_data:
         #schema = None
         # in polars if missing user values we need to explicitly set the type 
@@ -1080,10 +3499,10 @@ cdef object dict_to_dataframe(object dict_data, data_container dc):
             pd = natnamespace
             dtypes = data_frame.dtypes.tolist()
             # check that datetime columns are datetime type
-            # this is needed in case all date values are nan
+            # this is needed in case the column holds python objects
             for index, column in enumerate(data_frame.columns):
                 var_format = dc.col_formats[index]
-                if dtypes[index] != '<M8[ns]' and (var_format == DATE_FORMAT_DATE or var_format == DATE_FORMAT_DATETIME):
+                if dtypes[index].kind != 'M' and (var_format == DATE_FORMAT_DATE or var_format == DATE_FORMAT_DATETIME):
                     data_frame.loc[:, column] = pd.to_datetime(data_frame[column])
 
         if output_format == "polars" and not dc.no_datetime_conversion:
@@ -1102,11 +3521,43 @@ cdef object dict_to_dataframe(object dict_data, data_container dc):
             if date_cols:
                 data_frame = data_frame.with_columns(pl.from_epoch(pl.col(*date_cols), time_unit='d'))
 
+        if dc.apply_value_formats:
+            data_frame = apply_value_labels_to_frame(data_frame, dc)
+
     else:
         data_frame = nw.from_dict(dict_data, backend=output_format).to_native()
 
     return data_frame
 
+
+cdef object apply_value_labels_to_frame(object data_frame, data_container dc):
+    """
+    Applies the value labels to the columns that are not stored as categories, as the columns of python objects
+    holding the tags of missing values, the others got their labels in labelled_category_to_output. Only the
+    columns getting labels go through set_value_labels.
+    """
+    cdef list names = list()
+    cdef int index
+    cdef str name
+    cdef object metadata
+    cdef object labelled
+
+    for index, name in enumerate(dc.col_names):
+        if dc.state.col_storage[index] != COL_STORAGE_CATEGORY and column_value_labels(dc, name) is not None:
+            names.append(name)
+    if not names:
+        return data_frame
+
+    metadata = metadata_container()
+    metadata.value_labels = dc.value_labels if dc.value_labels is not None else dc.labels_raw
+    metadata.variable_to_label = {name: dc.label_to_var_name[name] for name in names}
+    labelled = set_value_labels(data_frame[names], metadata, dc.formats_as_category, dc.formats_as_ordered_category)
+    if dc.output_format == "pandas":
+        for name in names:
+            data_frame[name] = labelled[name]
+        return data_frame
+    return data_frame.with_columns(labelled.get_columns())
+
 cdef object data_container_extract_metadata(data_container data):
     """
     Extracts metadata from a data container and puts it into a metadata 
@@ -1125,7 +3576,7 @@ cdef object data_container_extract_metadata(data_container data):
     cdef readstat_type_t var_type
 
     metaonly = data.metaonly
-    is_unkown_number_rows = data.is_unkown_number_rows
+    is_unkown_number_rows = data.state.is_unkown_number_rows
     
     cdef object metadata = metadata_container()
 
@@ -1136,7 +3587,7 @@ cdef object data_container_extract_metadata(data_container data):
     metadata.number_columns = data.n_vars
     if is_unkown_number_rows:
         if not metaonly:
-            metadata.number_rows = data.max_n_obs
+            metadata.number_rows = data.state.max_n_obs
     else:
         metadata.number_rows = data.n_obs
 
@@ -1203,7 +3654,12 @@ cdef object data_container_extract_metadata(data_container data):
 cdef object run_conversion(object filename_path, py_file_format file_format, py_file_extension file_extension,
                            str encoding, bint metaonly, bint dates_as_pandas, list usecols, bint usernan,
                            bint no_datetime_conversion, long row_limit, long row_offset, str output_format, 
-                           list extra_datetime_formats, list extra_date_formats, list extra_time_formats):
+                           list extra_datetime_formats, list extra_date_formats, list extra_time_formats,
+                           str integers_with_missing, bint strings_as_category, bint apply_value_formats,
+                           bint formats_as_category, bint formats_as_ordered_category, dict value_labels,
+                           list row_ranges, object row_range_executor, object row_chunk_stream, list row_checkpoints,
+                           int num_threads, str io, Py_ssize_t buffer_size, object parsed_metadata,
+                           object cache_dir, object row_filter):
     """
     Coordinates the activities to parse a file. This is the entry point 
     for the public methods.
@@ -1217,9 +3673,21 @@ cdef object run_conversion(object filename_path, py_file_format file_format, py_
     cdef data_container data
     cdef object origin
     cdef set allowed_formats
+    cdef set allowed_integer_missing
     cdef object data_dict
     cdef object data_frame
     cdef object file_obj = None
+    cdef bint pandas_datetime_us = 1
+    cdef object column_cache = None
+    cdef str cache_key
+    cdef object cache_entry = None
+    cdef object filter_expression = None
+    cdef list filter_columns = None
+    cdef list extra_columns = list()
+
+    # http(s) urls are read with range requests
+    if is_url(filename_path):
+        filename_path = HttpRangeFile(filename_path)
 
     # Check if filename_path is a file-like object
     if hasattr(filename_path, 'read') and hasattr(filename_path, 'seek'):
@@ -1250,7 +3718,7 @@ cdef object run_conversion(object filename_path, py_file_format file_format, py_
 
     if output_format is None:
         output_format = 'pandas'
-    allowed_formats = {'pandas', 'dict', 'polars'}
+    allowed_formats = {'pandas', 'dict', 'polars', 'arrow'}
     if output_format not in allowed_formats:
         raise PyreadstatError("output format must be one of {allowed_formats}, '{output_format}' was given".format(allowed_formats=allowed_formats, output_format=output_format))
     if output_format == "pandas":
@@ -1258,44 +3726,30 @@ cdef object run_conversion(object filename_path, py_file_format file_format, py_
             import pandas
         except:
             raise PyreadstatError("You requested pandas as output_format but cannot import pandas")
+        pandas_datetime_us = int(pandas.__version__.split(".")[0]) >= 3
     if output_format == "polars":
         try:
             import polars
         except:
             raise PyreadstatError("You requested polars as output_format but cannot import polars")
+    if output_format == "arrow":
+        try:
+            import pyarrow
+        except:
+            raise PyreadstatError("You requested arrow as output_format but cannot import pyarrow")
 
+    # integer columns with missing values become float in pandas and keep nullable integers in polars by default
+    if integers_with_missing is None:
+        integers_with_missing = 'float' if output_format == 'pandas' else 'nullable'
+    allowed_integer_missing = {'float', 'nullable'}
+    if integers_with_missing not in allowed_integer_missing:
+        raise PyreadstatError("integers_with_missing must be one of {allowed}, '{given}' was given".format(allowed=allowed_integer_missing, given=integers_with_missing))
+
+    if io is not None and io != "mmap":
+        raise PyreadstatError("io must be either None or 'mmap', '{0}' was given".format(io))
+    if buffer_size < 0:
+        raise PyreadstatError("buffer_size must be zero or positive")
 
-    if extra_date_formats is not None:
-        if file_format == FILE_FORMAT_SAS:
-            sas_date_formats.extend(extra_date_formats)
-        elif file_format == FILE_FORMAT_SPSS:
-            spss_date_formats.extend(extra_date_formats)
-        elif file_format == FILE_FORMAT_STATA:
-            stata_date_formats.extend(extra_date_formats)
-        else:
-            raise PyreadstatError("Unknown file format")
-    if extra_datetime_formats is not None:
-        if file_format == FILE_FORMAT_SAS:
-            sas_datetime_formats.extend(extra_datetime_formats)
-        elif file_format == FILE_FORMAT_SPSS:
-            spss_datetime_formats.extend(extra_datetime_formats)
-        elif file_format == FILE_FORMAT_STATA:
-            stata_datetime_formats.extend(extra_datetime_formats)
-        else:
-            raise PyreadstatError("Unknown file format")
-    if extra_time_formats is not None:
-        if file_format == FILE_FORMAT_SAS:
-            sas_time_formats.extend(extra_time_formats)
-        elif file_format == FILE_FORMAT_SPSS:
-            spss_time_formats.extend(extra_time_formats)
-        elif file_format == FILE_FORMAT_STATA:
-            stata_time_formats.extend(extra_time_formats)
-        else:
-            raise PyreadstatError("Unknown file format")
-    global sas_all_formats, spss_all_formats, stata_all_formats
-    sas_all_formats = sas_date_formats + sas_datetime_formats + sas_time_formats
-    stata_all_formats = stata_date_formats + stata_datetime_formats + stata_time_formats
-    spss_all_formats = spss_date_formats + spss_datetime_formats + spss_time_formats
 
     filename = <char *> filename_bytes
     
@@ -1306,6 +3760,17 @@ cdef object run_conversion(object filename_path, py_file_format file_format, py_
     data.metaonly = metaonly
     data.dates_as_pandas = dates_as_pandas
     data.output_format = output_format
+    data.nullable_integers = integers_with_missing == 'nullable'
+    data.strings_as_category = strings_as_category
+    data.apply_value_formats = apply_value_formats
+    data.formats_as_category = formats_as_category
+    data.formats_as_ordered_category = formats_as_ordered_category
+    data.value_labels = value_labels
+    data.date_formats = build_date_formats(file_format, extra_datetime_formats, extra_date_formats, extra_time_formats)
+    if output_format != "pandas":
+        data.missing_object = None
+    else:
+        data.pandas_datetime_us = pandas_datetime_us
 
     if encoding:
         data.user_encoding = encoding
@@ -1329,11 +3794,68 @@ cdef object run_conversion(object filename_path, py_file_format file_format, py_
         data.filter_cols = 1
         data.use_cols = usecols
 
-    data.usernan = usernan
+    if row_filter is not None and not metaonly and file_extension != FILE_EXT_SAS7BCAT:
+        try:
+            filter_expression, filter_columns = compile_row_filter(row_filter)
+        except ValueError as err:
+            raise PyreadstatError(str(err))
+        if usecols is not None and filter_columns is not None:
+            # the columns used by the filter are read as well and dropped once it is applied
+            extra_columns = [name for name in filter_columns if name not in usecols]
+            data.use_cols = usecols + extra_columns
+
+    data.state.usernan = usernan
     data.no_datetime_conversion = no_datetime_conversion
+    data.row_checkpoints = row_checkpoints
+    data.num_threads = num_threads
+    data.io = io
+    data.buffer_size = buffer_size
+    if isinstance(file_obj, HttpRangeFile):
+        # the remote file has its own cache, read ahead only one of its blocks to fetch as little as possible
+        data.buffer_size = min(buffer_size, file_obj.block_size)
     
+    # the columns of files read before with the same options are mapped from the cache, only string row filters
+    # are part of the options
+    if (cache_dir is not None and file_obj is None and not metaonly and file_extension != FILE_EXT_SAS7BCAT and
+            (row_filter is None or isinstance(row_filter, str))):
+        column_cache = cache_dir if isinstance(cache_dir, ColumnCache) else ColumnCache(cache_dir)
+        cache_key = column_cache.key(filename_bytes, column_cache_options(data, file_extension, row_limit, row_offset,
+                                                                          row_filter))
+        cache_entry = column_cache.load(cache_key)
+
     # go!
-    run_readstat_parser(filename, data, file_extension, row_limit, row_offset, file_obj)    
+    if cache_entry is not None:
+        import_data_container(data, cache_entry)
+    elif row_ranges and not metaonly and file_extension != FILE_EXT_SAS7BCAT:
+        if file_obj is not None:
+            raise PyreadstatError("Reading row ranges in parallel needs a file path, file-like objects are not supported")
+        data = run_row_ranges(filename_bytes, data, file_extension, row_ranges, row_range_executor)
+    elif row_chunk_stream is not None and row_limit and not metaonly and file_extension != FILE_EXT_SAS7BCAT:
+        data = row_chunk_stream._read_chunk(data, filename_bytes, file_obj, <int> file_extension, row_limit, row_offset)
+    elif num_threads > 1 and file_extension == FILE_EXT_SAS7BDAT and file_obj is None and not metaonly:
+        data = run_sas7bdat_threads(filename_bytes, data, row_limit, row_offset, num_threads)
+    elif metaonly and file_obj is None:
+        read_file_metadata(filename_bytes, data, file_extension)
+    else:
+        if parsed_metadata is not None and not metaonly and file_extension != FILE_EXT_SAS7BCAT:
+            use_known_labels(data, parsed_metadata.value_labels, parsed_metadata.notes)
+        elif filter_expression is not None and apply_value_formats and file_extension == FILE_EXT_DTA:
+            # the filter is evaluated on the labels, which are at the end of stata files
+            read_stata_labels_first(data, filename_bytes, file_obj)
+        if filter_expression is not None:
+            # the filter is evaluated every block of rows while parsing, only the rows passing it are kept
+            data.row_filter = filter_expression
+            data.row_filter_columns = filter_columns
+            data.state.filter_rows = ROW_FILTER_BLOCK
+        run_readstat_parser(filename, data, file_extension, row_limit, row_offset, file_obj)    
+    if filter_expression is not None and cache_entry is None:
+        data.row_filter = filter_expression
+        data.row_filter_columns = filter_columns
+        finish_row_filter(data)
+        if extra_columns:
+            drop_columns(data, extra_columns)
+    if column_cache is not None and cache_entry is None:
+        column_cache.store(cache_key, export_data_container(data))
     data_dict = data_container_to_dict(data)
     if output_format == 'dict':
         data_frame = data_dict
@@ -1343,11 +3865,57 @@ cdef object run_conversion(object filename_path, py_file_format file_format, py_
 
     return data_frame, metadata
     
+# stream of chunks of rows used by the reads done in the current context, see RowChunkStream
+_row_chunk_stream = contextvars.ContextVar("pyreadstat_row_chunk_stream", default=None)
+
+# ranges of rows to be parsed in parallel by the reads done in the current context and the executor
+# parsing them, see parallel_row_ranges
+_row_ranges = contextvars.ContextVar("pyreadstat_row_ranges", default=None)
+_row_range_executor = contextvars.ContextVar("pyreadstat_row_range_executor", default=None)
+
+# metadata of the file read in the current context, already parsed by the caller, see known_metadata
+_known_metadata = contextvars.ContextVar("pyreadstat_known_metadata", default=None)
+
+
+@contextlib.contextmanager
+def parallel_row_ranges(list row_ranges, executor=None):
+    """
+    Context manager making the reads inside it parse the given ranges of rows in parallel
+    and put them together in one data frame. row_ranges is a list of (row_offset, row_limit) tuples
+    of consecutive ranges. The ranges are parsed by executor, a concurrent.futures executor of threads
+    or processes, or in new threads if it is None. Used by read_file_multiprocessing.
+    """
+    token = _row_ranges.set(row_ranges)
+    executor_token = _row_range_executor.set(executor)
+    try:
+        yield
+    finally:
+        _row_range_executor.reset(executor_token)
+        _row_ranges.reset(token)
+
+
+@contextlib.contextmanager
+def known_metadata(metadata):
+    """
+    Context manager making the reads inside it take the value labels and notes from metadata, a
+    metadata_container of the same file, instead of parsing them again. Used by the workers of
+    read_file_multiprocessing.
+    """
+    token = _known_metadata.set(metadata)
+    try:
+        yield
+    finally:
+        _known_metadata.reset(token)
+
+
 def parser_entry_point(filename_path, str parser_format=None,
                        metadataonly=False, dates_as_pandas_datetime=False, 
              formats_as_category=True, formats_as_ordered_category=False, str encoding=None, list usecols=None, user_missing=False,
              disable_datetime_conversion=False, int row_limit=0, int row_offset=0, str output_format=None, list extra_datetime_formats=None, 
-             list extra_date_formats=None, list extra_time_formats=None):
+             list extra_date_formats=None, list extra_time_formats=None, str integers_with_missing=None,
+             strings_as_category=False, apply_value_formats=False, dict value_labels=None, list row_checkpoints=None,
+             int num_threads=1, str io=None, Py_ssize_t buffer_size=FILE_BUFFER_SIZE, cache_dir=None,
+             row_filter=None):
 
 
     cdef py_file_format file_format
@@ -1389,10 +3957,62 @@ def parser_entry_point(filename_path, str parser_format=None,
     cdef bint no_datetime_conversion = 0
     if disable_datetime_conversion:
         no_datetime_conversion = 1
+
+    cdef bint as_category = 0
+    if strings_as_category:
+        as_category = 1
     
     data_frame, metadata = run_conversion(filename_path, file_format, file_extension, encoding, metaonly,
                                           dates_as_pandas, usecols, usernan, no_datetime_conversion, <long>row_limit, <long>row_offset,
-                                          output_format, extra_datetime_formats, extra_date_formats, extra_time_formats)
+                                          output_format, extra_datetime_formats, extra_date_formats, extra_time_formats,
+                                          integers_with_missing, as_category, apply_value_formats,
+                                          formats_as_category, formats_as_ordered_category, value_labels,
+                                          _row_ranges.get(), _row_range_executor.get(), _row_chunk_stream.get(),
+                                          row_checkpoints, num_threads, io, buffer_size, _known_metadata.get(),
+                                          cache_dir, row_filter)
 
     return data_frame, metadata
 
+
+
+def build_row_index(filename_path, str parser_format, long checkpoint_interval):
+    """
+    Parses all rows of a sav or sas7bdat file without converting any value and returns a list of the
+    checkpoints (row, offset, commands, commands_left) where the parsing can be resumed, one
+    every checkpoint_interval rows or, for sas7bdat, at the first page after them. The list is
+    empty for sav files that are not row compressed.
+    """
+
+    cdef py_file_format file_format
+    cdef py_file_extension file_extension
+    if parser_format == "sav/zsav":
+        file_format = FILE_FORMAT_SPSS
+        file_extension = FILE_EXT_SAV
+    elif parser_format == "sas7bdat":
+        file_format = FILE_FORMAT_SAS
+        file_extension = FILE_EXT_SAS7BDAT
+    else:
+        raise PyreadstatError("wrong parser format")
+
+    cdef bytes filename_bytes = os.path.expanduser(os.fsencode(filename_path))
+    if not os.path.isfile(filename_bytes):
+        raise PyreadstatError("File {0} does not exist!".format(filename_path))
+
+    cdef data_container data = data_container()
+    data.file_format = file_format
+    data.output_format = "dict"
+    data.missing_object = None
+    data.date_formats = build_date_formats(file_format, None, None, None)
+    if file_format == FILE_FORMAT_SAS:
+        data.origin = sas_origin
+        data.unix_to_origin_secs = sas_secs_from_unix
+    else:
+        data.origin = spss_origin
+        data.unix_to_origin_secs = spss_secs_from_unix
+    # skip all the variables, rows are still parsed but no value is converted
+    data.filter_cols = 1
+    data.use_cols = []
+    data.row_checkpoints = []
+    data.checkpoint_interval = checkpoint_interval
+    run_readstat_parser(<char *> filename_bytes, data, file_extension, 0, 0)
+    return data.row_checkpoints
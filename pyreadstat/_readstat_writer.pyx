@@ -563,7 +563,7 @@ cdef void set_variable_measure(readstat_variable_t *variable, str measure_str, s
     readstat_variable_set_measure(variable, measure);
 
 
-cdef ssize_t write_bytes(const void *data, size_t _len, void *ctx) noexcept:
+cdef ssize_t write_bytes(const void *data, size_t _len, void *ctx) noexcept with gil:
     """
     for the writer an explicit function to write must be defined 
     """
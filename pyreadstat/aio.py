@@ -0,0 +1,224 @@
+# #############################################################################
+# Copyright 2018 Hoffmann-La Roche
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# #############################################################################
+
+"""
+asyncio versions of the read functions. The files are parsed in a pool of threads owned by this module, so that
+the event loop keeps running while they are parsed. The GIL is released while parsing, so several files are
+parsed at the same time. The pool is separate from the ReadExecutor pools, which the parsing threads may use
+themselves with read_file_multiprocessing or multiprocess=True, so that they never wait for a worker of their own pool.
+
+Sources can be paths, http(s) urls, file-like objects, or async file-like objects whose read, seek and tell
+are coroutines (for example aiofiles files). The async methods run in the event loop while the parsing
+thread waits for them.
+"""
+
+import asyncio
+import atexit
+from concurrent.futures import Executor, ThreadPoolExecutor
+import contextvars
+import functools
+import inspect
+import os
+import threading
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable
+
+from . import pyreadstat
+from .pyclasses import metadata_container
+
+if TYPE_CHECKING:
+    from .pyreadstat import PyreadstatReadFunction, DataFrame, DictOutput
+
+_executor: Executor | None = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor() -> Executor:
+    """
+    Returns the module level pool of threads, started on first use and shut down at exit
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4),
+                                           thread_name_prefix="pyreadstat-aio")
+        return _executor
+
+
+@atexit.register
+def _shutdown_default_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+async def _await(awaitable: Any) -> Any:
+    return await awaitable
+
+
+class AsyncFileAdapter:
+    """
+    Makes an async file-like object readable from the parsing threads: every call runs in the event loop
+    and the thread waits for its result. The parser reads the file in large blocks, so only a few calls are done.
+    """
+
+    def __init__(self, file_obj: Any, loop: asyncio.AbstractEventLoop) -> None:
+        self.file_obj = file_obj
+        self.loop = loop
+
+    def _call(self, method: str, *args: Any) -> Any:
+        result = getattr(self.file_obj, method)(*args)
+        if inspect.isawaitable(result):
+            result = asyncio.run_coroutine_threadsafe(_await(result), self.loop).result()
+        return result
+
+    def read(self, size: int = -1) -> bytes:
+        return self._call("read", size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._call("seek", offset, whence)
+
+    def tell(self) -> int:
+        return self._call("tell")
+
+
+def _is_async_file(file_obj: Any) -> bool:
+    return inspect.iscoroutinefunction(getattr(file_obj, "read", None))
+
+
+def _source(file_path: Any, loop: asyncio.AbstractEventLoop) -> Any:
+    """
+    Wraps async file-like objects to be read from the parsing threads
+    """
+    if _is_async_file(file_path):
+        return AsyncFileAdapter(file_path, loop)
+    return file_path
+
+
+async def _run(read_function: Callable[..., Any], file_path: Any, args: tuple, kwargs: dict,
+               executor: Executor | None) -> "tuple[DataFrame | DictOutput, metadata_container]":
+    loop = asyncio.get_running_loop()
+    if executor is None:
+        executor = _default_executor()
+    call = functools.partial(read_function, _source(file_path, loop), *args, **kwargs)
+    return await loop.run_in_executor(executor, contextvars.copy_context().run, call)
+
+
+async def read_sas7bdat(filename_path: Any, *args: Any, executor: Executor | None = None,
+                        **kwargs: Any) -> "tuple[DataFrame | DictOutput, metadata_container]":
+    """
+    Coroutine reading a SAS sas7bdat file, it takes the same arguments as pyreadstat.read_sas7bdat.
+    executor is a concurrent.futures pool of threads where the file is parsed, by default the pool of this module.
+    """
+    return await _run(pyreadstat.read_sas7bdat, filename_path, args, kwargs, executor)
+
+
+async def read_xport(filename_path: Any, *args: Any, executor: Executor | None = None,
+                     **kwargs: Any) -> "tuple[DataFrame | DictOutput, metadata_container]":
+    """
+    Coroutine reading a SAS xport file, it takes the same arguments as pyreadstat.read_xport.
+    executor is a concurrent.futures pool of threads where the file is parsed, by default the pool of this module.
+    """
+    return await _run(pyreadstat.read_xport, filename_path, args, kwargs, executor)
+
+
+async def read_dta(filename_path: Any, *args: Any, executor: Executor | None = None,
+                   **kwargs: Any) -> "tuple[DataFrame | DictOutput, metadata_container]":
+    """
+    Coroutine reading a STATA dta file, it takes the same arguments as pyreadstat.read_dta.
+    executor is a concurrent.futures pool of threads where the file is parsed, by default the pool of this module.
+    """
+    return await _run(pyreadstat.read_dta, filename_path, args, kwargs, executor)
+
+
+async def read_sav(filename_path: Any, *args: Any, executor: Executor | None = None,
+                   **kwargs: Any) -> "tuple[DataFrame | DictOutput, metadata_container]":
+    """
+    Coroutine reading a SPSS sav or zsav file, it takes the same arguments as pyreadstat.read_sav.
+    executor is a concurrent.futures pool of threads where the file is parsed, by default the pool of this module.
+    """
+    return await _run(pyreadstat.read_sav, filename_path, args, kwargs, executor)
+
+
+async def read_por(filename_path: Any, *args: Any, executor: Executor | None = None,
+                   **kwargs: Any) -> "tuple[DataFrame | DictOutput, metadata_container]":
+    """
+    Coroutine reading a SPSS por file, it takes the same arguments as pyreadstat.read_por.
+    executor is a concurrent.futures pool of threads where the file is parsed, by default the pool of this module.
+    """
+    return await _run(pyreadstat.read_por, filename_path, args, kwargs, executor)
+
+
+async def read_sas7bcat(filename_path: Any, *args: Any, executor: Executor | None = None,
+                        **kwargs: Any) -> "tuple[DataFrame | DictOutput, metadata_container]":
+    """
+    Coroutine reading a SAS sas7bcat file, it takes the same arguments as pyreadstat.read_sas7bcat.
+    executor is a concurrent.futures pool of threads where the file is parsed, by default the pool of this module.
+    """
+    return await _run(pyreadstat.read_sas7bcat, filename_path, args, kwargs, executor)
+
+
+# async read functions to the read functions they call, read_file_in_chunks accepts both
+_read_functions = {
+    read_sas7bdat: pyreadstat.read_sas7bdat,
+    read_xport: pyreadstat.read_xport,
+    read_dta: pyreadstat.read_dta,
+    read_sav: pyreadstat.read_sav,
+    read_por: pyreadstat.read_por,
+    read_sas7bcat: pyreadstat.read_sas7bcat,
+}
+
+
+async def read_file_in_chunks(
+    read_function: "PyreadstatReadFunction | Callable[..., Any]",
+    file_path: Any,
+    *args: Any,
+    executor: Executor | None = None,
+    **kwargs: Any,
+) -> "AsyncIterator[tuple[DataFrame | DictOutput, metadata_container]]":
+    """
+    Async iterator reading a file in chunks, it takes the same arguments as pyreadstat.read_file_in_chunks.
+    read_function can be a pyreadstat read function or its version in this module. Every chunk is parsed in
+    executor, a concurrent.futures pool of threads, by default the pool of this module.
+
+    Example
+    -------
+        async for df, meta in pyreadstat.aio.read_file_in_chunks(pyreadstat.read_sav, path, chunksize=10000):
+            ...
+    """
+    loop = asyncio.get_running_loop()
+    if executor is None:
+        executor = _default_executor()
+    read_function = _read_functions.get(read_function, read_function)
+    chunks = pyreadstat.read_file_in_chunks(read_function, _source(file_path, loop), *args, **kwargs)
+    # the chunks are read one after the other in the same context, whatever thread reads them
+    context = contextvars.copy_context()
+    done = object()
+    pending = None
+    try:
+        while True:
+            pending = loop.run_in_executor(executor, context.run, next, chunks, done)
+            # if the iteration is cancelled the chunk being read is waited for before closing the generator
+            chunk = await asyncio.shield(pending)
+            pending = None
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        if pending is not None:
+            await asyncio.wait([pending])
+        await loop.run_in_executor(executor, context.run, chunks.close)
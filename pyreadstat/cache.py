@@ -0,0 +1,246 @@
+# #############################################################################
+# Copyright 2018 Hoffmann-La Roche
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# #############################################################################
+
+"""
+Cache on disk of the columns parsed from files
+"""
+
+import hashlib
+import os
+from os import PathLike
+import pickle
+import shutil
+import time
+import uuid
+import warnings
+from typing import Any
+
+import numpy as np
+
+# changes when the layout of the entries changes, older entries are not read anymore
+_CACHE_VERSION = 1
+# arrays smaller than this are kept inside the pickle instead of a file of their own
+_MIN_ARRAY_FILE_SIZE = 64 * 1024
+_ENTRY_FILE = "entry.pickle"
+# entries are written in folders with this prefix, renamed when complete
+_TEMP_PREFIX = ".tmp-"
+# temporary folders older than this, in seconds, were left by writers that died and are removed
+_STALE_TEMP_AGE = 24 * 60 * 60
+
+
+class _EntryPickler(pickle.Pickler):
+    """
+    Pickles an entry writing its large numeric arrays to .npy files next to it
+    """
+
+    def __init__(self, file: Any, folder: str) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.folder = folder
+        self.n_arrays = 0
+
+    def persistent_id(self, obj: Any) -> str | None:
+        if type(obj) is not np.ndarray or obj.dtype.hasobject or obj.nbytes < _MIN_ARRAY_FILE_SIZE:
+            return None
+        name = "{0}.npy".format(self.n_arrays)
+        self.n_arrays += 1
+        np.save(os.path.join(self.folder, name), np.ascontiguousarray(obj))
+        return name
+
+
+class _EntryUnpickler(pickle.Unpickler):
+    """
+    Reads an entry pickled by _EntryPickler mapping its arrays in memory
+    """
+
+    def __init__(self, file: Any, folder: str) -> None:
+        super().__init__(file)
+        self.folder = folder
+
+    def persistent_load(self, name: str) -> np.ndarray:
+        # copy on write: the pages are shared with the file until something writes to them
+        return np.load(os.path.join(self.folder, name), mmap_mode="c")
+
+
+def file_fingerprint(path: "str | bytes | PathLike", samples: int = 16, sample_size: int = 64 * 1024) -> str:
+    """
+    Returns a fingerprint of the content of a file built from its size, its modification time and samples of
+    sample_size bytes evenly spread over it, first and last bytes included. It changes when the file is
+    written again, while reading only a small part of big files.
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("{0}:{1}".format(stat.st_size, stat.st_mtime_ns).encode("ascii"))
+    with open(path, "rb") as file:
+        if stat.st_size <= samples * sample_size:
+            digest.update(file.read())
+        else:
+            for index in range(samples):
+                file.seek((stat.st_size - sample_size) * index // (samples - 1))
+                digest.update(file.read(sample_size))
+    return digest.hexdigest()
+
+
+class ColumnCache:
+    """
+    A folder keeping the columns parsed from files together with their metadata, so that reading again the same
+    file with the same options maps the columns in memory from the cache instead of parsing the file. Entries
+    are found by a fingerprint of the content of the file (see file_fingerprint) and the reading options, a file
+    written again gets a new entry. When the entries take more than max_size bytes the least recently read ones
+    are removed.
+
+    Read functions receiving a folder as cache_dir use it with this class, create it yourself to change
+    max_size.
+
+    Parameters
+    ----------
+        directory : str, bytes or Path-like object
+            folder of the cache, it is created if needed
+        max_size : int, optional
+            maximum number of bytes taken by the entries, by default 10 GB
+    """
+
+    def __init__(self, directory: "str | bytes | PathLike", max_size: int = 10 * 1024 * 1024 * 1024) -> None:
+        self.directory = os.fsdecode(os.path.expanduser(directory))
+        self.max_size = max_size
+
+    def __repr__(self) -> str:
+        return "ColumnCache({0!r}, max_size={1})".format(self.directory, self.max_size)
+
+    def key(self, path: "str | bytes | PathLike", options: str) -> str:
+        """
+        Returns the key of the entry of a file read with options
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update("{0}:{1}:".format(_CACHE_VERSION, file_fingerprint(path)).encode("ascii"))
+        digest.update(options.encode("utf-8"))
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Any:
+        """
+        Returns the entry stored with key or None if there is none
+        """
+        folder = os.path.join(self.directory, key)
+        entry_path = os.path.join(folder, _ENTRY_FILE)
+        try:
+            with open(entry_path, "rb") as file:
+                entry = _EntryUnpickler(file, folder).load()
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # damaged or being evicted: the entry is removed and the file is parsed again
+            shutil.rmtree(folder, ignore_errors=True)
+            return None
+        try:
+            # the modification time of the entry tells when it was last read
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry
+
+    def store(self, key: str, entry: Any) -> None:
+        """
+        Stores an entry with key and removes the least recently read entries if the cache is too big. If the entry
+        cannot be written, for instance because the disk is full, a warning is issued and the entry is not stored.
+        """
+        folder = os.path.join(self.directory, key)
+        if os.path.isdir(folder):
+            return
+        # written in a temporary folder renamed at the end, so that readers never see half written entries
+        temp_folder = os.path.join(self.directory, "{0}{1}".format(_TEMP_PREFIX, uuid.uuid4().hex))
+        try:
+            os.makedirs(temp_folder)
+            with open(os.path.join(temp_folder, _ENTRY_FILE), "wb") as file:
+                _EntryPickler(file, temp_folder).dump(entry)
+            os.rename(temp_folder, folder)
+        except Exception as err:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+            # nothing to warn about if another process stored the same entry first
+            if not os.path.isdir(folder):
+                warnings.warn("the parsed file could not be stored in the cache {0}: {1}".format(self.directory, err),
+                              RuntimeWarning)
+            return
+        self.evict(keep=key)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """
+        Returns the last read time, size and key of every entry
+        """
+        entries = list()
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            folder = os.path.join(self.directory, name)
+            if name.startswith(_TEMP_PREFIX):
+                # entries being written by other processes are not entries yet
+                continue
+            try:
+                last_read = os.stat(os.path.join(folder, _ENTRY_FILE)).st_mtime
+                size = sum(entry.stat().st_size for entry in os.scandir(folder))
+            except OSError:
+                continue
+            entries.append((last_read, size, name))
+        return entries
+
+    @property
+    def size(self) -> int:
+        """
+        Number of bytes taken by the entries
+        """
+        return sum(size for last_read, size, name in self._entries())
+
+    def _remove_stale_temp_folders(self) -> None:
+        """
+        Removes the temporary folders left by writers that stopped before finishing their entry
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.startswith(_TEMP_PREFIX):
+                continue
+            folder = os.path.join(self.directory, name)
+            try:
+                stale = time.time() - os.stat(folder).st_mtime > _STALE_TEMP_AGE
+            except OSError:
+                continue
+            if stale:
+                shutil.rmtree(folder, ignore_errors=True)
+
+    def evict(self, keep: str | None = None) -> None:
+        """
+        Removes the least recently read entries until they take at most max_size bytes, keep is never removed
+        """
+        self._remove_stale_temp_folders()
+        entries = sorted(self._entries())
+        total = sum(size for last_read, size, name in entries)
+        for last_read, size, name in entries:
+            if total <= self.max_size:
+                break
+            if name == keep:
+                continue
+            # on windows the files of entries mapped by a reader cannot be removed, they are tried again later
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        """
+        Removes all the entries
+        """
+        for last_read, size, name in self._entries():
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
@@ -0,0 +1,211 @@
+# #############################################################################
+# Copyright 2018 Hoffmann-La Roche
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# #############################################################################
+
+"""
+Row filters of the read functions: parsing of the string filters and evaluation on data frames
+"""
+
+import ast
+import operator
+from typing import Any
+
+import narwhals
+import narwhals.stable.v2 as nw
+import numpy as np
+
+_comparisons = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+_MASK_NAME = "__pyreadstat_row_filter"
+
+
+class _Column:
+    """
+    A column found while parsing a string filter
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+def _operand(node: ast.AST, columns: list[str]) -> Any:
+    """
+    Returns a _Column for column names, the value for constants and a tuple of values for tuples, lists and sets
+    """
+    if isinstance(node, ast.Name):
+        if node.id not in columns:
+            columns.append(node.id)
+        return _Column(node.id)
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "col" and not node.keywords
+            and len(node.args) == 1 and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+        # col("name") for names that are not python identifiers
+        return _operand(ast.Name(node.args[0].value), columns)
+    if isinstance(node, ast.Constant) and (node.value is None or isinstance(node.value, (bool, int, float, str))):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _operand(node.operand, columns)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        values = tuple(_operand(element, columns) for element in node.elts)
+        if not any(isinstance(value, (_Column, tuple)) for value in values):
+            return values
+    raise ValueError("row_filter: '{0}' is not a column name or a constant".format(ast.unparse(node)))
+
+
+def _comparison(op: ast.cmpop, left: Any, right: Any, node: ast.AST) -> Any:
+    """
+    Returns the expression comparing two operands, one of them at least must be a column
+    """
+    if isinstance(op, (ast.In, ast.NotIn)):
+        if not isinstance(left, _Column) or not isinstance(right, tuple):
+            raise ValueError("row_filter: 'in' needs a column on the left and a tuple of values on the right in '{0}'".format(ast.unparse(node)))
+        expression = nw.col(left.name).is_in(right)
+        return ~expression if isinstance(op, ast.NotIn) else expression
+    if isinstance(op, (ast.Is, ast.IsNot)) or right is None or left is None:
+        # comparisons with None test if the values are missing
+        if isinstance(op, (ast.Is, ast.Eq)):
+            negate = False
+        elif isinstance(op, (ast.IsNot, ast.NotEq)):
+            negate = True
+        else:
+            raise ValueError("row_filter: None can only be compared with ==, !=, is or is not in '{0}'".format(ast.unparse(node)))
+        column = left if right is None else right
+        if not isinstance(column, _Column) or (left is None) == (right is None):
+            raise ValueError("row_filter: None must be compared with a column in '{0}'".format(ast.unparse(node)))
+        expression = nw.col(column.name).is_null()
+        return ~expression if negate else expression
+    if not isinstance(left, _Column) and not isinstance(right, _Column):
+        raise ValueError("row_filter: the comparison '{0}' does not use any column".format(ast.unparse(node)))
+    if isinstance(left, tuple) or isinstance(right, tuple):
+        raise ValueError("row_filter: tuples of values can only be used with 'in' in '{0}'".format(ast.unparse(node)))
+    left = nw.col(left.name) if isinstance(left, _Column) else left
+    right = nw.col(right.name) if isinstance(right, _Column) else right
+    return _comparisons[type(op)](left, right)
+
+
+def _expression(node: ast.AST, columns: list[str]) -> Any:
+    """
+    Transforms a node of a string filter into a narwhals expression
+    """
+    if isinstance(node, ast.BoolOp):
+        expressions = [_expression(value, columns) for value in node.values]
+        expression = expressions[0]
+        for other in expressions[1:]:
+            expression = expression & other if isinstance(node.op, ast.And) else expression | other
+        return expression
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ~_expression(node.operand, columns)
+    if isinstance(node, ast.Compare):
+        # chained comparisons as 1 < x <= 5 are the and of each comparison
+        expression = None
+        left = _operand(node.left, columns)
+        for op, comparator in zip(node.ops, node.comparators):
+            if type(op) not in _comparisons and not isinstance(op, (ast.In, ast.NotIn, ast.Is, ast.IsNot)):
+                raise ValueError("row_filter: comparison operator not supported in '{0}'".format(ast.unparse(node)))
+            right = _operand(comparator, columns)
+            comparison = _comparison(op, left, right, node)
+            expression = comparison if expression is None else expression & comparison
+            left = right
+        return expression
+    raise ValueError("row_filter: '{0}' is not a comparison, only comparisons of columns combined with and, or and not "
+                     "are supported".format(ast.unparse(node)))
+
+
+def parse_row_filter(text: str) -> tuple[Any, list[str]]:
+    """
+    Transforms a string filter into a narwhals expression and returns it with the names of the columns it uses.
+    The filter is python syntax limited to comparisons (==, !=, <, <=, >, >=, in, not in) of columns with
+    constants or other columns, combined with and, or, not and parentheses. Columns are written by name or as
+    col("name") for names that are not python identifiers. Comparing a column with None tests if values are
+    missing. Nothing is evaluated as python code.
+
+    Example
+    -------
+        parse_row_filter("region == 5 and (age >= 18 or status in ('a', 'b'))")
+    """
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as err:
+        raise ValueError("row_filter: '{0}' is not a valid filter: {1}".format(text, err.msg)) from None
+    columns: list[str] = list()
+    return _expression(tree.body, columns), columns
+
+
+def compile_row_filter(row_filter: Any) -> tuple[Any, list[str] | None]:
+    """
+    Returns the narwhals expression of a row filter given as a string or a narwhals expression and the names
+    of the columns it uses, None if they are not known as for narwhals expressions.
+    """
+    if isinstance(row_filter, str):
+        return parse_row_filter(row_filter)
+    # expressions of the stable namespaces derive from the main one
+    if isinstance(row_filter, narwhals.Expr):
+        return row_filter, None
+    raise ValueError("row_filter must be a string or a narwhals expression, got {0}".format(type(row_filter).__name__))
+
+
+def evaluation_format() -> str:
+    """
+    Returns the output format of the data frames where filters are evaluated for dict outputs: pandas, polars
+    or arrow, the first one installed
+    """
+    for output_format, module in (("pandas", "pandas"), ("polars", "polars"), ("arrow", "pyarrow")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        return output_format
+    raise ValueError("row_filter with output_format 'dict' needs pandas, polars or pyarrow")
+
+
+def row_filter_mask(data_frame: Any, expression: Any) -> np.ndarray:
+    """
+    Returns a boolean numpy array, True for the rows of a pandas, polars or pyarrow data frame where expression
+    is true. Rows where it is missing are not kept.
+    """
+    frame = nw.from_native(data_frame, eager_only=True)
+    try:
+        result = frame.select(expression.alias(_MASK_NAME))[_MASK_NAME]
+    except Exception as err:
+        raise ValueError("row_filter could not be evaluated: {0}".format(err)) from err
+    if len(result) != len(frame):
+        raise ValueError("row_filter must give a value for every row, aggregations are not supported")
+    if result.dtype != nw.Boolean:
+        raise ValueError("row_filter must be a boolean expression, it gives values of type {0}".format(result.dtype))
+    return np.asarray(result.fill_null(False).to_numpy(), dtype=np.bool_)
+
+
+def filter_frame(data_frame: Any, expression: Any, output_format: str | None) -> Any:
+    """
+    Returns the rows of a data frame or dict returned by a read function where expression is true
+    """
+    if output_format == "dict":
+        evaluation = evaluation_format()
+        frame = nw.from_dict(data_frame, backend="pyarrow" if evaluation == "arrow" else evaluation).to_native()
+        mask = row_filter_mask(frame, expression)
+        return {name: [value for value, keep in zip(values, mask) if keep] for name, values in data_frame.items()}
+    mask = row_filter_mask(data_frame, expression)
+    if output_format is None or output_format == "pandas":
+        return data_frame[mask].reset_index(drop=True)
+    # polars data frames and arrow tables
+    return data_frame.filter(mask)
@@ -143,9 +143,7 @@ def set_catalog_to_sas(
     """
 
     if catalog_metadata.value_labels and sas_metadata.variable_to_label:
-        catalog_metadata_copy = deepcopy(catalog_metadata)
-        metadata = deepcopy(sas_metadata)
-        metadata.value_labels = catalog_metadata_copy.value_labels
+        metadata = set_catalog_metadata(sas_metadata, catalog_metadata)
         df_copy = set_value_labels(
             sas_dataframe,
             metadata,
@@ -153,16 +151,43 @@ def set_catalog_to_sas(
             formats_as_ordered_category=formats_as_ordered_category,
         )
 
-        variable_value_labels = dict()
-        for var_name, var_label in metadata.variable_to_label.items():
-            current_labels = catalog_metadata_copy.value_labels.get(var_label)
-            if current_labels:
-                variable_value_labels[var_name] = current_labels
-        metadata.variable_value_labels = variable_value_labels
-
     else:
         # df_copy = sas_dataframe.copy()
         df_copy = nw.from_native(sas_dataframe).clone().to_native()
         metadata = deepcopy(sas_metadata)
 
     return df_copy, metadata
+
+
+def set_catalog_metadata(
+    sas_metadata: metadata_container,
+    catalog_metadata: metadata_container,
+) -> metadata_container:
+    """
+    Returns a copy of sas_metadata enriched with the value labels found in the catalog for its variables.
+
+    Parameters
+    ----------
+        sas_metadata : pyreadstat metadata object
+            resulting from parsing a sas7bdat file
+        catalog_metadata : pyreadstat metadata object
+            resulting from parsing a sas7bcat (catalog) file
+
+    Returns
+    -------
+        metadata : pyreadstat metadata object
+            a copy of the original sas_metadata with value_labels and variable_value_labels from the catalog
+    """
+
+    catalog_metadata_copy = deepcopy(catalog_metadata)
+    metadata = deepcopy(sas_metadata)
+    metadata.value_labels = catalog_metadata_copy.value_labels
+
+    variable_value_labels = dict()
+    for var_name, var_label in metadata.variable_to_label.items():
+        current_labels = catalog_metadata_copy.value_labels.get(var_label)
+        if current_labels:
+            variable_value_labels[var_name] = current_labels
+    metadata.variable_value_labels = variable_value_labels
+
+    return metadata
@@ -15,18 +15,23 @@
 # #############################################################################
 
 from collections.abc import Callable, Iterator
+import contextlib
 import multiprocessing as mp
+import os
+import struct
 from itertools import chain
 from os import PathLike
 from typing import TYPE_CHECKING, Any, Literal, TypeAlias, overload, Protocol #, Concatenate: see later
 
 import narwhals.stable.v2 as nw
 
-from ._readstat_parser import parser_entry_point, PyreadstatError
+from ._readstat_parser import parser_entry_point, parallel_row_ranges, build_row_index, PyreadstatError, RowChunkStream
 from ._readstat_writer import writer_entry_point
-from .worker import worker
+from .worker import ReadExecutor, default_executor, worker
 from .pyclasses import metadata_container, MissingRange
-from .pyfunctions import set_value_labels, set_catalog_to_sas
+from .cache import ColumnCache
+from .remote import HttpRangeFile, is_url
+from .pyfunctions import set_value_labels, set_catalog_to_sas, set_catalog_metadata
 
 # Typing interface
 
@@ -51,7 +56,14 @@ if TYPE_CHECKING:
         class PolarsDataFrame:
             pass
 
-DataFrame: TypeAlias = "PandasDataFrame | PolarsDataFrame"  # Define type at runtime for introspection
+    try:
+        from pyarrow import Table as ArrowTable  # type: ignore
+    except ImportError:
+        # Define a dummy Table class to avoid accepting any type as ArrowTable when pyarrow is not installed
+        class ArrowTable:
+            pass
+
+DataFrame: TypeAlias = "PandasDataFrame | PolarsDataFrame | ArrowTable"  # Define type at runtime for introspection
 
 class FileLike(Protocol):
     """Protocol for file-like objects accepted by pyreadstat"""
@@ -94,6 +106,13 @@ def read_sas7bdat(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    use_index: bool = ...,
+    num_threads: int = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PandasDataFrame, metadata_container]": ...
 @overload
 def read_sas7bdat(
@@ -113,6 +132,13 @@ def read_sas7bdat(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    use_index: bool = ...,
+    num_threads: int = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PolarsDataFrame, metadata_container]": ...
 @overload
 def read_sas7bdat(
@@ -132,7 +158,40 @@ def read_sas7bdat(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    use_index: bool = ...,
+    num_threads: int = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> tuple[DictOutput, metadata_container]: ...
+@overload
+def read_sas7bdat(
+    filename_path: FilePathorBuffer,
+    metadataonly: bool = ...,
+    dates_as_pandas_datetime: bool = ...,
+    catalog_file: FilePathorBuffer | None = ...,
+    formats_as_category: bool = ...,
+    formats_as_ordered_category: bool = ...,
+    encoding: str | None = ...,
+    usecols: list[str] | None = ...,
+    user_missing: bool = ...,
+    disable_datetime_conversion: bool = ...,
+    row_limit: int = ...,
+    row_offset: int = ...,
+    output_format: Literal["arrow"] = "arrow",
+    extra_datetime_formats: list[str] | None = ...,
+    extra_date_formats: list[str] | None = ...,
+    extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    use_index: bool = ...,
+    num_threads: int = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
+) -> "tuple[ArrowTable, metadata_container]": ...
 def read_sas7bdat(
     filename_path: FilePathorBuffer,
     metadataonly: bool = False,
@@ -146,10 +205,17 @@ def read_sas7bdat(
     disable_datetime_conversion: bool = False,
     row_limit: int = 0,
     row_offset: int = 0,
-    output_format: Literal["pandas", "polars", "dict"] | None = None,
+    output_format: Literal["pandas", "polars", "dict", "arrow"] | None = None,
     extra_datetime_formats: list[str] | None = None,
     extra_date_formats: list[str] | None = None,
     extra_time_formats: list[str] | None = None,
+    strings_as_category: bool = False,
+    use_index: bool = False,
+    num_threads: int = 1,
+    io: Literal["mmap"] | None = None,
+    buffer_size: int = 4 * 1024 * 1024,
+    cache_dir: "str | PathLike | ColumnCache | None" = None,
+    row_filter: "str | nw.Expr | None" = None,
 ) -> "tuple[DataFrame | DictOutput, metadata_container]":
     r"""
     Read a SAS sas7bdat file.
@@ -158,7 +224,7 @@ def read_sas7bdat(
     Parameters
     ----------
         filename_path : str, bytes, Path-like object or file-like object
-            path to the file or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
+            path to the file, http(s) url or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
         metadataonly : bool, optional
             by default False. IF true, no data will be read but only metadata, so that you can get all elements in the
             metadata object. The data frame will be set with the correct column names but no data.
@@ -197,9 +263,9 @@ def read_sas7bdat(
         row_offset : int, optional
             start reading rows after this offset. By default 0, meaning start with the first row not skipping anything.
         output_format : str, optional
-            one of 'pandas' (default), 'polars' or 'dict'. If 'dict' a dictionary with numpy arrays as values will be returned, the
+            one of 'pandas' (default), 'polars', 'dict' or 'arrow'. If 'dict' a dictionary with numpy arrays as values will be returned, the
             user can then convert it to her preferred data format. Using dict is faster as the other types as the conversion to a
-            dataframe is avoided.
+            dataframe is avoided. If 'arrow' a pyarrow Table built directly from the parsed buffers will be returned.
         extra_datetime_formats: list of str, optional
             formats to be parsed as python datetime objects
         extra_date_formats: list of str, optional
@@ -207,6 +273,33 @@ def read_sas7bdat(
         extra_time_formats: list of str, optional
             formats to be parsed as python time objects
 
+        strings_as_category : bool, optional
+            by default False. If True string columns are stored as categories while parsing: each distinct value is kept
+            only once and the column is returned as pandas or polars Categorical (arrow dictionary for output_format
+            'arrow'). This saves memory and time for columns with few distinct values.
+        use_index : bool, optional
+            by default False. If True the row index written by build_index next to the file is used to jump directly
+            to the page containing row_offset. filename_path must be a path.
+        num_threads : int, optional
+            by default 1. If greater than 1 the rows are split in this number of ranges decompressed and read in
+            parallel threads, which speeds up reading RLE and RDC compressed files. filename_path must be a path.
+        io : str, optional
+            by default None, the file is read with system calls. If 'mmap' the file is mapped in memory and read from
+            there, which avoids a system call for every read and shares the pages of the file between processes
+            reading it. Only for paths, file-like objects are read as usual.
+        buffer_size : int, optional
+            only for file-like objects, by default 4 MB. The object is read in blocks of this size kept in a buffer
+            serving the many small reads done while parsing, 0 reads exactly what is requested every time.
+        cache_dir : str, Path-like object or ColumnCache, optional
+            by default None. A folder where the parsed columns and the metadata are stored the first time a file
+            is read, the next reads of the same file with the same options map them in memory from there instead
+            of parsing the file. Pass a ColumnCache to limit the size of the folder, by default 10 GB. Only for paths.
+        row_filter : str or narwhals expression, optional
+            by default None. Only the rows where it is true are returned. It is evaluated while parsing, every block
+            of rows, so that the rows failing it are never stored. A string is a comparison of columns with values or
+            other columns, as "region == 5 and age >= 18", see the README for what it can contain. A narwhals expression
+            can be any expression giving a boolean for every row, it is evaluated on all the columns read while a string
+            only needs the columns it uses, which are read even if they are not in usecols.
 
     Returns
     -------
@@ -217,7 +310,13 @@ def read_sas7bdat(
             supplied.
             Look at the documentation for more information.
     """
+    # the catalog is read first so that its value labels are applied while parsing for dataframes
+    catalog = None
+    labels_in_parser = bool(catalog_file) and output_format in (None, "pandas", "polars")
+    if labels_in_parser:
+        _, catalog = read_sas7bcat(catalog_file, encoding=encoding, io=io, buffer_size=buffer_size)
     parser_format = "sas7bdat"
+    row_checkpoints = _read_index(filename_path) if use_index else None
     data_frame, metadata = parser_entry_point(
         filename_path,
         parser_format,
@@ -235,12 +334,24 @@ def read_sas7bdat(
         extra_datetime_formats=extra_datetime_formats,
         extra_date_formats=extra_date_formats,
         extra_time_formats=extra_time_formats,
+        strings_as_category=strings_as_category,
+        apply_value_formats=labels_in_parser,
+        value_labels=catalog.value_labels if catalog is not None else None,
+        row_checkpoints=row_checkpoints,
+        num_threads=num_threads,
+        io=io,
+        buffer_size=buffer_size,
+        cache_dir=cache_dir,
+        row_filter=row_filter,
     )
 
     metadata.file_format = parser_format
 
-    if catalog_file:
-        _, catalog = read_sas7bcat(catalog_file, encoding=encoding)
+    if labels_in_parser:
+        if catalog.value_labels and metadata.variable_to_label:
+            metadata = set_catalog_metadata(metadata, catalog)
+    elif catalog_file:
+        _, catalog = read_sas7bcat(catalog_file, encoding=encoding, io=io, buffer_size=buffer_size)
         data_frame, metadata = set_catalog_to_sas(
             data_frame,
             metadata,
@@ -266,6 +377,11 @@ def read_xport(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PandasDataFrame, metadata_container]": ...
 @overload
 def read_xport(
@@ -281,6 +397,11 @@ def read_xport(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PolarsDataFrame, metadata_container]": ...
 @overload
 def read_xport(
@@ -296,7 +417,32 @@ def read_xport(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> tuple[DictOutput, metadata_container]: ...
+@overload
+def read_xport(
+    filename_path: FilePathorBuffer,
+    metadataonly: bool = ...,
+    dates_as_pandas_datetime: bool = ...,
+    encoding: str | None = ...,
+    usecols: list[str] | None = ...,
+    disable_datetime_conversion: bool = ...,
+    row_limit: int = ...,
+    row_offset: int = ...,
+    output_format: Literal["arrow"] = "arrow",
+    extra_datetime_formats: list[str] | None = ...,
+    extra_date_formats: list[str] | None = ...,
+    extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
+) -> "tuple[ArrowTable, metadata_container]": ...
 def read_xport(
     filename_path: FilePathorBuffer,
     metadataonly: bool = False,
@@ -306,10 +452,15 @@ def read_xport(
     disable_datetime_conversion: bool = False,
     row_limit: int = 0,
     row_offset: int = 0,
-    output_format: Literal["pandas", "polars", "dict"] | None = None,
+    output_format: Literal["pandas", "polars", "dict", "arrow"] | None = None,
     extra_datetime_formats: list[str] | None = None,
     extra_date_formats: list[str] | None = None,
     extra_time_formats: list[str] | None = None,
+    strings_as_category: bool = False,
+    io: Literal["mmap"] | None = None,
+    buffer_size: int = 4 * 1024 * 1024,
+    cache_dir: "str | PathLike | ColumnCache | None" = None,
+    row_filter: "str | nw.Expr | None" = None,
 ) -> "tuple[DataFrame | DictOutput, metadata_container]":
     r"""
     Read a SAS xport file.
@@ -317,7 +468,7 @@ def read_xport(
     Parameters
     ----------
         filename_path : str, bytes, Path-like object or file-like object
-            path to the file or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
+            path to the file, http(s) url or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
         metadataonly : bool, optional
             by default False. IF true, no data will be read but only metadata, so that you can get all elements in the
             metadata object. The data frame will be set with the correct column names but no data.
@@ -340,15 +491,36 @@ def read_xport(
         row_offset : int, optional
             start reading rows after this offset. By default 0, meaning start with the first row not skipping anything.
         output_format : str, optional
-            one of 'pandas' (default), 'polars' or 'dict'. If 'dict' a dictionary with numpy arrays as values will be returned, the
+            one of 'pandas' (default), 'polars', 'dict' or 'arrow'. If 'dict' a dictionary with numpy arrays as values will be returned, the
             user can then convert it to her preferred data format. Using dict is faster as the other types as the conversion to a
-            dataframe is avoided.
+            dataframe is avoided. If 'arrow' a pyarrow Table built directly from the parsed buffers will be returned.
         extra_datetime_formats: list of str, optional
             formats to be parsed as python datetime objects
         extra_date_formats: list of str, optional
             formats to be parsed as python date objects
         extra_time_formats: list of str, optional
             formats to be parsed as python time objects
+        strings_as_category : bool, optional
+            by default False. If True string columns are stored as categories while parsing: each distinct value is kept
+            only once and the column is returned as pandas or polars Categorical (arrow dictionary for output_format
+            'arrow'). This saves memory and time for columns with few distinct values.
+        io : str, optional
+            by default None, the file is read with system calls. If 'mmap' the file is mapped in memory and read from
+            there, which avoids a system call for every read and shares the pages of the file between processes
+            reading it. Only for paths, file-like objects are read as usual.
+        buffer_size : int, optional
+            only for file-like objects, by default 4 MB. The object is read in blocks of this size kept in a buffer
+            serving the many small reads done while parsing, 0 reads exactly what is requested every time.
+        cache_dir : str, Path-like object or ColumnCache, optional
+            by default None. A folder where the parsed columns and the metadata are stored the first time a file
+            is read, the next reads of the same file with the same options map them in memory from there instead
+            of parsing the file. Pass a ColumnCache to limit the size of the folder, by default 10 GB. Only for paths.
+        row_filter : str or narwhals expression, optional
+            by default None. Only the rows where it is true are returned. It is evaluated while parsing, every block
+            of rows, so that the rows failing it are never stored. A string is a comparison of columns with values or
+            other columns, as "region == 5 and age >= 18", see the README for what it can contain. A narwhals expression
+            can be any expression giving a boolean for every row, it is evaluated on all the columns read while a string
+            only needs the columns it uses, which are read even if they are not in usecols.
 
     Returns
     -------
@@ -372,6 +544,11 @@ def read_xport(
         extra_datetime_formats=extra_datetime_formats,
         extra_date_formats=extra_date_formats,
         extra_time_formats=extra_time_formats,
+        strings_as_category=strings_as_category,
+        io=io,
+        buffer_size=buffer_size,
+        cache_dir=cache_dir,
+        row_filter=row_filter,
     )
 
     metadata.file_format = parser_format
@@ -397,6 +574,12 @@ def read_dta(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    integers_with_missing: Literal["float", "nullable"] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PandasDataFrame, metadata_container]": ...
 @overload
 def read_dta(
@@ -416,6 +599,12 @@ def read_dta(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    integers_with_missing: Literal["float", "nullable"] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PolarsDataFrame, metadata_container]": ...
 @overload
 def read_dta(
@@ -435,7 +624,38 @@ def read_dta(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    integers_with_missing: Literal["float", "nullable"] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> tuple[DictOutput, metadata_container]: ...
+@overload
+def read_dta(
+    filename_path: FilePathorBuffer,
+    metadataonly: bool = ...,
+    dates_as_pandas_datetime: bool = ...,
+    apply_value_formats: bool = ...,
+    formats_as_category: bool = ...,
+    formats_as_ordered_category: bool = ...,
+    encoding: str | None = ...,
+    usecols: list[str] | None = ...,
+    user_missing: bool = ...,
+    disable_datetime_conversion: bool = ...,
+    row_limit: int = ...,
+    row_offset: int = ...,
+    output_format: Literal["arrow"] = "arrow",
+    extra_datetime_formats: list[str] | None = ...,
+    extra_date_formats: list[str] | None = ...,
+    extra_time_formats: list[str] | None = ...,
+    integers_with_missing: Literal["float", "nullable"] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
+) -> "tuple[ArrowTable, metadata_container]": ...
 def read_dta(
     filename_path: FilePathorBuffer,
     metadataonly: bool = False,
@@ -449,10 +669,16 @@ def read_dta(
     disable_datetime_conversion: bool = False,
     row_limit: int = 0,
     row_offset: int = 0,
-    output_format: Literal["pandas", "polars", "dict"] | None = None,
+    output_format: Literal["pandas", "polars", "dict", "arrow"] | None = None,
     extra_datetime_formats: list[str] | None = None,
     extra_date_formats: list[str] | None = None,
     extra_time_formats: list[str] | None = None,
+    integers_with_missing: Literal["float", "nullable"] | None = None,
+    strings_as_category: bool = False,
+    io: Literal["mmap"] | None = None,
+    buffer_size: int = 4 * 1024 * 1024,
+    cache_dir: "str | PathLike | ColumnCache | None" = None,
+    row_filter: "str | nw.Expr | None" = None,
 ) -> "tuple[DataFrame | DictOutput, metadata_container]":
     r"""
     Read a STATA dta file
@@ -460,7 +686,7 @@ def read_dta(
     Parameters
     ----------
         filename_path : str, bytes, Path-like object or file-like object
-            path to the file or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
+            path to the file, http(s) url or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
         metadataonly : bool, optional
             by default False. IF true, no data will be read but only metadata, so that you can get all elements in the
             metadata object. The data frame will be set with the correct column names but no data.
@@ -497,15 +723,40 @@ def read_dta(
         row_offset : int, optional
             start reading rows after this offset. By default 0, meaning start with the first row not skipping anything.
         output_format : str, optional
-            one of 'pandas' (default), 'polars' or 'dict'. If 'dict' a dictionary with numpy arrays as values will be returned, the
+            one of 'pandas' (default), 'polars', 'dict' or 'arrow'. If 'dict' a dictionary with numpy arrays as values will be returned, the
             user can then convert it to her preferred data format. Using dict is faster as the other types as the conversion to a
-            dataframe is avoided.
+            dataframe is avoided. If 'arrow' a pyarrow Table built directly from the parsed buffers will be returned.
         extra_datetime_formats: list of str, optional
             formats to be parsed as python datetime objects
         extra_date_formats: list of str, optional
             formats to be parsed as python date objects
         extra_time_formats: list of str, optional
             formats to be parsed as python time objects
+        integers_with_missing: str, optional
+            one of 'float' or 'nullable'. Determines the type of integer columns having missing values: 'float' gives
+            float64 columns with nan, 'nullable' gives pandas nullable Int64 or polars integer columns with nulls.
+            By default 'float' for pandas and 'nullable' for polars. Has no effect on dict output.
+        strings_as_category : bool, optional
+            by default False. If True string columns are stored as categories while parsing: each distinct value is kept
+            only once and the column is returned as pandas or polars Categorical (arrow dictionary for output_format
+            'arrow'). This saves memory and time for columns with few distinct values.
+        io : str, optional
+            by default None, the file is read with system calls. If 'mmap' the file is mapped in memory and read from
+            there, which avoids a system call for every read and shares the pages of the file between processes
+            reading it. Only for paths, file-like objects are read as usual.
+        buffer_size : int, optional
+            only for file-like objects, by default 4 MB. The object is read in blocks of this size kept in a buffer
+            serving the many small reads done while parsing, 0 reads exactly what is requested every time.
+        cache_dir : str, Path-like object or ColumnCache, optional
+            by default None. A folder where the parsed columns and the metadata are stored the first time a file
+            is read, the next reads of the same file with the same options map them in memory from there instead
+            of parsing the file. Pass a ColumnCache to limit the size of the folder, by default 10 GB. Only for paths.
+        row_filter : str or narwhals expression, optional
+            by default None. Only the rows where it is true are returned. It is evaluated while parsing, every block
+            of rows, so that the rows failing it are never stored. A string is a comparison of columns with values or
+            other columns, as "region == 5 and age >= 18", see the README for what it can contain. A narwhals expression
+            can be any expression giving a boolean for every row, it is evaluated on all the columns read while a string
+            only needs the columns it uses, which are read even if they are not in usecols.
 
     Returns
     -------
@@ -514,6 +765,8 @@ def read_dta(
         metadata :
             object with metadata. Look at the documentation for more information.
     """
+    # value labels are applied while parsing for dataframes
+    labels_in_parser = apply_value_formats and output_format in (None, "pandas", "polars")
     parser_format = "dta"
     data_frame, metadata = parser_entry_point(
         filename_path,
@@ -532,11 +785,18 @@ def read_dta(
         extra_datetime_formats=extra_datetime_formats,
         extra_date_formats=extra_date_formats,
         extra_time_formats=extra_time_formats,
+        integers_with_missing=integers_with_missing,
+        strings_as_category=strings_as_category,
+        apply_value_formats=labels_in_parser,
+        io=io,
+        buffer_size=buffer_size,
+        cache_dir=cache_dir,
+        row_filter=row_filter,
     )
 
     metadata.file_format = parser_format
 
-    if apply_value_formats:
+    if apply_value_formats and not labels_in_parser:
         data_frame = set_value_labels(
             data_frame,
             metadata,
@@ -565,6 +825,13 @@ def read_sav(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    use_index: bool = ...,
+    num_threads: int = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PandasDataFrame, metadata_container]": ...
 @overload
 def read_sav(
@@ -584,6 +851,13 @@ def read_sav(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    use_index: bool = ...,
+    num_threads: int = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PolarsDataFrame, metadata_container]": ...
 @overload
 def read_sav(
@@ -603,7 +877,40 @@ def read_sav(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    use_index: bool = ...,
+    num_threads: int = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> tuple[DictOutput, metadata_container]: ...
+@overload
+def read_sav(
+    filename_path: FilePathorBuffer,
+    metadataonly: bool = ...,
+    dates_as_pandas_datetime: bool = ...,
+    apply_value_formats: bool = ...,
+    formats_as_category: bool = ...,
+    formats_as_ordered_category: bool = ...,
+    encoding: str | None = ...,
+    usecols: list[str] | None = ...,
+    user_missing: bool = ...,
+    disable_datetime_conversion: bool = ...,
+    row_limit: int = ...,
+    row_offset: int = ...,
+    output_format: Literal["arrow"] = "arrow",
+    extra_datetime_formats: list[str] | None = ...,
+    extra_date_formats: list[str] | None = ...,
+    extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    use_index: bool = ...,
+    num_threads: int = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
+) -> "tuple[ArrowTable, metadata_container]": ...
 def read_sav(
     filename_path: FilePathorBuffer,
     metadataonly: bool = False,
@@ -617,10 +924,17 @@ def read_sav(
     disable_datetime_conversion: bool = False,
     row_limit: int = 0,
     row_offset: int = 0,
-    output_format: Literal["pandas", "polars", "dict"] | None = None,
+    output_format: Literal["pandas", "polars", "dict", "arrow"] | None = None,
     extra_datetime_formats: list[str] | None = None,
     extra_date_formats: list[str] | None = None,
     extra_time_formats: list[str] | None = None,
+    strings_as_category: bool = False,
+    use_index: bool = False,
+    num_threads: int = 1,
+    io: Literal["mmap"] | None = None,
+    buffer_size: int = 4 * 1024 * 1024,
+    cache_dir: "str | PathLike | ColumnCache | None" = None,
+    row_filter: "str | nw.Expr | None" = None,
 ) -> "tuple[DataFrame | DictOutput, metadata_container]":
     r"""
     Read a SPSS sav or zsav (compressed) files
@@ -628,7 +942,7 @@ def read_sav(
     Parameters
     ----------
         filename_path : str, bytes, Path-like object or file-like object
-            path to the file or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
+            path to the file, http(s) url or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
         metadataonly : bool, optional
             by default False. IF true, no data will be read but only metadata, so that you can get all elements in the
             metadata object. The data frame will be set with the correct column names but no data.
@@ -665,15 +979,44 @@ def read_sav(
         row_offset : int, optional
             start reading rows after this offset. By default 0, meaning start with the first row not skipping anything.
         output_format : str, optional
-            one of 'pandas' (default), 'polars' or 'dict'. If 'dict' a dictionary with numpy arrays as values will be returned, the
+            one of 'pandas' (default), 'polars', 'dict' or 'arrow'. If 'dict' a dictionary with numpy arrays as values will be returned, the
             user can then convert it to her preferred data format. Using dict is faster as the other types as the conversion to a
-            dataframe is avoided.
+            dataframe is avoided. If 'arrow' a pyarrow Table built directly from the parsed buffers will be returned.
         extra_datetime_formats: list of str, optional
             formats to be parsed as python datetime objects
         extra_date_formats: list of str, optional
             formats to be parsed as python date objects
         extra_time_formats: list of str, optional
             formats to be parsed as python time objects
+        strings_as_category : bool, optional
+            by default False. If True string columns are stored as categories while parsing: each distinct value is kept
+            only once and the column is returned as pandas or polars Categorical (arrow dictionary for output_format
+            'arrow'). This saves memory and time for columns with few distinct values.
+        use_index : bool, optional
+            by default False. If True the row index written by build_index next to the file is used to jump directly
+            to row_offset instead of decompressing all the rows before it. Only row compressed sav and zsav files
+            benefit from it, filename_path must be a path.
+        num_threads : int, optional
+            by default 1. For zsav files, if greater than 1 the next zlib blocks are inflated by this number of
+            threads while the rows of the current block are read. filename_path must be a path, for other files
+            it has no effect.
+        io : str, optional
+            by default None, the file is read with system calls. If 'mmap' the file is mapped in memory and read from
+            there, which avoids a system call for every read and shares the pages of the file between processes
+            reading it. Only for paths, file-like objects are read as usual.
+        buffer_size : int, optional
+            only for file-like objects, by default 4 MB. The object is read in blocks of this size kept in a buffer
+            serving the many small reads done while parsing, 0 reads exactly what is requested every time.
+        cache_dir : str, Path-like object or ColumnCache, optional
+            by default None. A folder where the parsed columns and the metadata are stored the first time a file
+            is read, the next reads of the same file with the same options map them in memory from there instead
+            of parsing the file. Pass a ColumnCache to limit the size of the folder, by default 10 GB. Only for paths.
+        row_filter : str or narwhals expression, optional
+            by default None. Only the rows where it is true are returned. It is evaluated while parsing, every block
+            of rows, so that the rows failing it are never stored. A string is a comparison of columns with values or
+            other columns, as "region == 5 and age >= 18", see the README for what it can contain. A narwhals expression
+            can be any expression giving a boolean for every row, it is evaluated on all the columns read while a string
+            only needs the columns it uses, which are read even if they are not in usecols.
 
     Returns
     -------
@@ -682,7 +1025,10 @@ def read_sav(
         metadata :
             object with metadata. Look at the documentation for more information.
     """
+    # value labels are applied while parsing for dataframes
+    labels_in_parser = apply_value_formats and output_format in (None, "pandas", "polars")
     parser_format = "sav/zsav"
+    row_checkpoints = _read_index(filename_path) if use_index else None
 
     data_frame, metadata = parser_entry_point(
         filename_path,
@@ -701,11 +1047,19 @@ def read_sav(
         extra_datetime_formats=extra_datetime_formats,
         extra_date_formats=extra_date_formats,
         extra_time_formats=extra_time_formats,
+        strings_as_category=strings_as_category,
+        apply_value_formats=labels_in_parser,
+        row_checkpoints=row_checkpoints,
+        num_threads=num_threads,
+        io=io,
+        buffer_size=buffer_size,
+        cache_dir=cache_dir,
+        row_filter=row_filter,
     )
 
     metadata.file_format = parser_format
 
-    if apply_value_formats:
+    if apply_value_formats and not labels_in_parser:
         data_frame = set_value_labels(
             data_frame,
             metadata,
@@ -732,6 +1086,11 @@ def read_por(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PandasDataFrame, metadata_container]": ...
 @overload
 def read_por(
@@ -749,6 +1108,11 @@ def read_por(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> "tuple[PolarsDataFrame, metadata_container]": ...
 @overload
 def read_por(
@@ -766,7 +1130,34 @@ def read_por(
     extra_datetime_formats: list[str] | None = ...,
     extra_date_formats: list[str] | None = ...,
     extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
 ) -> tuple[DictOutput, metadata_container]: ...
+@overload
+def read_por(
+    filename_path: FilePathorBuffer,
+    metadataonly: bool = ...,
+    dates_as_pandas_datetime: bool = ...,
+    apply_value_formats: bool = ...,
+    formats_as_category: bool = ...,
+    formats_as_ordered_category: bool = ...,
+    usecols: list[str] | None = ...,
+    disable_datetime_conversion: bool = ...,
+    row_limit: int = ...,
+    row_offset: int = ...,
+    output_format: Literal["arrow"] = "arrow",
+    extra_datetime_formats: list[str] | None = ...,
+    extra_date_formats: list[str] | None = ...,
+    extra_time_formats: list[str] | None = ...,
+    strings_as_category: bool = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+    cache_dir: "str | PathLike | ColumnCache | None" = ...,
+    row_filter: "str | nw.Expr | None" = ...,
+) -> "tuple[ArrowTable, metadata_container]": ...
 def read_por(
     filename_path: FilePathorBuffer,
     metadataonly: bool = False,
@@ -778,10 +1169,15 @@ def read_por(
     disable_datetime_conversion: bool = False,
     row_limit: int = 0,
     row_offset: int = 0,
-    output_format: Literal["pandas", "polars", "dict"] | None = None,
+    output_format: Literal["pandas", "polars", "dict", "arrow"] | None = None,
     extra_datetime_formats: list[str] | None = None,
     extra_date_formats: list[str] | None = None,
     extra_time_formats: list[str] | None = None,
+    strings_as_category: bool = False,
+    io: Literal["mmap"] | None = None,
+    buffer_size: int = 4 * 1024 * 1024,
+    cache_dir: "str | PathLike | ColumnCache | None" = None,
+    row_filter: "str | nw.Expr | None" = None,
 ) -> "tuple[DataFrame | DictOutput, metadata_container]":
     r"""
     Read a SPSS por file. Files are assumed to be UTF-8 encoded, the encoding cannot be set to other.
@@ -789,7 +1185,7 @@ def read_por(
     Parameters
     ----------
         filename_path : str, bytes, Path-like object or file-like object
-            path to the file or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
+            path to the file, http(s) url or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
         metadataonly : bool, optional
             by default False. IF true, no data will be read but only metadata, so that you can get all elements in the
             metadata object. The data frame will be set with the correct column names but no data.
@@ -820,15 +1216,36 @@ def read_por(
         row_offset : int, optional
             start reading rows after this offset. By default 0, meaning start with the first row not skipping anything.
         output_format : str, optional
-            one of 'pandas' (default), 'polars' or 'dict'. If 'dict' a dictionary with numpy arrays as values will be returned, the
+            one of 'pandas' (default), 'polars', 'dict' or 'arrow'. If 'dict' a dictionary with numpy arrays as values will be returned, the
             user can then convert it to her preferred data format. Using dict is faster as the other types as the conversion to a
-            dataframe is avoided.
+            dataframe is avoided. If 'arrow' a pyarrow Table built directly from the parsed buffers will be returned.
         extra_datetime_formats: list of str, optional
             formats to be parsed as python datetime objects
         extra_date_formats: list of str, optional
             formats to be parsed as python date objects
         extra_time_formats: list of str, optional
             formats to be parsed as python time objects
+        strings_as_category : bool, optional
+            by default False. If True string columns are stored as categories while parsing: each distinct value is kept
+            only once and the column is returned as pandas or polars Categorical (arrow dictionary for output_format
+            'arrow'). This saves memory and time for columns with few distinct values.
+        io : str, optional
+            by default None, the file is read with system calls. If 'mmap' the file is mapped in memory and read from
+            there, which avoids a system call for every read and shares the pages of the file between processes
+            reading it. Only for paths, file-like objects are read as usual.
+        buffer_size : int, optional
+            only for file-like objects, by default 4 MB. The object is read in blocks of this size kept in a buffer
+            serving the many small reads done while parsing, 0 reads exactly what is requested every time.
+        cache_dir : str, Path-like object or ColumnCache, optional
+            by default None. A folder where the parsed columns and the metadata are stored the first time a file
+            is read, the next reads of the same file with the same options map them in memory from there instead
+            of parsing the file. Pass a ColumnCache to limit the size of the folder, by default 10 GB. Only for paths.
+        row_filter : str or narwhals expression, optional
+            by default None. Only the rows where it is true are returned. It is evaluated while parsing, every block
+            of rows, so that the rows failing it are never stored. A string is a comparison of columns with values or
+            other columns, as "region == 5 and age >= 18", see the README for what it can contain. A narwhals expression
+            can be any expression giving a boolean for every row, it is evaluated on all the columns read while a string
+            only needs the columns it uses, which are read even if they are not in usecols.
 
     Returns
     -------
@@ -837,6 +1254,8 @@ def read_por(
         metadata :
             object with metadata. Look at the documentation for more information.
     """
+    # value labels are applied while parsing for dataframes
+    labels_in_parser = apply_value_formats and output_format in (None, "pandas", "polars")
     parser_format = "por"
     data_frame, metadata = parser_entry_point(
         filename_path,
@@ -853,12 +1272,23 @@ def read_por(
         extra_datetime_formats=extra_datetime_formats,
         extra_date_formats=extra_date_formats,
         extra_time_formats=extra_time_formats,
+        strings_as_category=strings_as_category,
+        apply_value_formats=labels_in_parser,
+        io=io,
+        buffer_size=buffer_size,
+        cache_dir=cache_dir,
+        row_filter=row_filter,
     )
 
     metadata.file_format = parser_format
 
-    if apply_value_formats:
-        data_frame = set_value_labels(data_frame, metadata, formats_as_category=formats_as_category)
+    if apply_value_formats and not labels_in_parser:
+        data_frame = set_value_labels(
+            data_frame,
+            metadata,
+            formats_as_category=formats_as_category,
+            formats_as_ordered_category=formats_as_ordered_category,
+        )
 
     return data_frame, metadata
 
@@ -868,23 +1298,39 @@ def read_sas7bcat(
     filename_path: FilePathorBuffer,
     encoding: str | None = ...,
     output_format: Literal["pandas"] | None = ...,
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
 ) -> "tuple[PandasDataFrame, metadata_container]": ...
 @overload
 def read_sas7bcat(
     filename_path: FilePathorBuffer,
     encoding: str | None = ...,
     output_format: Literal["polars"] = "polars",
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
 ) -> "tuple[PolarsDataFrame, metadata_container]": ...
 @overload
 def read_sas7bcat(
     filename_path: FilePathorBuffer,
     encoding: str | None = ...,
     output_format: Literal["dict"] = "dict",
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
 ) -> tuple[DictOutput, metadata_container]: ...
+@overload
+def read_sas7bcat(
+    filename_path: FilePathorBuffer,
+    encoding: str | None = ...,
+    output_format: Literal["arrow"] = "arrow",
+    io: Literal["mmap"] | None = ...,
+    buffer_size: int = ...,
+) -> "tuple[ArrowTable, metadata_container]": ...
 def read_sas7bcat(
     filename_path: FilePathorBuffer,
     encoding: str | None = None,
-    output_format: Literal["pandas", "polars", "dict"] | None = None,
+    output_format: Literal["pandas", "polars", "dict", "arrow"] | None = None,
+    io: Literal["mmap"] | None = None,
+    buffer_size: int = 4 * 1024 * 1024,
 ) -> "tuple[DataFrame | DictOutput, metadata_container]":
     r"""
     Read a SAS sas7bcat file. The returning dataframe will be empty. The metadata object will contain a dictionary
@@ -898,14 +1344,21 @@ def read_sas7bcat(
     Parameters
     ----------
         filename_path : str, bytes, Path-like object or file-like object
-            path to the file or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
+            path to the file, http(s) url or file-like object. In python 2.7 the string is assumed to be utf-8 encoded.
         encoding : str, optional
             Defaults to None. If set, the system will use the defined encoding instead of guessing it. It has to be an
             iconv-compatible name
         output_format : str, optional
-            one of 'pandas' (default), 'polars' or 'dict'. If 'dict' a dictionary with numpy arrays as values will be returned.
+            one of 'pandas' (default), 'polars', 'dict' or 'arrow'. If 'dict' a dictionary with numpy arrays as values will be returned.
             Notice that for this function the resulting object is always empty, this is done for consistency with other functions
             but has no impact on performance.
+        io : str, optional
+            by default None, the file is read with system calls. If 'mmap' the file is mapped in memory and read from
+            there, which avoids a system call for every read and shares the pages of the file between processes
+            reading it. Only for paths, file-like objects are read as usual.
+        buffer_size : int, optional
+            only for file-like objects, by default 4 MB. The object is read in blocks of this size kept in a buffer
+            serving the many small reads done while parsing, 0 reads exactly what is requested every time.
 
     Returns
     -------
@@ -921,6 +1374,8 @@ def read_sas7bcat(
         parser_format=parser_format,
         encoding=encoding,
         output_format=output_format,
+        io=io,
+        buffer_size=buffer_size,
     )
 
     metadata.file_format = parser_format
@@ -931,6 +1386,87 @@ def read_sas7bcat(
 # convenience functions to read in chunks
 
 
+def build_index(filename_path: "str | bytes | PathLike", row_interval: int = 10000) -> str:
+    r"""
+    Builds a row index for a SPSS sav or SAS sas7bdat file and writes it next to the file, with the extension
+    .rowindex appended. The type of file is taken from the extension of filename_path.
+
+    Rows in row compressed sav files have a variable length, so reading from a row_offset normally means decompressing
+    all the rows before it. The index stores every row_interval rows the position of the row in the file and the state
+    of the decompression there, read_sav with use_index=True resumes from the closest position before row_offset.
+    For zsav files the position is in the uncompressed data and only the zlib block holding it is inflated. For
+    sas7bdat files the index stores the page where the rows start, read_sas7bdat with use_index=True jumps to it
+    instead of walking through the pages before. This makes read_file_in_chunks and read_file_multiprocessing jump
+    directly to their rows. The index has no entries for uncompressed sav files, which are read directly from any
+    row already.
+
+    The index records the size and modification time of the file, if the file changes it has to be built again.
+
+    Parameters
+    ----------
+        filename_path : str, bytes or Path-like object
+            path to the sav, zsav or sas7bdat file.
+        row_interval : int, optional
+            number of rows between positions in the index, by default 10000.
+
+    Returns
+    -------
+        index_path : str
+            path to the index file.
+    """
+    if row_interval < 1:
+        raise PyreadstatError("row_interval must be a positive integer")
+    extension = os.path.splitext(os.fsdecode(filename_path))[1].lower()
+    if extension in (".sav", ".zsav"):
+        parser_format = "sav/zsav"
+    elif extension == ".sas7bdat":
+        parser_format = "sas7bdat"
+    else:
+        raise PyreadstatError("build_index supports sav, zsav and sas7bdat files, got {0}".format(filename_path))
+    index_path = _index_path(filename_path)
+    stat = os.stat(os.path.expanduser(filename_path))
+    row_checkpoints = build_row_index(filename_path, parser_format, row_interval)
+    with open(index_path, "wb") as fh:
+        fh.write(_INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, row_interval, len(row_checkpoints)))
+        for checkpoint in row_checkpoints:
+            fh.write(_INDEX_ENTRY.pack(*checkpoint))
+    return index_path
+
+
+# layout of the row index files: magic, file size, file modification time, row interval and number of entries
+# followed by the entries: row, file offset, pending bytecode commands and how many of them are left (sav only)
+_INDEX_MAGIC = b"PYRSIDX1"
+_INDEX_HEADER = struct.Struct("<8sqqqq")
+_INDEX_ENTRY = struct.Struct("<qq8sq")
+
+
+def _index_path(filename_path: "str | bytes | PathLike") -> str:
+    return os.fsdecode(os.path.expanduser(filename_path)) + ".rowindex"
+
+
+def _read_index(filename_path: FilePathorBuffer) -> list[tuple[int, int, bytes, int]]:
+    """
+    Reads the row index of a file written by build_index and checks it belongs to the current version of the file
+    """
+    if hasattr(filename_path, "read"):
+        raise PyreadstatError("use_index needs a file path, file-like objects are not supported")
+    index_path = _index_path(filename_path)
+    if not os.path.isfile(index_path):
+        raise PyreadstatError("Row index {0} does not exist, build it with build_index".format(index_path))
+    stat = os.stat(os.path.expanduser(filename_path))
+    with open(index_path, "rb") as fh:
+        header = fh.read(_INDEX_HEADER.size)
+        if len(header) != _INDEX_HEADER.size or header[:8] != _INDEX_MAGIC:
+            raise PyreadstatError("{0} is not a row index".format(index_path))
+        _, file_size, file_mtime, _, n_entries = _INDEX_HEADER.unpack(header)
+        if file_size != stat.st_size or file_mtime != stat.st_mtime_ns:
+            raise PyreadstatError("Row index {0} is out of date, build it again with build_index".format(index_path))
+        entries = fh.read(_INDEX_ENTRY.size * n_entries)
+    if len(entries) != _INDEX_ENTRY.size * n_entries:
+        raise PyreadstatError("Row index {0} is truncated".format(index_path))
+    return list(_INDEX_ENTRY.iter_unpack(entries))
+
+
 @overload
 def read_file_in_chunks(
     read_function: PyreadstatReadFunction,
@@ -942,6 +1478,7 @@ def read_file_in_chunks(
     num_processes: int = ...,
     num_rows: int | None = ...,
     *,
+    executor: ReadExecutor | None = ...,
     output_format: Literal["pandas"] | None = ...,
     **kwargs: Any,
 ) -> "Iterator[tuple[PandasDataFrame, metadata_container]]": ...
@@ -956,6 +1493,7 @@ def read_file_in_chunks(
     num_processes: int = ...,
     num_rows: int | None = ...,
     *,
+    executor: ReadExecutor | None = ...,
     output_format: Literal["polars"] = "polars",
     **kwargs: Any,
 ) -> "Iterator[tuple[PolarsDataFrame, metadata_container]]": ...
@@ -970,9 +1508,25 @@ def read_file_in_chunks(
     num_processes: int = ...,
     num_rows: int | None = ...,
     *,
+    executor: ReadExecutor | None = ...,
     output_format: Literal["dict"] = "dict",
     **kwargs: Any,
 ) -> Iterator[tuple[DictOutput, metadata_container]]: ...
+@overload
+def read_file_in_chunks(
+    read_function: PyreadstatReadFunction,
+    file_path: FilePathLike,
+    chunksize: int = ...,
+    offset: int = ...,
+    limit: int = ...,
+    multiprocess: bool = ...,
+    num_processes: int = ...,
+    num_rows: int | None = ...,
+    *,
+    executor: ReadExecutor | None = ...,
+    output_format: Literal["arrow"] = "arrow",
+    **kwargs: Any,
+) -> "Iterator[tuple[ArrowTable, metadata_container]]": ...
 def read_file_in_chunks(
     read_function: PyreadstatReadFunction,
     file_path: FilePathLike,
@@ -982,6 +1536,8 @@ def read_file_in_chunks(
     multiprocess: bool = False,
     num_processes: int = 4,
     num_rows: int | None = None,
+    *,
+    executor: ReadExecutor | None = None,
     **kwargs: Any,
 ) -> "Iterator[tuple[DataFrame | DictOutput, metadata_container]]":
     """
@@ -1013,6 +1569,9 @@ def read_file_in_chunks(
             some defective xport and sav files. The user must obtain this value by reading the file without multiprocessing first or any other means. A number
             larger than the actual number of rows will work as well. Discarded if the number of rows can be obtained from the metadata or not using
             multiprocessing.
+        executor: ReadExecutor, optional
+            pool of workers used if multiprocess is true, see read_file_multiprocessing. By default a pool owned by
+            pyreadstat is used, which is started once and reused for all the chunks.
         kwargs : dict, optional
             any other keyword argument to pass to the read_function. row_limit and row_offset will be discarded if present.
 
@@ -1040,6 +1599,13 @@ def read_file_in_chunks(
     if "num_processes" in kwargs:
         _ = kwargs.pop("num_processes")
 
+    row_filter = kwargs.get("row_filter")
+
+    if is_url(file_path) and not multiprocess:
+        # one remote file for all the chunks, so that the fetched blocks are kept. With multiprocess the url is
+        # given to the workers, which fetch it on their own.
+        file_path = HttpRangeFile(file_path)
+
     _, meta = read_function(file_path, metadataonly=True)
     numrows = meta.number_rows
     if numrows:
@@ -1050,25 +1616,39 @@ def read_file_in_chunks(
     else:
         if limit:
             limit = offset + limit
-    df = [0]
-    while len(df):
-        if limit and (offset >= limit):
-            break
-        if multiprocess:
-            df, meta = read_file_multiprocessing(
-                read_function,
-                file_path,
-                num_processes=num_processes,
-                row_offset=offset,
-                row_limit=chunksize,
-                num_rows=num_rows,
-                **kwargs,
-            )
-        else:
-            df, meta = read_function(file_path, row_offset=offset, row_limit=chunksize, **kwargs)
-        if len(df):
-            yield df, meta
+        if row_filter is not None and multiprocess and num_rows:
+            # filtered chunks can be empty before the end of the file, the end is given by num_rows
+            limit = min(limit, num_rows) if limit else num_rows
+    # without multiprocessing the file is parsed only once, each chunk continues where the previous one stopped
+    stream = RowChunkStream()
+    try:
+        rows = 1
+        while rows:
+            if limit and (offset >= limit):
+                break
+            if multiprocess:
+                df, meta = read_file_multiprocessing(
+                    read_function,
+                    file_path,
+                    num_processes=num_processes,
+                    row_offset=offset,
+                    row_limit=chunksize,
+                    num_rows=num_rows,
+                    executor=executor,
+                    **kwargs,
+                )
+                rows = chunksize if row_filter is not None and limit else len(df)
+            else:
+                stream.rows_read = None
+                with stream.active():
+                    df, meta = read_function(file_path, row_offset=offset, row_limit=chunksize, **kwargs)
+                # the rows parsed, that the row filter may have dropped
+                rows = stream.rows_read if stream.rows_read is not None else len(df)
+            if len(df):
+                yield df, meta
             offset += chunksize
+    finally:
+        stream.close()
 
 
 @overload
@@ -1078,6 +1658,8 @@ def read_file_multiprocessing(
     num_processes: int | None = ...,
     num_rows: int | None = ...,
     *,
+    backend: Literal["processes", "threads"] | None = ...,
+    executor: ReadExecutor | None = ...,
     output_format: Literal["pandas"] | None = ...,
     **kwargs: Any,
 ) -> "tuple[PandasDataFrame, metadata_container]": ...
@@ -1088,6 +1670,8 @@ def read_file_multiprocessing(
     num_processes: int | None = ...,
     num_rows: int | None = ...,
     *,
+    backend: Literal["processes", "threads"] | None = ...,
+    executor: ReadExecutor | None = ...,
     output_format: Literal["polars"] = "polars",
     **kwargs: Any,
 ) -> "tuple[PolarsDataFrame, metadata_container]": ...
@@ -1098,18 +1682,35 @@ def read_file_multiprocessing(
     num_processes: int | None = ...,
     num_rows: int | None = ...,
     *,
+    backend: Literal["processes", "threads"] | None = ...,
+    executor: ReadExecutor | None = ...,
     output_format: Literal["dict"] = "dict",
     **kwargs: Any,
 ) -> tuple[DictOutput, metadata_container]: ...
+@overload
+def read_file_multiprocessing(
+    read_function: PyreadstatReadFunction,
+    file_path: FilePathLike,
+    num_processes: int | None = ...,
+    num_rows: int | None = ...,
+    *,
+    backend: Literal["processes", "threads"] | None = ...,
+    executor: ReadExecutor | None = ...,
+    output_format: Literal["arrow"] = "arrow",
+    **kwargs: Any,
+) -> "tuple[ArrowTable, metadata_container]": ...
 def read_file_multiprocessing(
     read_function: PyreadstatReadFunction,
     file_path: FilePathLike,
     num_processes: int | None = None,
     num_rows: int | None = None,
+    *,
+    backend: Literal["processes", "threads"] | None = None,
+    executor: ReadExecutor | None = None,
     **kwargs: Any,
 ) -> "tuple[DataFrame | DictOutput, metadata_container]":
     """
-    Reads a file in parallel using multiprocessing.
+    Reads a file in parallel using multiprocessing or threads.
     For Xport, Por and some defective sav files where the number of rows in the dataset canot be obtained from the metadata,
     the parameter num_rows must be set to a number equal or larger than the number of rows in the dataset. That information must
     be obtained by the user before running this function.
@@ -1121,11 +1722,25 @@ def read_file_multiprocessing(
         file_path : str, bytes or Path-like object
             path to the file to be read
         num_processes : integer, optional
-            number of processes to spawn, by default the min 4 and the max cores on the computer
+            number of processes (or threads) to spawn, by default the min 4 and the max cores on the computer
         num_rows: integer, optional
             number of rows in the dataset. Obligatory for files where the number of rows cannot be obtained from the medatata, such as por and
             some defective xport and sav files. The user must obtain this value by reading the file without multiprocessing first or any other means. A number
             larger than the actual number of rows will work as well. Discarded if the number of rows can be obtained from the metadata.
+        backend : str, optional
+            'processes' (default) or 'threads'. With 'processes' each chunk of rows is read in a process of a pool,
+            numeric columns are written directly into the final arrays, which live in memory shared with the
+            workers, and only string and object columns are sent back. With 'threads' the chunks are read in threads
+            of the current process, writing numeric columns directly into the final arrays as well, so that no
+            pickling at all is needed. 'threads' needs a file path, file-like objects are not supported; with
+            'processes' the chunks of a file-like object are read as data frames and concatenated. The chunks of
+            a http(s) url are read as data frames with both backends, every worker fetching the file with its
+            own HttpRangeFile.
+            By default the backend of executor if given, otherwise 'processes'.
+        executor : ReadExecutor, optional
+            pool of workers reading the chunks, reused across calls. If not given a pool owned by pyreadstat is used,
+            one per backend. It is started on first use, kept for the next calls with the same number of processes,
+            replaced by a call with another number and shut down at exit. num_processes defaults to the number of workers of the executor.
         kwargs : dict, optional
             any other keyword argument to pass to the read_function.
 
@@ -1140,6 +1755,18 @@ def read_file_multiprocessing(
     if read_function in (read_sas7bcat,):
         raise Exception("read_sas7bcat is not supported")
 
+    if executor is not None:
+        if backend is not None and backend != executor.backend:
+            raise Exception("backend '{0}' does not match the backend of the executor '{1}'".format(backend, executor.backend))
+        backend = executor.backend
+        if not num_processes:
+            num_processes = executor.max_workers
+    elif backend is None:
+        backend = "processes"
+
+    if backend not in ("processes", "threads"):
+        raise Exception("backend must be either 'processes' or 'threads', '{0}' was given".format(backend))
+
     if read_function == read_por and num_rows is None:
         raise Exception(
             "num_rows must be specified for read_por to be a number equal or larger than the number of rows in the dataset."
@@ -1173,14 +1800,22 @@ def read_file_multiprocessing(
         prev_offset = offset
         prev_div = div
         offsets.append((offset, div))
-    jobs = [(read_function, file_path, offset, chunksize, kwargs) for offset, chunksize in offsets]
-    pool = mp.Pool(processes=num_processes)
-    try:
-        chunks = pool.map(worker, jobs)
-    except:
-        raise
-    finally:
-        pool.close()
+    row_ranges = [(offset, chunksize) for offset, chunksize in offsets if chunksize > 0]
+    if not row_ranges:
+        return read_function(file_path, row_offset=row_offset, **kwargs)
+    if executor is None:
+        executor_context = default_executor(backend, num_processes)
+    else:
+        executor_context = contextlib.nullcontext(executor)
+    with executor_context as executor:
+        pool = executor._get_executor()
+        if (backend == "threads" or not hasattr(file_path, "read")) and not is_url(file_path):
+            # the workers write to memory shared with this process, no data frames are sent back
+            with parallel_row_ranges(row_ranges, pool):
+                return read_function(file_path, **kwargs)
+        # every worker reading a url fetches it with its own HttpRangeFile
+        jobs = [(read_function, file_path, offset, chunksize, meta, kwargs) for offset, chunksize in offsets]
+        chunks = list(pool.map(worker, jobs))
     output_format = kwargs.get("output_format")
     if output_format == "dict":
         keys = chunks[0].keys()
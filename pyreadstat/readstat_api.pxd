@@ -40,7 +40,7 @@ cdef extern from "<stdint.h>" nogil:
 
 
 
-cdef extern from "readstat.h":
+cdef extern from "readstat.h" nogil:
 
     ctypedef enum:
         READSTAT_HANDLER_OK,
@@ -204,6 +204,26 @@ cdef extern from "readstat.h":
 
     cdef readstat_error_t readstat_set_row_limit(readstat_parser_t *parser, long row_limit);
     cdef readstat_error_t readstat_set_row_offset(readstat_parser_t *parser, long row_offset);
+
+    ctypedef struct readstat_row_checkpoint_t:
+        long row
+        readstat_off_t offset
+        unsigned char commands[8]
+        int commands_left
+
+    ctypedef int (*readstat_checkpoint_handler)(const readstat_row_checkpoint_t *checkpoint, void *ctx);
+    cdef readstat_error_t readstat_set_checkpoint_handler(readstat_parser_t *parser,
+        readstat_checkpoint_handler checkpoint_handler, long interval);
+    cdef readstat_error_t readstat_set_row_checkpoint(readstat_parser_t *parser, const readstat_row_checkpoint_t *checkpoint);
+
+    ctypedef struct readstat_block_t:
+        readstat_off_t compressed_offset
+        size_t compressed_size
+        size_t uncompressed_size
+
+    ctypedef int (*readstat_inflate_handler)(int block_index, const readstat_block_t *blocks, int n_blocks,
+        unsigned char *output, size_t output_len, void *ctx);
+    cdef readstat_error_t readstat_set_inflate_handler(readstat_parser_t *parser, readstat_inflate_handler inflate_handler);
     
     cdef readstat_error_t readstat_parse_dta(readstat_parser_t *parser, const char *path, void *user_ctx);
     cdef readstat_error_t readstat_parse_sav(readstat_parser_t *parser, const char *path, void *user_ctx);
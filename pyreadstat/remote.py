@@ -0,0 +1,232 @@
+# #############################################################################
+# Copyright 2018 Hoffmann-La Roche
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# #############################################################################
+
+"""
+Reading files over http(s) with range requests
+"""
+
+from collections import OrderedDict
+import io
+import re
+import urllib.error
+import urllib.request
+
+_content_range = re.compile(r"bytes\s+(?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+
+def is_url(filename_path: object) -> bool:
+    """
+    True if filename_path is a http or https url
+    """
+    return isinstance(filename_path, str) and filename_path.lower().startswith(("http://", "https://"))
+
+
+class HttpRangeFile(io.RawIOBase):
+    """
+    A read only file-like object for a file on a http(s) server, every read fetches only the bytes needed with
+    range requests. The file is fetched in aligned blocks kept in a least recently used cache. Missing blocks
+    next to each other are fetched in one request, and when the reads go forward (or backward, as sas7bdat files
+    are scanned for metadata pages at the end) through the file the requests grow up to max_request_size, so that
+    reading a whole file does not need one request per block. Servers not supporting
+    range requests send the whole file in the first request, it is kept in memory.
+
+    Read functions receiving a http or https url as path read it with this class, create it yourself to
+    change the parameters.
+
+    Parameters
+    ----------
+        url : str
+            url of the file
+        block_size : int, optional
+            size of the blocks fetched and cached, by default 16 KB
+        cache_size : int, optional
+            maximum number of bytes cached, by default 16 MB
+        max_request_size : int, optional
+            maximum number of bytes fetched in one request when reading forward, by default 4 MB
+        headers : dict, optional
+            extra headers sent with every request, for example for authentication
+        timeout : float, optional
+            timeout of the requests in seconds, by default 30
+    """
+
+    def __init__(
+        self,
+        url: str,
+        block_size: int = 16 * 1024,
+        cache_size: int = 16 * 1024 * 1024,
+        max_request_size: int = 4 * 1024 * 1024,
+        headers: dict[str, str] | None = None,
+        timeout: float = 30,
+    ) -> None:
+        super().__init__()
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        self.url = url
+        self.block_size = block_size
+        self.cache_blocks = max(cache_size // block_size, 1)
+        self.max_request_blocks = max(max_request_size // block_size, 1)
+        self.headers = dict(headers) if headers else dict()
+        self.timeout = timeout
+        self.size: int | None = None
+        self.requests = 0
+        self.bytes_fetched = 0
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._whole: bytes | None = None
+        self._pos = 0
+        # first and last blocks of the last request and number of blocks of the next one if it continues it
+        self._first_block = -1
+        self._last_block = -1
+        self._request_blocks = 1
+        # the first block is always needed, fetching it gives the size of the file
+        self._fetch(0, 0)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError("invalid whence ({0})".format(whence))
+        if pos < 0:
+            raise ValueError("negative seek position {0}".format(pos))
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        end = min(self._pos + len(view), self.size)
+        if end <= self._pos:
+            return 0
+        if self._whole is not None:
+            view[:end - self._pos] = self._whole[self._pos:end]
+            read = end - self._pos
+            self._pos = end
+            return read
+        first = self._pos // self.block_size
+        last = (end - 1) // self.block_size
+        blocks = self._get_blocks(first, last)
+        read = 0
+        for index in range(first, last + 1):
+            block = blocks[index]
+            start = self._pos - index * self.block_size
+            chunk = min(len(block) - start, end - self._pos)
+            view[read:read + chunk] = block[start:start + chunk]
+            read += chunk
+            self._pos += chunk
+        return read
+
+    def _get_blocks(self, first: int, last: int) -> dict[int, bytes]:
+        """
+        Returns the blocks from first to last, fetching the missing ones with as few requests as possible
+        """
+        blocks = dict()
+        index = first
+        while index <= last:
+            block = self._blocks.get(index)
+            if block is not None:
+                self._blocks.move_to_end(index)
+                blocks[index] = block
+                index += 1
+                continue
+            run_start = run_end = index
+            while run_end < last and (run_end + 1) not in self._blocks:
+                run_end += 1
+            if run_start == self._last_block + 1:
+                # reading forward: fetch ahead of what was asked
+                self._request_blocks = min(self._request_blocks * 2, self.max_request_blocks)
+                run_end = max(run_end, run_start + self._request_blocks - 1)
+            elif run_end == self._first_block - 1:
+                # reading backward: fetch behind
+                self._request_blocks = min(self._request_blocks * 2, self.max_request_blocks)
+                run_start = max(min(run_start, run_end - self._request_blocks + 1), 0)
+            else:
+                self._request_blocks = run_end - run_start + 1
+            run_end = min(run_end, (self.size - 1) // self.block_size)
+            blocks.update(self._fetch(run_start, run_end))
+            index = run_end + 1
+        return {index: blocks[index] for index in range(first, last + 1)}
+
+    def _fetch(self, first: int, last: int) -> dict[int, bytes]:
+        """
+        Fetches the blocks from first to last in one request and puts them in the cache. If the server sends less
+        than asked, the rest is requested again.
+        """
+        start = first * self.block_size
+        stop = (last + 1) * self.block_size - 1
+        if self.size is not None:
+            stop = min(stop, self.size - 1)
+        parts = list()
+        received = 0
+        while start + received <= stop:
+            headers = dict(self.headers)
+            headers["Range"] = "bytes={0}-{1}".format(start + received, stop)
+            request = urllib.request.Request(self.url, headers=headers)
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    part = response.read()
+                    content_range = response.headers.get("Content-Range")
+                    status = response.status
+            except urllib.error.HTTPError as err:
+                # range not satisfiable: the file is empty
+                if err.code != 416 or start + received != 0:
+                    raise
+                self.size = 0
+                return dict()
+            self.requests += 1
+            self.bytes_fetched += len(part)
+            if status != 206:
+                # the server does not support ranges and sent the whole file
+                self._whole = part
+                self.size = len(part)
+                self._blocks.clear()
+                return {index: part[index * self.block_size:(index + 1) * self.block_size]
+                        for index in range(first, last + 1)}
+            match = _content_range.match(content_range or "")
+            if match is None or match.group(3) == "*":
+                raise OSError("the server did not send the size of {0} in Content-Range".format(self.url))
+            if not part or match.group(1) is None or int(match.group(1)) != start + received:
+                raise OSError("the server sent {0} bytes ({1}) for the bytes {2}-{3} of {4}".format(
+                    len(part), content_range, start + received, stop, self.url))
+            self.size = int(match.group(3))
+            stop = min(stop, self.size - 1)
+            parts.append(part)
+            received += len(part)
+        data = b"".join(parts)
+        self._first_block = first
+        self._last_block = last
+        blocks = dict()
+        for index in range(first, last + 1):
+            offset = index * self.block_size - start
+            block = data[offset:offset + self.block_size]
+            if not block:
+                break
+            blocks[index] = block
+            self._blocks[index] = block
+            self._blocks.move_to_end(index)
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return blocks
@@ -18,16 +18,143 @@
 Functions to work with multiprocessing
 """
 
+import atexit
+from collections.abc import Iterator
+import contextlib
+import contextvars
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing as mp
 from os import PathLike
-from typing import TYPE_CHECKING, Any, TypeAlias
+import threading
+from typing import TYPE_CHECKING, Any, Literal, TypeAlias
+
+from ._readstat_parser import known_metadata
+from .pyclasses import metadata_container
 
 if TYPE_CHECKING:
     from .pyreadstat import PyreadstatReadFunction, DataFrame, DictOutput
 
-Input: TypeAlias = "tuple[PyreadstatReadFunction, str | bytes | PathLike, int, int, dict[str, Any]]"
+Input: TypeAlias = "tuple[PyreadstatReadFunction, str | bytes | PathLike, int, int, metadata_container, dict[str, Any]]"
 
 
-def worker(inpt: Input) -> "DataFrame | DictOutput":
-    read_function, path, row_offset, row_limit, kwargs = inpt
-    df, meta = read_function(path, row_offset=row_offset, row_limit=row_limit, **kwargs)
+def _read_row_range(read_function: "PyreadstatReadFunction", path: "str | bytes | PathLike", row_offset: int,
+                    row_limit: int, metadata: metadata_container, kwargs: dict[str, Any]) -> "DataFrame | DictOutput":
+    # the value labels and notes come from the metadata already read by the parent process
+    with known_metadata(metadata):
+        df, meta = read_function(path, row_offset=row_offset, row_limit=row_limit, **kwargs)
     return df
+
+
+def worker(inpt: Input) -> "DataFrame | DictOutput":
+    # the process may have been forked inside parallel_row_ranges, read in an empty context
+    return contextvars.Context().run(_read_row_range, *inpt)
+
+
+class ReadExecutor:
+    """
+    A pool of worker processes (or threads) reused by the parallel reads, so that the workers are started and
+    import their modules only once. Pass it as executor to read_file_multiprocessing or read_file_in_chunks,
+    or use it as a context manager to shut it down at the end. The pool is started on first use.
+
+    Parameters
+    ----------
+        max_workers : integer, optional
+            number of workers, by default the min of 4 and the number of cores on the computer. It is also
+            the number of chunks a file is split in by read_file_multiprocessing.
+        backend : str, optional
+            'processes' (default) or 'threads'
+        start_method : str, optional
+            start method of the worker processes: 'fork', 'spawn' or 'forkserver'. By default the
+            multiprocessing default of the platform.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        backend: Literal["processes", "threads"] = "processes",
+        start_method: str | None = None,
+    ) -> None:
+        if backend not in ("processes", "threads"):
+            raise Exception("backend must be either 'processes' or 'threads', '{0}' was given".format(backend))
+        if start_method is not None and backend == "threads":
+            raise Exception("start_method can only be set for backend 'processes'")
+        if not max_workers:
+            max_workers = min(mp.cpu_count(), 4)
+        self.max_workers = max_workers
+        self.backend = backend
+        self.start_method = start_method
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        """
+        Returns the underlying concurrent.futures executor, starting it if needed
+        """
+        with self._lock:
+            if self._executor is None:
+                if self.backend == "threads":
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pyreadstat")
+                else:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                         mp_context=mp.get_context(self.start_method))
+            return self._executor
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the workers, they are started again if the executor is used afterwards
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "ReadExecutor":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+
+    def __repr__(self) -> str:
+        return "ReadExecutor(max_workers={0}, backend='{1}', start_method={2!r})".format(
+            self.max_workers, self.backend, self.start_method)
+
+
+# executors used when none is given, one per backend, started on first use and shut down at exit. A call with
+# another number of workers replaces the executor of its backend; the replaced one is shut down once the last
+# caller using it is done, as other threads may still be reading with it.
+_default_executors: "dict[str, ReadExecutor]" = dict()
+_default_executor_users: "dict[ReadExecutor, int]" = dict()
+_default_executors_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def default_executor(backend: Literal["processes", "threads"], max_workers: int) -> Iterator[ReadExecutor]:
+    """
+    Lends the module level executor of a backend with max_workers workers for the duration of the with block
+    """
+    with _default_executors_lock:
+        executor = _default_executors.get(backend)
+        if executor is None or executor.max_workers != max_workers:
+            executor = ReadExecutor(max_workers=max_workers, backend=backend)
+            _default_executors[backend] = executor
+        _default_executor_users[executor] = _default_executor_users.get(executor, 0) + 1
+    try:
+        yield executor
+    finally:
+        with _default_executors_lock:
+            _default_executor_users[executor] -= 1
+            retired = False
+            if not _default_executor_users[executor]:
+                del _default_executor_users[executor]
+                retired = _default_executors.get(backend) is not executor
+        if retired:
+            executor.shutdown(wait=False)
+
+
+@atexit.register
+def _shutdown_default_executors() -> None:
+    with _default_executors_lock:
+        executors = list(_default_executors.values())
+        _default_executors.clear()
+    for executor in executors:
+        executor.shutdown()
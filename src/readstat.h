@@ -338,6 +338,30 @@ typedef readstat_off_t (*readstat_seek_handler)(readstat_off_t offset, readstat_
 typedef ssize_t (*readstat_read_handler)(void *buf, size_t nbyte, void *io_ctx);
 typedef readstat_error_t (*readstat_update_handler)(long file_size, readstat_progress_handler progress_handler, void *user_ctx, void *io_ctx);
 
+/* Position in the data where parsing can be resumed: for row compressed SAV files the
+ * file offset of the next compressed byte plus the pending bytecode commands, for ZSAV
+ * files the same but with the offset in the uncompressed data, for SAS7BDAT files the
+ * offset of the page starting with the row. */
+typedef struct readstat_row_checkpoint_s {
+    long                row;
+    readstat_off_t      offset;
+    unsigned char       commands[8];
+    int                 commands_left;
+} readstat_row_checkpoint_t;
+
+typedef int (*readstat_checkpoint_handler)(const readstat_row_checkpoint_t *checkpoint, void *ctx);
+
+/* A zlib block of a ZSAV file, the inflate handler fills output with the uncompressed
+ * data of blocks[block_index] and may prepare the following blocks meanwhile. */
+typedef struct readstat_block_s {
+    readstat_off_t      compressed_offset;
+    size_t              compressed_size;
+    size_t              uncompressed_size;
+} readstat_block_t;
+
+typedef int (*readstat_inflate_handler)(int block_index, const readstat_block_t *blocks, int n_blocks,
+        unsigned char *output, size_t output_len, void *ctx);
+
 typedef struct readstat_io_s {
     readstat_open_handler          open;
     readstat_close_handler         close;
@@ -357,6 +381,8 @@ typedef struct readstat_callbacks_s {
     readstat_value_label_handler   value_label;
     readstat_error_handler         error;
     readstat_progress_handler      progress;
+    readstat_checkpoint_handler    checkpoint;
+    readstat_inflate_handler       inflate;
 } readstat_callbacks_t;
 
 typedef struct readstat_parser_s {
@@ -366,6 +392,8 @@ typedef struct readstat_parser_s {
     const char             *output_encoding;
     long                    row_limit;
     long                    row_offset;
+    long                    checkpoint_interval;
+    const readstat_row_checkpoint_t *row_checkpoint;
 } readstat_parser_t;
 
 readstat_parser_t *readstat_parser_init(void);
@@ -399,6 +427,15 @@ readstat_error_t readstat_set_handler_character_encoding(readstat_parser_t *pars
 readstat_error_t readstat_set_row_limit(readstat_parser_t *parser, long row_limit);
 readstat_error_t readstat_set_row_offset(readstat_parser_t *parser, long row_offset);
 
+// Row compressed SAV, ZSAV and SAS7BDAT files only: report a checkpoint every `interval' rows
+// while parsing, and resume parsing from a checkpoint at or before the row offset.
+readstat_error_t readstat_set_checkpoint_handler(readstat_parser_t *parser,
+        readstat_checkpoint_handler checkpoint_handler, long interval);
+readstat_error_t readstat_set_row_checkpoint(readstat_parser_t *parser, const readstat_row_checkpoint_t *checkpoint);
+
+// ZSAV files only: let the caller inflate the zlib blocks instead of inflating them in the parser.
+readstat_error_t readstat_set_inflate_handler(readstat_parser_t *parser, readstat_inflate_handler inflate_handler);
+
 /* Parse binary / portable files */
 readstat_error_t readstat_parse_dta(readstat_parser_t *parser, const char *path, void *user_ctx);
 readstat_error_t readstat_parse_sav(readstat_parser_t *parser, const char *path, void *user_ctx);
@@ -119,3 +119,20 @@ readstat_error_t readstat_set_row_offset(readstat_parser_t *parser, long row_off
     parser->row_offset = row_offset;
     return READSTAT_OK;
 }
+
+readstat_error_t readstat_set_checkpoint_handler(readstat_parser_t *parser,
+        readstat_checkpoint_handler checkpoint_handler, long interval) {
+    parser->handlers.checkpoint = checkpoint_handler;
+    parser->checkpoint_interval = interval;
+    return READSTAT_OK;
+}
+
+readstat_error_t readstat_set_row_checkpoint(readstat_parser_t *parser, const readstat_row_checkpoint_t *checkpoint) {
+    parser->row_checkpoint = checkpoint;
+    return READSTAT_OK;
+}
+
+readstat_error_t readstat_set_inflate_handler(readstat_parser_t *parser, readstat_inflate_handler inflate_handler) {
+    parser->handlers.inflate = inflate_handler;
+    return READSTAT_OK;
+}
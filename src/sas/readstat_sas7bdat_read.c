@@ -49,6 +49,10 @@ typedef struct sas7bdat_ctx_s {
     uint32_t        column_count;
     uint32_t        row_limit;
     uint32_t        row_offset;
+    uint32_t        file_row;       /* rows parsed or skipped so far */
+
+    long            checkpoint_interval;
+    const readstat_row_checkpoint_t *row_checkpoint;
 
     uint64_t        header_size;
     uint64_t        page_count;
@@ -450,6 +454,7 @@ cleanup:
 static readstat_error_t sas7bdat_parse_single_row(const char *data, sas7bdat_ctx_t *ctx) {
     if (ctx->parsed_row_count == ctx->row_limit)
         return READSTAT_OK;
+    ctx->file_row++;
     if (ctx->row_offset) {
         ctx->row_offset--;
         return READSTAT_OK;
@@ -620,6 +625,12 @@ cleanup:
 }
 
 static readstat_error_t sas7bdat_parse_subheader_compressed(const char *subheader, size_t len, sas7bdat_ctx_t *ctx) {
+    /* skipped rows are not decompressed */
+    if (ctx->row_offset && ctx->parsed_row_count != ctx->row_limit) {
+        ctx->file_row++;
+        ctx->row_offset--;
+        return READSTAT_OK;
+    }
     if (ctx->rdc_compression)
         return sas7bdat_parse_subheader_rdc(subheader, len, ctx);
 
@@ -1139,16 +1150,81 @@ cleanup:
     return retval;
 }
 
+/* Skips a data page made only of rows before row_offset, reading just its header */
+static readstat_error_t sas7bdat_skip_data_page(int *skipped, sas7bdat_ctx_t *ctx) {
+    readstat_error_t retval = READSTAT_OK;
+    readstat_io_t *io = ctx->io;
+    size_t head_len = ctx->page_header_size;
+    size_t tail_len = ctx->page_size - head_len;
+
+    *skipped = 0;
+    if (io->read(ctx->page, head_len, io->io_ctx) < head_len) {
+        retval = READSTAT_ERROR_READ;
+        goto cleanup;
+    }
+
+    uint16_t page_type = sas_read2(&ctx->page[head_len-8], ctx->bswap);
+    uint16_t page_row_count = sas_read2(&ctx->page[head_len-6], ctx->bswap);
+    if ((page_type & SAS_PAGE_TYPE_MASK) == SAS_PAGE_TYPE_DATA && page_row_count <= ctx->row_offset) {
+        if ((retval = sas7bdat_submit_columns_if_needed(ctx, 0)) != READSTAT_OK)
+            goto cleanup;
+        if (io->seek(tail_len, READSTAT_SEEK_CUR, io->io_ctx) == -1) {
+            retval = READSTAT_ERROR_SEEK;
+            goto cleanup;
+        }
+        ctx->row_offset -= page_row_count;
+        ctx->file_row += page_row_count;
+        *skipped = 1;
+    } else if (io->read(ctx->page + head_len, tail_len, io->io_ctx) < tail_len) {
+        retval = READSTAT_ERROR_READ;
+    }
+
+cleanup:
+    return retval;
+}
+
 static readstat_error_t sas7bdat_parse_all_pages_pass2(sas7bdat_ctx_t *ctx) {
     readstat_error_t retval = READSTAT_OK;
     readstat_io_t *io = ctx->io;
     int64_t i;
+    uint32_t next_checkpoint_row = ctx->checkpoint_interval;
+    const readstat_row_checkpoint_t *row_checkpoint = ctx->row_checkpoint;
 
     for (i=0; i<ctx->page_count; i++) {
         if ((retval = sas7bdat_update_progress(ctx)) != READSTAT_OK) {
             goto cleanup;
         }
-        if (io->read(ctx->page, ctx->page_size, io->io_ctx) < ctx->page_size) {
+        /* once the metadata is known, jump to the page of the checkpoint if it is before row_offset */
+        if (row_checkpoint && ctx->did_submit_columns && ctx->row_offset &&
+                row_checkpoint->row > ctx->file_row && row_checkpoint->row <= ctx->file_row + ctx->row_offset &&
+                row_checkpoint->offset > ctx->header_size + i*ctx->page_size) {
+            if (io->seek(row_checkpoint->offset, READSTAT_SEEK_SET, io->io_ctx) == -1) {
+                retval = READSTAT_ERROR_SEEK;
+                goto cleanup;
+            }
+            ctx->row_offset -= row_checkpoint->row - ctx->file_row;
+            ctx->file_row = row_checkpoint->row;
+            i = (row_checkpoint->offset - ctx->header_size) / ctx->page_size;
+            row_checkpoint = NULL;
+        }
+        if (ctx->handle.checkpoint && ctx->checkpoint_interval > 0 && ctx->did_submit_columns &&
+                ctx->file_row >= next_checkpoint_row) {
+            readstat_row_checkpoint_t checkpoint = {
+                .row = ctx->file_row,
+                .offset = ctx->header_size + i*ctx->page_size };
+            if (ctx->handle.checkpoint(&checkpoint, ctx->user_ctx) != READSTAT_HANDLER_OK) {
+                retval = READSTAT_ERROR_USER_ABORT;
+                goto cleanup;
+            }
+            next_checkpoint_row = ctx->file_row + ctx->checkpoint_interval;
+        }
+        if (ctx->row_offset && ctx->row_length && ctx->parsed_row_count < ctx->row_limit) {
+            int skipped = 0;
+            if ((retval = sas7bdat_skip_data_page(&skipped, ctx)) != READSTAT_OK)
+                goto cleanup;
+            if (skipped)
+                continue;
+        } else if (io->read(ctx->page, ctx->page_size, io->io_ctx) < ctx->page_size) {
             retval = READSTAT_ERROR_READ;
             goto cleanup;
         }
@@ -1187,6 +1263,8 @@ readstat_error_t readstat_parse_sas7bdat(readstat_parser_t *parser, const char *
     ctx->row_limit = parser->row_limit;
     if (parser->row_offset > 0)
         ctx->row_offset = parser->row_offset;
+    ctx->checkpoint_interval = parser->checkpoint_interval;
+    ctx->row_checkpoint = parser->row_checkpoint;
 
     if (io->open(path, io->io_ctx) == -1) {
         retval = READSTAT_ERROR_OPEN;
@@ -88,6 +88,8 @@ typedef struct sav_ctx_s {
     int            row_limit;
     int            row_offset;
     int            current_row;
+    long           checkpoint_interval;
+    const readstat_row_checkpoint_t *row_checkpoint;
     int            value_labels_count;
     int            fweight_index;
 
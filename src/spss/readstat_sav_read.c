@@ -892,16 +892,37 @@ static readstat_error_t sav_read_compressed_data(sav_ctx_t *ctx,
         .bias = ctx->bias,
         .bswap = ctx->bswap };
 
+    /* rows decompressed so far including the skipped ones, and the file offset of buffer */
+    long row = 0;
+    readstat_off_t buffer_offset = 0;
+
     if (uncompressed_row_len && (uncompressed_row = readstat_malloc(uncompressed_row_len)) == NULL) {
         retval = READSTAT_ERROR_MALLOC;
         goto done;
     }
 
+    if (ctx->row_checkpoint && ctx->row_checkpoint->row > 0 && ctx->row_checkpoint->row <= ctx->row_offset) {
+        if (io->seek(ctx->row_checkpoint->offset, READSTAT_SEEK_SET, io->io_ctx) == -1) {
+            retval = READSTAT_ERROR_SEEK;
+            goto done;
+        }
+        memcpy(state.chunk, ctx->row_checkpoint->commands, sizeof(state.chunk));
+        state.i = ctx->row_checkpoint->commands_left;
+        row = ctx->row_checkpoint->row;
+        ctx->row_offset -= row;
+    }
+
+    if (ctx->handle.checkpoint && (buffer_offset = io->seek(0, READSTAT_SEEK_CUR, io->io_ctx)) == -1) {
+        retval = READSTAT_ERROR_SEEK;
+        goto done;
+    }
+
     while (1) {
         retval = sav_update_progress(ctx);
         if (retval != READSTAT_OK)
             goto done;
 
+        buffer_offset += buffer_used;
         buffer_used = io->read(buffer, sizeof(buffer), io->io_ctx);
         if (buffer_used == -1 || buffer_used == 0 || (buffer_used % 8) != 0)
             goto done;
@@ -927,6 +948,19 @@ static readstat_error_t sav_read_compressed_data(sav_ctx_t *ctx,
                     goto done;
 
                 uncompressed_offset = 0;
+                row++;
+
+                if (ctx->handle.checkpoint && ctx->checkpoint_interval > 0 && row % ctx->checkpoint_interval == 0) {
+                    readstat_row_checkpoint_t checkpoint = {
+                        .row = row,
+                        .offset = buffer_offset + data_offset,
+                        .commands_left = state.i };
+                    memcpy(checkpoint.commands, state.chunk, sizeof(checkpoint.commands));
+                    if (ctx->handle.checkpoint(&checkpoint, ctx->user_ctx) != READSTAT_HANDLER_OK) {
+                        retval = READSTAT_ERROR_USER_ABORT;
+                        goto done;
+                    }
+                }
             }
 
             if (state.status == SAV_ROW_STREAM_FINISHED_ALL)
@@ -1642,6 +1676,8 @@ readstat_error_t readstat_parse_sav(readstat_parser_t *parser, const char *path,
     ctx->output_encoding = parser->output_encoding;
     ctx->user_ctx = user_ctx;
     ctx->file_size = file_size;
+    ctx->checkpoint_interval = parser->checkpoint_interval;
+    ctx->row_checkpoint = parser->row_checkpoint;
     if (parser->row_offset > 0)
         ctx->row_offset = parser->row_offset;
     if (ctx->record_count >= 0) {
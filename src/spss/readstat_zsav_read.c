@@ -1,4 +1,5 @@
 #include <stdlib.h>
+#include <string.h>
 #include <zlib.h>
 
 #include "../readstat.h"
@@ -49,11 +50,16 @@ readstat_error_t zsav_read_compressed_data(sav_ctx_t *ctx,
     struct zheader zheader;
     struct ztrailer ztrailer;
     struct ztrailer_entry *ztrailer_entries = NULL;
+    readstat_block_t *blocks = NULL;
 
     int n_blocks = 0;
     int block_i = 0;
     int i;
 
+    /* rows decompressed so far including the skipped ones, and where to start in the first block */
+    long row = 0;
+    readstat_off_t resume_offset = 0;
+
     if (io->read(&zheader, sizeof(struct zheader), io->io_ctx) < sizeof(struct zheader)) {
         retval = READSTAT_ERROR_READ;
         goto cleanup;
@@ -115,39 +121,78 @@ readstat_error_t zsav_read_compressed_data(sav_ctx_t *ctx,
         goto cleanup;
     }
 
-    while (1) {
-        if (block_i == n_blocks)
-            goto cleanup;
-
-        struct ztrailer_entry *entry = &ztrailer_entries[block_i];
-        if (io->seek(entry->compressed_ofs, READSTAT_SEEK_SET, io->io_ctx) == -1) {
-            retval = READSTAT_ERROR_SEEK;
-            goto cleanup;
-        }
-        if ((compressed_block = readstat_realloc(compressed_block, entry->compressed_size)) == NULL) {
+    if (ctx->handle.inflate && n_blocks) {
+        if ((blocks = readstat_malloc(n_blocks * sizeof(readstat_block_t))) == NULL) {
             retval = READSTAT_ERROR_MALLOC;
             goto cleanup;
         }
-        if (io->read(compressed_block, entry->compressed_size, io->io_ctx) != entry->compressed_size) {
-            retval = READSTAT_ERROR_READ;
-            goto cleanup;
+        for (i=0; i<n_blocks; i++) {
+            blocks[i].compressed_offset = ztrailer_entries[i].compressed_ofs;
+            blocks[i].compressed_size = ztrailer_entries[i].compressed_size;
+            blocks[i].uncompressed_size = ztrailer_entries[i].uncompressed_size;
+        }
+    }
+
+    /* the checkpoint offset is in the uncompressed data, only the block holding it is inflated */
+    if (ctx->row_checkpoint && ctx->row_checkpoint->row > 0 && ctx->row_checkpoint->row <= ctx->row_offset) {
+        const readstat_row_checkpoint_t *checkpoint = ctx->row_checkpoint;
+        for (block_i=0; block_i<n_blocks; block_i++) {
+            struct ztrailer_entry *entry = &ztrailer_entries[block_i];
+            if (checkpoint->offset >= entry->uncompressed_ofs &&
+                    checkpoint->offset < entry->uncompressed_ofs + entry->uncompressed_size) {
+                resume_offset = checkpoint->offset - entry->uncompressed_ofs;
+                break;
+            }
         }
+        memcpy(state.chunk, checkpoint->commands, sizeof(state.chunk));
+        state.i = checkpoint->commands_left;
+        row = checkpoint->row;
+        ctx->row_offset -= row;
+    }
+
+    while (1) {
+        if (block_i == n_blocks)
+            goto cleanup;
 
+        struct ztrailer_entry *entry = &ztrailer_entries[block_i];
         uncompressed_block_len = entry->uncompressed_size;
         if ((uncompressed_block = readstat_realloc(uncompressed_block, uncompressed_block_len)) == NULL) {
             retval = READSTAT_ERROR_MALLOC;
             goto cleanup;
         }
-        int status = uncompress(uncompressed_block, &uncompressed_block_len,
-                compressed_block, entry->compressed_size);
-        if (status != Z_OK || uncompressed_block_len != entry->uncompressed_size) {
-            retval = READSTAT_ERROR_PARSE;
-            goto cleanup;
+
+        if (blocks) {
+            if (ctx->handle.inflate(block_i, blocks, n_blocks, uncompressed_block, uncompressed_block_len,
+                        ctx->user_ctx) != READSTAT_HANDLER_OK) {
+                retval = READSTAT_ERROR_USER_ABORT;
+                goto cleanup;
+            }
+        } else {
+            if (io->seek(entry->compressed_ofs, READSTAT_SEEK_SET, io->io_ctx) == -1) {
+                retval = READSTAT_ERROR_SEEK;
+                goto cleanup;
+            }
+            if ((compressed_block = readstat_realloc(compressed_block, entry->compressed_size)) == NULL) {
+                retval = READSTAT_ERROR_MALLOC;
+                goto cleanup;
+            }
+            if (io->read(compressed_block, entry->compressed_size, io->io_ctx) != entry->compressed_size) {
+                retval = READSTAT_ERROR_READ;
+                goto cleanup;
+            }
+
+            int status = uncompress(uncompressed_block, &uncompressed_block_len,
+                    compressed_block, entry->compressed_size);
+            if (status != Z_OK || uncompressed_block_len != entry->uncompressed_size) {
+                retval = READSTAT_ERROR_PARSE;
+                goto cleanup;
+            }
         }
 
         block_i++;
         state.status = SAV_ROW_STREAM_HAVE_DATA;
-        data_offset = 0;
+        data_offset = resume_offset;
+        resume_offset = 0;
 
         while (state.status != SAV_ROW_STREAM_NEED_DATA) {
             state.next_in = &uncompressed_block[data_offset];
@@ -167,6 +212,19 @@ readstat_error_t zsav_read_compressed_data(sav_ctx_t *ctx,
                     goto cleanup;
 
                 uncompressed_offset = 0;
+                row++;
+
+                if (ctx->handle.checkpoint && ctx->checkpoint_interval > 0 && row % ctx->checkpoint_interval == 0) {
+                    readstat_row_checkpoint_t checkpoint = {
+                        .row = row,
+                        .offset = entry->uncompressed_ofs + data_offset,
+                        .commands_left = state.i };
+                    memcpy(checkpoint.commands, state.chunk, sizeof(checkpoint.commands));
+                    if (ctx->handle.checkpoint(&checkpoint, ctx->user_ctx) != READSTAT_HANDLER_OK) {
+                        retval = READSTAT_ERROR_USER_ABORT;
+                        goto cleanup;
+                    }
+                }
             }
 
             if (state.status == SAV_ROW_STREAM_FINISHED_ALL)
@@ -181,6 +239,8 @@ cleanup:
         free(uncompressed_row);
     if (ztrailer_entries)
         free(ztrailer_entries);
+    if (blocks)
+        free(blocks);
     if (compressed_block)
         free(compressed_block);
     if (uncompressed_block)
@@ -16,10 +16,12 @@
 # #############################################################################
 
 from datetime import datetime, timedelta, date
+import io
 import unittest
 import os
 import sys
 import shutil
+import threading
 
 import pandas as pd
 import numpy as np
@@ -405,6 +407,15 @@ class TestBasic(unittest.TestCase):
         self.assertTrue(meta.number_rows == len(self.df_pandas))
         self.assertTrue(len(meta.notes) > 0)
 
+    def test_zsav_num_threads(self):
+        df, meta = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample.zsav"), num_threads=2)
+        self.assertTrue(df.equals(self.df_pandas))
+        df_single, meta_single = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample_large.sav"))
+        path = os.path.join(self.write_folder, "num_threads.zsav")
+        pyreadstat.write_sav(df_single, path, compress=True)
+        df, meta = pyreadstat.read_sav(path, num_threads=3, row_offset=100, row_limit=50)
+        self.assertTrue(df.equals(df_single.iloc[100:150].reset_index(drop=True)))
+
     def test_zsav_metaonly(self):
         df, meta = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample.zsav"))
         df2, meta2 = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample.sav"), metadataonly=True)
@@ -444,6 +455,122 @@ class TestBasic(unittest.TestCase):
         self.assertTrue(meta.variable_storage_width["mychar"] == 8)
         self.assertTrue(meta.variable_measure["mychar"]=="nominal")
 
+    def test_metadata_cache(self):
+        path = os.path.join(self.write_folder, "metadata_cache.sav")
+        shutil.copy(os.path.join(self.basic_data_folder, "sample.sav"), path)
+        df, meta = pyreadstat.read_sav(path, metadataonly=True)
+        hits = pyreadstat.metadata_cache.hits
+        df2, meta2 = pyreadstat.read_sav(path, metadataonly=True)
+        self.assertEqual(pyreadstat.metadata_cache.hits, hits + 1)
+        self.assertTrue(df2.equals(df))
+        self.assertEqual(meta2.column_names, meta.column_names)
+        self.assertEqual(meta2.variable_value_labels, meta.variable_value_labels)
+        self.assertEqual(meta2.notes, meta.notes)
+        # the cached metadata is not changed through the metadata returned
+        meta2.column_names.append("other")
+        meta2.value_labels["labels0"][3.0] = "other"
+        df3, meta3 = pyreadstat.read_sav(path, metadataonly=True)
+        self.assertEqual(meta3.column_names, meta.column_names)
+        self.assertEqual(meta3.value_labels, meta.value_labels)
+        # other options or a changed file are parsed again
+        df3, meta3 = pyreadstat.read_sav(path, metadataonly=True, usecols=["mychar"])
+        self.assertEqual(meta3.column_names, ["mychar"])
+        pyreadstat.write_sav(self.df_pandas[["mynum"]], path)
+        df3, meta3 = pyreadstat.read_sav(path, metadataonly=True)
+        self.assertEqual(meta3.column_names, ["mynum"])
+        df, meta = pyreadstat.read_file_multiprocessing(pyreadstat.read_sav,
+                                                        os.path.join(self.basic_data_folder, "sample.sav"),
+                                                        num_processes=2, apply_value_formats=True)
+        self.assertTrue(df.equals(self.df_pandas_formatted))
+
+    def test_column_cache(self):
+        cache_dir = os.path.join(self.write_folder, "column_cache")
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        for read_function, file_name in ((pyreadstat.read_sav, "sample.sav"), (pyreadstat.read_sas7bdat, "sample.sas7bdat"),
+                                         (pyreadstat.read_dta, "sample.dta")):
+            path = os.path.join(self.basic_data_folder, file_name)
+            df, meta = read_function(path)
+            for _ in range(2):
+                df_cached, meta_cached = read_function(path, cache_dir=cache_dir)
+                self.assertTrue(df_cached.equals(df))
+                self.assertEqual(meta_cached.column_names, meta.column_names)
+                self.assertEqual(meta_cached.number_rows, meta.number_rows)
+                self.assertEqual(meta_cached.variable_value_labels, meta.variable_value_labels)
+            df_cached, meta_cached = read_function(path, cache_dir=cache_dir, row_offset=1, row_limit=2)
+            self.assertTrue(df_cached.equals(df.iloc[1:3].reset_index(drop=True)))
+        cache = pyreadstat.ColumnCache(cache_dir, max_size=0)
+        self.assertEqual(len(os.listdir(cache_dir)), 6)
+        # a file written again gets a new entry, only the last one is kept
+        path = os.path.join(self.write_folder, "column_cache.sav")
+        pyreadstat.write_sav(self.df_pandas[["mynum"]], path)
+        df, meta = pyreadstat.read_sav(path, cache_dir=cache)
+        pyreadstat.write_sav(self.df_pandas[["mynum", "mychar"]], path)
+        df, meta = pyreadstat.read_sav(path, cache_dir=cache)
+        self.assertEqual(meta.column_names, ["mynum", "mychar"])
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+
+    def test_column_cache_damaged(self):
+        import warnings
+        cache_dir = os.path.join(self.write_folder, "column_cache_damaged")
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        path = os.path.join(self.write_folder, "column_cache_damaged.sav")
+        # big enough for the column to be stored in a .npy file of its own
+        pyreadstat.write_sav(pd.DataFrame({"number": np.arange(20000, dtype=np.float64)}), path)
+        df, meta = pyreadstat.read_sav(path, cache_dir=cache_dir)
+        entry, = os.listdir(cache_dir)
+        array_file, = [name for name in os.listdir(os.path.join(cache_dir, entry)) if name.endswith(".npy")]
+        with open(os.path.join(cache_dir, entry, array_file), "wb") as fh:
+            fh.write(b"garbage")
+        # a damaged entry is removed and the file is parsed again
+        df_cached, meta_cached = pyreadstat.read_sav(path, cache_dir=cache_dir)
+        self.assertTrue(df_cached.equals(df))
+        df_cached, meta_cached = pyreadstat.read_sav(path, cache_dir=cache_dir)
+        self.assertTrue(df_cached.equals(df))
+        # folders of entries being written by other processes are not evicted, unless they were left long ago
+        cache = pyreadstat.ColumnCache(cache_dir, max_size=0)
+        temp_folder = os.path.join(cache_dir, ".tmp-other")
+        os.mkdir(temp_folder)
+        cache.evict()
+        self.assertTrue(os.path.isdir(temp_folder))
+        os.utime(temp_folder, (0, 0))
+        cache.evict()
+        self.assertFalse(os.path.isdir(temp_folder))
+        # an entry that cannot be written gives a warning, the read succeeds
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            df_cached, meta_cached = pyreadstat.read_sav(path, cache_dir=os.path.join(path, "not_a_folder"))
+        self.assertTrue(df_cached.equals(df))
+        self.assertTrue(any(issubclass(warning.category, RuntimeWarning) for warning in caught))
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def test_row_filter(self):
+        import narwhals.stable.v2 as nw
+        path = os.path.join(self.basic_data_folder, "sample.sav")
+        df, meta = pyreadstat.read_sav(path)
+        expected = df[(df.mynum > 1) & df.mylabl.notna()].reset_index(drop=True)
+        for row_filter in ("mynum > 1 and mylabl != None", (nw.col("mynum") > 1) & ~nw.col("mylabl").is_null()):
+            df_filtered, meta_filtered = pyreadstat.read_sav(path, row_filter=row_filter)
+            self.assertTrue(df_filtered.equals(expected))
+            self.assertEqual(meta_filtered.number_rows, len(expected))
+        # the columns of the filter are read even if they are not in usecols
+        df_filtered, meta_filtered = pyreadstat.read_sav(path, usecols=["mychar"], row_filter="mynum > 1 and mylabl != None")
+        self.assertTrue(df_filtered.equals(expected[["mychar"]]))
+        self.assertEqual(meta_filtered.column_names, ["mychar"])
+        # more rows than a block of the filter, the rows kept of every block are moved back in the buffers
+        path = os.path.join(self.write_folder, "row_filter.sav")
+        rows = 250000
+        df = pd.DataFrame({"number": np.arange(rows, dtype=np.float64), "text": ["x" * (i % 7) + str(i) for i in range(rows)]})
+        pyreadstat.write_sav(df, path)
+        df_filtered, meta_filtered = pyreadstat.read_sav(path, row_filter="number < 1000 or text in ('xx9', 'xxxxx150001')")
+        expected = df[(df.number < 1000) | df.text.isin(["xx9", "xxxxx150001"])].reset_index(drop=True)
+        self.assertTrue(df_filtered.equals(expected))
+        chunks = [chunk for chunk, _ in pyreadstat.read_file_in_chunks(pyreadstat.read_sav, path, chunksize=60000, row_filter="number >= 200000")]
+        self.assertEqual([len(chunk) for chunk in chunks], [40000, 10000])
+        with self.assertRaises(pyreadstat.PyreadstatError):
+            pyreadstat.read_sav(path, row_filter="number + 1 > 2")
+
     def test_por(self):
         df, meta = pyreadstat.read_por(os.path.join(self.basic_data_folder, "sample.por"))
         df_pandas_por = self.df_pandas.copy()
@@ -455,6 +582,21 @@ class TestBasic(unittest.TestCase):
         #self.assertTrue(meta.creation_time==datetime(2018, 12, 16, 17, 28, 21))
         #self.assertTrue(meta.modification_time==datetime(2018, 12, 16, 17, 28, 21))
 
+    def test_io_mmap(self):
+        readers = ((pyreadstat.read_por, "sample.por"), (pyreadstat.read_sav, "sample.sav"), (pyreadstat.read_sav, "sample.zsav"),
+                   (pyreadstat.read_dta, "sample.dta"), (pyreadstat.read_sas7bdat, "sample.sas7bdat"),
+                   (pyreadstat.read_xport, "sample.xpt"))
+        for read_function, file_name in readers:
+            path = os.path.join(self.basic_data_folder, file_name)
+            df, meta = read_function(path)
+            df_mmap, meta_mmap = read_function(path, io="mmap")
+            self.assertTrue(df_mmap.equals(df))
+            self.assertEqual(meta_mmap.number_rows, meta.number_rows)
+            df_mmap, meta_mmap = read_function(path, io="mmap", row_offset=1, row_limit=2)
+            self.assertTrue(df_mmap.equals(df.iloc[1:3].reset_index(drop=True)))
+        with self.assertRaises(pyreadstat.PyreadstatError):
+            pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample.sav"), io="unknown")
+
     def test_por_formatted(self):
         df, meta = pyreadstat.read_por(os.path.join(self.basic_data_folder, "sample.por"), apply_value_formats=True, formats_as_category=True)
         df_pandas_por = self.df_pandas_formatted.copy()
@@ -637,6 +779,27 @@ class TestBasic(unittest.TestCase):
         currow = self.df_nodates_sastata.iloc[1:3,:].reset_index(drop=True)
         self.assertTrue(df.equals(currow))
 
+    def test_chunk_reader_stream(self):
+        # the file is parsed once, chunks must be the same as reading each of them with row_offset and row_limit
+        cases = [(pyreadstat.read_sav, os.path.join(self.basic_data_folder, "sample_large.sav"), {}),
+                 (pyreadstat.read_dta, os.path.join(self.basic_data_folder, "sample.dta"), {"apply_value_formats": True}),
+                 (pyreadstat.read_por, os.path.join(self.basic_data_folder, "sample.por"), {}),
+                 (pyreadstat.read_dta, os.path.join(self.missing_data_folder, "missing_test.dta"), {"user_missing": True})]
+        for read_function, fpath, kwargs in cases:
+            offset = 1
+            for df, meta in pyreadstat.read_file_in_chunks(read_function, fpath, chunksize=2, offset=offset, **kwargs):
+                df_chunk, meta_chunk = read_function(fpath, row_offset=offset, row_limit=2, **kwargs)
+                self.assertTrue(df.equals(df_chunk))
+                self.assertEqual(meta.number_rows, meta_chunk.number_rows)
+                self.assertEqual(meta.variable_value_labels, meta_chunk.variable_value_labels)
+                self.assertEqual(meta.missing_user_values, meta_chunk.missing_user_values)
+                offset += 2
+        # stopping early stops the parser
+        reader = pyreadstat.read_file_in_chunks(pyreadstat.read_sav, cases[0][1], chunksize=10)
+        next(reader)
+        reader.close()
+        self.assertFalse([x for x in threading.enumerate() if x.name == "pyreadstat-stream"])
+
     # read multiprocessing
 
     def test_multiprocess_reader(self):
@@ -678,6 +841,94 @@ class TestBasic(unittest.TestCase):
             df_single['MYCHAR'] = df_single['MYCHAR'].astype(object)
         self.assertTrue(df_multi.equals(df_single))
 
+    def test_multiprocess_reader_threads(self):
+        fpath = os.path.join(self.basic_data_folder, "sample_large.sav")
+        df_multi, meta_multi = pyreadstat.read_file_multiprocessing(pyreadstat.read_sav, fpath, num_processes=3, backend="threads")
+        df_single, meta_single = pyreadstat.read_sav(fpath)
+        self.assertTrue(df_multi.equals(df_single))
+        self.assertEqual(meta_multi.number_rows, meta_single.number_rows)
+        # por has no number of rows in the metadata, strings as category are joined across ranges
+        fpath = os.path.join(self.basic_data_folder, "sample.por")
+        df_multi, meta_multi = pyreadstat.read_file_multiprocessing(pyreadstat.read_por, fpath, num_processes=2, num_rows=1000,
+                                                                    backend="threads", strings_as_category=True)
+        df_single, meta_single = pyreadstat.read_por(fpath, strings_as_category=True)
+        self.assertTrue(df_multi.equals(df_single))
+        self.assertEqual(meta_multi.number_rows, meta_single.number_rows)
+
+    def test_multiprocess_reader_shared_memory(self):
+        # numeric columns are written by the workers to memory shared with the parent, the rest is sent back
+        fpath = os.path.join(self.basic_data_folder, "sample_large.sav")
+        df_multi, meta_multi = pyreadstat.read_file_multiprocessing(pyreadstat.read_sav, fpath, num_processes=3,
+                                                                    strings_as_category=True, user_missing=True)
+        df_single, meta_single = pyreadstat.read_sav(fpath, strings_as_category=True, user_missing=True)
+        self.assertTrue(df_multi.equals(df_single))
+        self.assertEqual(meta_multi.number_rows, meta_single.number_rows)
+        fpath = os.path.join(self.missing_data_folder, "missing_test.dta")
+        df_multi, meta_multi = pyreadstat.read_file_multiprocessing(pyreadstat.read_dta, fpath, num_processes=2, user_missing=True)
+        df_single, meta_single = pyreadstat.read_dta(fpath, user_missing=True)
+        self.assertTrue(df_multi.equals(df_single))
+        self.assertEqual(meta_multi.missing_user_values, meta_single.missing_user_values)
+        if os.path.isdir("/dev/shm"):
+            self.assertFalse([x for x in os.listdir("/dev/shm") if x.startswith("pyreadstat-")])
+
+    def test_read_executor(self):
+        fpath = os.path.join(self.basic_data_folder, "sample_large.sav")
+        df_single, meta_single = pyreadstat.read_sav(fpath)
+        with pyreadstat.ReadExecutor(max_workers=2, start_method="spawn") as executor:
+            df_multi, meta_multi = pyreadstat.read_file_multiprocessing(pyreadstat.read_sav, fpath, executor=executor)
+            self.assertTrue(df_multi.equals(df_single))
+            pool = executor._get_executor()
+            chunks = [df for df, meta in pyreadstat.read_file_in_chunks(pyreadstat.read_sav, fpath, chunksize=100,
+                                                                         multiprocess=True, executor=executor)]
+            self.assertTrue(pd.concat(chunks, ignore_index=True).equals(df_single))
+            # the workers are reused
+            self.assertIs(executor._get_executor(), pool)
+            with self.assertRaises(Exception):
+                pyreadstat.read_file_multiprocessing(pyreadstat.read_sav, fpath, executor=executor, backend="threads")
+        self.assertIsNone(executor._executor)
+        with pyreadstat.ReadExecutor(max_workers=3, backend="threads") as executor:
+            df_multi, meta_multi = pyreadstat.read_file_multiprocessing(pyreadstat.read_sav, fpath, executor=executor)
+            self.assertTrue(df_multi.equals(df_single))
+            self.assertEqual(meta_multi.number_rows, meta_single.number_rows)
+
+    def test_default_executor_concurrent(self):
+        # callers asking for different numbers of workers at the same time do not shut down each other's pool
+        from concurrent.futures import ThreadPoolExecutor
+        fpath = os.path.join(self.basic_data_folder, "sample_large.sav")
+        df_single, meta_single = pyreadstat.read_sav(fpath)
+        for backend in ("threads", "processes"):
+            with ThreadPoolExecutor(max_workers=2) as callers:
+                futures = [callers.submit(pyreadstat.read_file_multiprocessing, pyreadstat.read_sav, fpath,
+                                          num_processes=2 + x % 2, backend=backend) for x in range(20)]
+                results = [future.result() for future in futures]
+            for df_multi, meta_multi in results:
+                self.assertTrue(df_multi.equals(df_single))
+            # one pool is kept per backend, a pool replaced while in use is shut down when its last user is done
+            default_executor = pyreadstat.worker.default_executor
+            with default_executor(backend, 2) as first, default_executor(backend, 2) as second:
+                self.assertIs(first, second)
+                first._get_executor()
+                with default_executor(backend, 3) as third:
+                    self.assertIsNot(third, first)
+                    self.assertIs(pyreadstat.worker._default_executors[backend], third)
+                self.assertIsNotNone(first._executor)
+            self.assertIsNone(first._executor)
+            with default_executor(backend, 3) as fourth:
+                self.assertIs(fourth, third)
+            self.assertEqual(len(pyreadstat.worker._default_executor_users), 0)
+
+    def test_threaded_reader(self):
+        from concurrent.futures import ThreadPoolExecutor
+        readers = [(pyreadstat.read_sav, "sample_large.sav"), (pyreadstat.read_dta, "sample.dta"),
+                   (pyreadstat.read_sas7bdat, "sample.sas7bdat"), (pyreadstat.read_por, "sample.por")] * 2
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(reader, os.path.join(self.basic_data_folder, fname)) for reader, fname in readers]
+            results = [future.result() for future in futures]
+        for (reader, fname), (df_thread, meta_thread) in zip(readers, results):
+            df_single, meta_single = reader(os.path.join(self.basic_data_folder, fname))
+            self.assertTrue(df_thread.equals(df_single))
+            self.assertEqual(meta_thread.number_rows, meta_single.number_rows)
+
     # writing
 
     def test_sav_write_basic(self):
@@ -987,6 +1238,9 @@ class TestBasic(unittest.TestCase):
         df, meta = pyreadstat.read_sas7bdat(path, extra_date_formats=["MMYY", "YEAR"])
         self.assertEqual(df['yr'].iloc[0], date(2023,1,1))
         self.assertEqual(df['dtc4'].iloc[0], date(2023,7,1))
+        # extra formats apply only to the call where they were given
+        df, meta = pyreadstat.read_sas7bdat(path)
+        self.assertEqual(df['yr'].iloc[0], 23011)
 
     def test_sas7bdat_file_label_windows(self):
         "testing file label for file produced on windows"
@@ -1088,6 +1342,17 @@ class TestBasic(unittest.TestCase):
                     continue
                 self.assertTrue(val==curdfcol[indx])
 
+    def test_outputformat_arrow(self):
+        import pyarrow as pa
+        for fname, read_function in (("sample.sav", pyreadstat.read_sav), ("sample.dta", pyreadstat.read_dta),
+                                     ("sample.por", pyreadstat.read_por)):
+            path = os.path.join(self.basic_data_folder, fname)
+            table, meta = read_function(path, output_format='arrow')
+            self.assertIsInstance(table, pa.Table)
+            self.assertEqual(table.num_rows, meta.number_rows or len(self.df_pandas))
+            dictdata, _ = read_function(path, output_format='dict')
+            self.assertDictEqual(table.to_pydict(), dict(dictdata))
+
     def test_sav_write_rowcompression(self):
         file_label = "row compression write"
         file_note = "These are some notes"
@@ -1111,6 +1376,107 @@ class TestBasic(unittest.TestCase):
         #self.assertDictEqual(meta.variable_alignment, variable_alignment)
         self.assertEqual(meta.variable_measure["mychar"], variable_measure["mychar"])
 
+    def test_sav_row_index(self):
+        df_single, meta_single = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample_large.sav"))
+        path = os.path.join(self.write_folder, "row_index.sav")
+        pyreadstat.write_sav(df_single, path, row_compress=True)
+        index_path = pyreadstat.build_index(path, row_interval=7)
+        self.assertTrue(os.path.isfile(index_path))
+        for offset in (0, 6, 7, 8, 100, 484, 485):
+            df, meta = pyreadstat.read_sav(path, row_offset=offset, row_limit=20, use_index=True)
+            df_noindex, meta_noindex = pyreadstat.read_sav(path, row_offset=offset, row_limit=20)
+            self.assertTrue(df.equals(df_noindex))
+        df_multi, meta_multi = pyreadstat.read_file_multiprocessing(pyreadstat.read_sav, path, num_processes=3,
+                                                                    backend="threads", use_index=True)
+        df, meta = pyreadstat.read_sav(path)
+        self.assertTrue(df_multi.equals(df))
+        # zsav files resume inflating from the block holding the row
+        zpath = os.path.join(self.write_folder, "row_index.zsav")
+        pyreadstat.write_sav(df_single, zpath, compress=True)
+        pyreadstat.build_index(zpath, row_interval=7)
+        for offset in (0, 6, 7, 8, 100, 484, 485):
+            df, meta = pyreadstat.read_sav(zpath, row_offset=offset, row_limit=20, use_index=True)
+            df_noindex, meta_noindex = pyreadstat.read_sav(zpath, row_offset=offset, row_limit=20)
+            self.assertTrue(df.equals(df_noindex))
+        # the index is not used if the file changed after building it
+        os.utime(path, ns=(0, 0))
+        with self.assertRaises(pyreadstat.PyreadstatError):
+            pyreadstat.read_sav(path, row_offset=10, use_index=True)
+
+    def test_sas7bdat_row_offset(self):
+        df_single, meta_single = pyreadstat.read_sas7bdat(os.path.join(self.basic_data_folder, "sample_bincompressed.sas7bdat"))
+        path = os.path.join(self.write_folder, "row_index.sas7bdat")
+        shutil.copy(os.path.join(self.basic_data_folder, "sample_bincompressed.sas7bdat"), path)
+        pyreadstat.build_index(path, row_interval=2)
+        for offset in range(len(df_single)):
+            df, meta = pyreadstat.read_sas7bdat(path, row_offset=offset, row_limit=2, use_index=True)
+            self.assertTrue(df.equals(df_single.iloc[offset:offset+2].reset_index(drop=True)))
+        df, meta = pyreadstat.read_sas7bdat(path, row_offset=len(df_single), use_index=True)
+        self.assertEqual(len(df), 0)
+
+    def test_sas7bdat_row_offset_pages(self):
+        # files of 3000 rows in many pages of 4 KB, uncompressed (data pages) and char (RLE) or binary (RDC)
+        # row compressed (compressed subheaders)
+        from pyreadstat.pyreadstat import _read_index
+        for fname in ("sample_multipage.sas7bdat", "sample_multipage_compressed.sas7bdat",
+                      "sample_multipage_bincompressed.sas7bdat"):
+            df_single, meta_single = pyreadstat.read_sas7bdat(os.path.join(self.basic_data_folder, fname))
+            path = os.path.join(self.write_folder, fname)
+            shutil.copy(os.path.join(self.basic_data_folder, fname), path)
+            # with an interval of one row the index has the first row of every page holding rows
+            pyreadstat.build_index(path, row_interval=1)
+            page_rows = [entry[0] for entry in _read_index(path)]
+            self.assertGreater(len(page_rows), 20)
+            offsets = set()
+            for row in page_rows[::4] + page_rows[-2:]:
+                offsets.update((row - 1, row, row + 1))
+            offsets.add(len(df_single) - 1)
+            pyreadstat.build_index(path, row_interval=500)
+            for use_index in (False, True):
+                for offset in sorted(offsets):
+                    df, meta = pyreadstat.read_sas7bdat(path, row_offset=offset, row_limit=150, use_index=use_index)
+                    self.assertTrue(df.equals(df_single.iloc[offset:offset+150].reset_index(drop=True)))
+                df, meta = pyreadstat.read_sas7bdat(path, row_offset=page_rows[-1], use_index=use_index)
+                self.assertTrue(df.equals(df_single.iloc[page_rows[-1]:].reset_index(drop=True)))
+                for offset in (len(df_single), len(df_single) + 10):
+                    df, meta = pyreadstat.read_sas7bdat(path, row_offset=offset, use_index=use_index)
+                    self.assertEqual(len(df), 0)
+        # the skipped data pages of the uncompressed file are not read
+        class CountingReader:
+            def __init__(self, file_bytes):
+                self.buffer = io.BytesIO(file_bytes)
+                self.bytes_read = 0
+            def read(self, size=-1):
+                data = self.buffer.read(size)
+                self.bytes_read += len(data)
+                return data
+            def seek(self, offset, whence=0):
+                return self.buffer.seek(offset, whence)
+            def tell(self):
+                return self.buffer.tell()
+        with open(os.path.join(self.basic_data_folder, "sample_multipage.sas7bdat"), "rb") as f:
+            file_bytes = f.read()
+        reader = CountingReader(file_bytes)
+        df, meta = pyreadstat.read_sas7bdat(reader, row_offset=2900, buffer_size=0)
+        self.assertEqual(len(df), 100)
+        self.assertLess(reader.bytes_read, len(file_bytes) // 4)
+
+    def test_sas7bdat_num_threads(self):
+        # one page binary compressed, and many pages uncompressed, char (RLE) and binary (RDC) compressed
+        for fname in ("sample_bincompressed.sas7bdat", "sample_multipage.sas7bdat",
+                      "sample_multipage_compressed.sas7bdat", "sample_multipage_bincompressed.sas7bdat"):
+            path = os.path.join(self.basic_data_folder, fname)
+            df_single, meta_single = pyreadstat.read_sas7bdat(path, num_threads=1)
+            for num_threads in (2, 3, 8):
+                df, meta = pyreadstat.read_sas7bdat(path, num_threads=num_threads)
+                self.assertTrue(df.equals(df_single))
+                self.assertEqual(meta.number_rows, meta_single.number_rows)
+            df, meta = pyreadstat.read_sas7bdat(path, num_threads=2, row_offset=1, row_limit=3)
+            self.assertTrue(df.equals(df_single.iloc[1:4].reset_index(drop=True)))
+            n_rows = len(df_single)
+            df, meta = pyreadstat.read_sas7bdat(path, num_threads=3, row_offset=n_rows // 3, row_limit=n_rows // 2)
+            self.assertTrue(df.equals(df_single.iloc[n_rows // 3:n_rows // 3 + n_rows // 2].reset_index(drop=True)))
+
 if __name__ == '__main__':
 
     import sys
@@ -6,12 +6,15 @@ Run with: python tests/test_http_integration.py --inplace
 """
 import io
 import os
+import re
 import threading
 import unittest
 import urllib.request
 from contextlib import contextmanager
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 
+import pandas as pd
+
 
 @contextmanager
 def http_server(directory):
@@ -31,6 +34,46 @@ def http_server(directory):
         server.shutdown()
 
 
+@contextmanager
+def range_http_server(directory, max_length=None):
+    """Context manager that runs an HTTP server supporting Range requests, it counts the bytes sent. With
+    max_length it sends at most that many bytes of each range, as servers cutting long ranges do."""
+    sent = {"requests": 0, "bytes": 0}
+
+    class RangeHandler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+        def log_message(self, *args):
+            pass
+        def do_GET(self):
+            path = self.translate_path(self.path)
+            match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+            if match is None or not os.path.isfile(path):
+                return super().do_GET()
+            size = os.path.getsize(path)
+            start, stop = int(match.group(1)), min(int(match.group(2)), size - 1)
+            if max_length is not None:
+                stop = min(stop, start + max_length - 1)
+            with open(path, "rb") as fh:
+                fh.seek(start)
+                data = fh.read(stop - start + 1)
+            sent["requests"] += 1
+            sent["bytes"] += len(data)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{stop}/{size}")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = HTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", sent
+    finally:
+        server.shutdown()
+
+
 class TestHttpIntegration(unittest.TestCase):
 
     def test_read_sav_from_http(self):
@@ -45,6 +88,70 @@ class TestHttpIntegration(unittest.TestCase):
             self.assertEqual(len(df), 5, f"Expected 5 rows, got {len(df)}")
             self.assertEqual(len(df.columns), 7, f"Expected 7 columns, got {len(df.columns)}")
 
+    def test_read_url_range_requests(self):
+        """Test reading files directly from urls with Range requests."""
+        data_folder = os.path.join(os.path.dirname(__file__), "..", "test_data", "basic")
+        readers = ((pyreadstat.read_sav, "sample.sav"), (pyreadstat.read_sav, "sample.zsav"),
+                   (pyreadstat.read_dta, "sample.dta"), (pyreadstat.read_sas7bdat, "sample.sas7bdat"),
+                   (pyreadstat.read_por, "sample.por"), (pyreadstat.read_xport, "sample.xpt"))
+
+        with range_http_server(data_folder) as (base_url, sent):
+            for read_function, file_name in readers:
+                df, meta = read_function(os.path.join(data_folder, file_name))
+                df_url, meta_url = read_function(f"{base_url}/{file_name}")
+                self.assertTrue(df_url.equals(df))
+                self.assertEqual(meta_url.column_names, meta.column_names)
+            # only the blocks holding the requested rows are fetched
+            large_file = os.path.join(data_folder, "sample_large.sav")
+            sent["bytes"] = 0
+            remote = pyreadstat.HttpRangeFile(f"{base_url}/sample_large.sav", block_size=1024)
+            df, meta = pyreadstat.read_sav(remote, row_offset=400, row_limit=5)
+            df_local, meta_local = pyreadstat.read_sav(large_file, row_offset=400, row_limit=5)
+            self.assertTrue(df.equals(df_local))
+            self.assertLess(sent["bytes"], os.path.getsize(large_file) // 2)
+
+    def test_read_url_in_chunks(self):
+        """Test reading a url in chunks, the blocks fetched for the metadata and every chunk are shared."""
+        data_folder = os.path.join(os.path.dirname(__file__), "..", "test_data", "basic")
+        large_file = os.path.join(data_folder, "sample_large.sav")
+        df_local, meta_local = pyreadstat.read_sav(large_file)
+
+        with range_http_server(data_folder) as (base_url, sent):
+            chunks = [df for df, meta in pyreadstat.read_file_in_chunks(pyreadstat.read_sav, f"{base_url}/sample_large.sav",
+                                                                        chunksize=100)]
+            self.assertTrue(pd.concat(chunks, ignore_index=True).equals(df_local))
+            # the file is fetched once, not once per chunk
+            self.assertLessEqual(sent["bytes"], os.path.getsize(large_file))
+
+    def test_read_url_short_ranges(self):
+        """Test reading a url from a server sending less than the ranges requested."""
+        data_folder = os.path.join(os.path.dirname(__file__), "..", "test_data", "basic")
+        large_file = os.path.join(data_folder, "sample_large.sav")
+        df_local, meta_local = pyreadstat.read_sav(large_file)
+
+        with range_http_server(data_folder, max_length=5000) as (base_url, sent):
+            # the rest of every range is requested again
+            df, meta = pyreadstat.read_sav(f"{base_url}/sample_large.sav")
+            self.assertTrue(df.equals(df_local))
+        with range_http_server(data_folder, max_length=0) as (base_url, sent):
+            with self.assertRaisesRegex(OSError, "sample_large.sav"):
+                pyreadstat.read_sav(f"{base_url}/sample_large.sav")
+
+    def test_read_url_multiprocessing(self):
+        """Test reading a url in parallel, every worker fetches the file on its own."""
+        data_folder = os.path.join(os.path.dirname(__file__), "..", "test_data", "basic")
+        large_file = os.path.join(data_folder, "sample_large.sav")
+        df_local, meta_local = pyreadstat.read_sav(large_file)
+
+        with range_http_server(data_folder) as (base_url, sent):
+            url = f"{base_url}/sample_large.sav"
+            for backend in ("threads", "processes"):
+                df, meta = pyreadstat.read_file_multiprocessing(pyreadstat.read_sav, url, num_processes=2, backend=backend)
+                self.assertTrue(df.equals(df_local))
+                chunks = [df for df, meta in pyreadstat.read_file_in_chunks(pyreadstat.read_sav, url, chunksize=300,
+                                                                            multiprocess=True, num_processes=2)]
+                self.assertTrue(pd.concat(chunks, ignore_index=True).equals(df_local))
+
 
 if __name__ == '__main__':
 
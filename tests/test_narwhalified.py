@@ -386,6 +386,15 @@ class TestBasic(unittest.TestCase):
         #self.assertTrue(meta.creation_time==datetime(2018, 8, 16, 17, 22, 33))
         #self.assertTrue(meta.modification_time==datetime(2018, 8, 16, 17, 22, 33))
 
+    def test_sav_strings_as_category(self):
+        df, meta = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample.sav"), output_format=self.backend,
+                                       strings_as_category=True)
+        df = nw.from_native(df)
+        self.assertEqual(df.schema["mychar"], nw.Categorical)
+        df = df.with_columns(nw.col("mychar").cast(nw.String)).to_native()
+        df2 = nw.from_native(self.df_pandas).with_columns(nw.col("mychar").cast(nw.String)).to_native()
+        self.assertTrue(df.equals(df2))
+
     def test_sav_metaonly(self):
         df, meta = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample.sav"), output_format=self.backend)
         df2, meta2 = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample.sav"), metadataonly=True, output_format=self.backend)
@@ -516,6 +525,15 @@ class TestBasic(unittest.TestCase):
         self.assertTrue(meta.number_rows == len(df_pandas_por))
         self.assertTrue(len(meta.notes) > 0)
 
+    def test_por_ordered_categories(self):
+        df, meta = pyreadstat.read_por(os.path.join(self.basic_data_folder, "sample.por"), apply_value_formats=True,
+                                       formats_as_ordered_category=True, output_format=self.backend)
+        if self.backend == "pandas":
+            self.assertTrue(df["MYORD"].cat.ordered)
+        else:
+            self.assertTrue(type(nw.from_native(df)["MYORD"].dtype)==nw.Enum)
+        self.assertListEqual(list(nw.from_native(df)["MYORD"].cat.get_categories().to_list()), ['low', 'medium', 'high'])
+
     def test_por_metaonly(self):
         df, meta = pyreadstat.read_por(os.path.join(self.basic_data_folder, "sample.por"), output_format=self.backend)
         df2, meta2 = pyreadstat.read_por(os.path.join(self.basic_data_folder, "sample.por"), metadataonly=True, output_format=self.backend)
@@ -1031,7 +1049,26 @@ class TestBasic(unittest.TestCase):
         sub1 = pyreadstat.set_value_labels(sub1_raw, meta, formats_as_category=True)
         sub2 = self.df_pandas_formatted[['myord']]
         self.assertTrue(sub1.equals(sub2))
-        
+
+    def test_value_labels_while_parsing(self):
+        # labelled columns are stored as codes while parsing, the result is the one of set_value_labels, also
+        # for row ranges read in parallel and columns with tagged missing values
+        path = os.path.join(self.missing_data_folder, "missing_test.dta")
+        df, meta = pyreadstat.read_dta(path, user_missing=True, output_format=self.backend)
+        df_labels = nw.from_native(pyreadstat.set_value_labels(df, meta, formats_as_category=True))
+        df_parsed, meta = pyreadstat.read_dta(path, user_missing=True, apply_value_formats=True, output_format=self.backend)
+        df_ranges, meta = pyreadstat.read_file_multiprocessing(pyreadstat.read_dta, path, num_processes=2, backend="threads",
+                            user_missing=True, apply_value_formats=True, output_format=self.backend)
+        for frame in (df_parsed, df_ranges):
+            frame = nw.from_native(frame)
+            self.assertListEqual(frame.schema.dtypes(), df_labels.schema.dtypes())
+            for column in frame.columns:
+                self.assertEqual(repr(frame[column].to_list()), repr(df_labels[column].to_list()))
+        path = os.path.join(self.basic_data_folder, "sample.sav")
+        df, meta = pyreadstat.read_file_multiprocessing(pyreadstat.read_sav, path, num_processes=2, apply_value_formats=True,
+                            output_format=self.backend)
+        self.assertTrue(df.equals(self.df_pandas_formatted))
+
     def test_update_delete_file(self):
     
         df, meta = pyreadstat.read_sav(os.path.join(self.basic_data_folder, "sample.sav"), output_format=self.backend)
@@ -1254,6 +1291,21 @@ class TestBasic(unittest.TestCase):
             df2["a"] = df2["a"].astype('Int32')
         self.assertTrue(df.equals(df2))
 
+    def test_dta_integers_with_missing(self):
+        if self.backend == "pandas":
+            df = pd.DataFrame.from_dict({'a': [ 1, 2, None]},dtype='Int32')
+        else:
+            df = nw.from_dict({'a': [ 1, 2, None]}, backend=self.backend, schema={'a': nw.Int32}).to_native()
+        path = os.path.join(self.write_folder, "missingint.dta")
+        pyreadstat.write_dta(df, path)
+        df2, meta2 = pyreadstat.read_dta(path, output_format=self.backend, integers_with_missing="float")
+        self.assertEqual(nw.from_native(df2).schema["a"], nw.Float64)
+        self.assertListEqual(nw.from_native(df2)["a"].drop_nulls().to_list(), [1.0, 2.0])
+        df2, meta2 = pyreadstat.read_dta(path, output_format=self.backend, integers_with_missing="nullable")
+        self.assertEqual(nw.from_native(df2).schema["a"], nw.Int64)
+        self.assertEqual(nw.from_native(df2)["a"].null_count(), 1)
+        self.assertRaises(pyreadstat.PyreadstatError, pyreadstat.read_dta, path, integers_with_missing="object")
+
     def test_dta_write_bool_missing(self):
         if self.backend == "pandas":
             df = pd.DataFrame.from_dict({'a': [ True, False, None]},dtype='boolean')
@@ -1385,6 +1437,56 @@ class TestBasic(unittest.TestCase):
         self.assertTrue(meta.number_columns == len(self.df_pandas.columns))
         self.assertTrue(meta.number_rows == len(df_pandas))
 
+    def test_bytesio_buffer_size(self):
+        class ReadOnly:
+            # file-like object without readinto counting the reads
+            def __init__(self, file_bytes):
+                self.buffer = io.BytesIO(file_bytes)
+                self.reads = 0
+            def read(self, size=-1):
+                self.reads += 1
+                return self.buffer.read(size)
+            def seek(self, offset, whence=0):
+                return self.buffer.seek(offset, whence)
+            def tell(self):
+                return self.buffer.tell()
+
+        for reader, fname in ((pyreadstat.read_sav, "sample_large.sav"), (pyreadstat.read_por, "sample.por"),
+                              (pyreadstat.read_sas7bdat, "sample.sas7bdat")):
+            fpath = os.path.join(self.basic_data_folder, fname)
+            with open(fpath, "rb") as f:
+                file_bytes = f.read()
+            df_single, meta_single = reader(fpath, output_format=self.backend)
+            buffer = ReadOnly(file_bytes)
+            df, meta = reader(buffer, output_format=self.backend)
+            self.assertTrue(df.equals(df_single))
+            self.assertLess(buffer.reads, 10)
+            for buffer_size in (0, 5):
+                df, meta = reader(io.BytesIO(file_bytes), buffer_size=buffer_size, output_format=self.backend)
+                self.assertTrue(df.equals(df_single))
+                df, meta = reader(ReadOnly(file_bytes), buffer_size=buffer_size, output_format=self.backend)
+                self.assertTrue(df.equals(df_single))
+
+    def test_bytesio_position(self):
+        # files at the end of a stream are read from the position of the object, which is put back there
+        for reader, fname in ((pyreadstat.read_sav, "sample.sav"), (pyreadstat.read_dta, "sample.dta"),
+                              (pyreadstat.read_sas7bdat, "sample.sas7bdat"), (pyreadstat.read_por, "sample.por")):
+            fpath = os.path.join(self.basic_data_folder, fname)
+            with open(fpath, "rb") as f:
+                file_bytes = f.read()
+            df_single, meta_single = reader(fpath, output_format=self.backend)
+            buffer = io.BytesIO(b"header" + file_bytes)
+            buffer.seek(6)
+            df, meta = reader(buffer, output_format=self.backend)
+            self.assertTrue(df.equals(df_single))
+            self.assertEqual(buffer.tell(), 6)
+            # the same object can be read again
+            df, meta = reader(buffer, row_offset=1, row_limit=2, output_format=self.backend)
+            df_rows, meta_rows = reader(fpath, row_offset=1, row_limit=2, output_format=self.backend)
+            self.assertTrue(df.equals(df_rows))
+            chunks = [df for df, meta in pyreadstat.read_file_in_chunks(reader, buffer, chunksize=2, output_format=self.backend)]
+            self.assertEqual(sum(len(df) for df in chunks), len(df_single))
+
     def test_multiprocess_reader_bytesio(self):
         fpath = os.path.join(self.basic_data_folder, "sample_large.sav")
         with open(fpath, "rb") as f:
@@ -1396,6 +1498,60 @@ class TestBasic(unittest.TestCase):
         self.assertTrue(df_multi.equals(df_single))
         self.assertEqual(meta_multi.number_rows, meta_single.number_rows)
 
+    def test_threaded_reader_bytesio(self):
+        from concurrent.futures import ThreadPoolExecutor
+        readers = [(pyreadstat.read_sav, "sample_large.sav"), (pyreadstat.read_sas7bdat, "sample.sas7bdat"),
+                   (pyreadstat.read_dta, "sample.dta")] * 2
+
+        def read_buffer(reader, fname):
+            with open(os.path.join(self.basic_data_folder, fname), "rb") as f:
+                buffer = io.BytesIO(f.read())
+            return reader(buffer, output_format=self.backend)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(read_buffer, reader, fname) for reader, fname in readers]
+            results = [future.result() for future in futures]
+        for (reader, fname), (df_thread, meta_thread) in zip(readers, results):
+            df_single, meta_single = reader(os.path.join(self.basic_data_folder, fname), output_format=self.backend)
+            self.assertTrue(df_thread.equals(df_single))
+            self.assertEqual(meta_thread.number_rows, meta_single.number_rows)
+
+    def test_aio(self):
+        import asyncio
+
+        class AsyncBytesIO:
+            # async file-like object, as aiofiles files
+            def __init__(self, file_bytes):
+                self.buffer = io.BytesIO(file_bytes)
+            async def read(self, size=-1):
+                return self.buffer.read(size)
+            async def seek(self, offset, whence=0):
+                return self.buffer.seek(offset, whence)
+            async def tell(self):
+                return self.buffer.tell()
+
+        fpath = os.path.join(self.basic_data_folder, "sample_large.sav")
+        dpath = os.path.join(self.basic_data_folder, "sample.dta")
+        df_single, meta_single = pyreadstat.read_sav(fpath, output_format=self.backend)
+        df_dta, meta_dta = pyreadstat.read_dta(dpath, output_format=self.backend)
+        with open(dpath, "rb") as f:
+            dta_bytes = f.read()
+
+        async def read_all():
+            results = await asyncio.gather(pyreadstat.aio.read_sav(fpath, output_format=self.backend),
+                                           pyreadstat.aio.read_dta(AsyncBytesIO(dta_bytes), output_format=self.backend))
+            chunks = [chunk async for chunk in pyreadstat.aio.read_file_in_chunks(pyreadstat.aio.read_dta,
+                      AsyncBytesIO(dta_bytes), chunksize=2, output_format=self.backend)]
+            return results, chunks
+
+        (sav, dta), chunks = asyncio.run(read_all())
+        self.assertTrue(sav[0].equals(df_single))
+        self.assertEqual(sav[1].number_rows, meta_single.number_rows)
+        self.assertTrue(dta[0].equals(df_dta))
+        self.assertEqual([len(df) for df, meta in chunks], [2, 2, 1])
+        df, meta = pyreadstat.read_dta(dpath, row_limit=2, row_offset=2, output_format=self.backend)
+        self.assertTrue(chunks[1][0].equals(df))
+
 
 if __name__ == '__main__':
 